@@ -0,0 +1,118 @@
+import hashlib
+import threading
+import unicodedata
+from datetime import timedelta
+from django.conf import settings
+from django.utils import timezone
+from .models import DocumentAnalysis
+
+class _InFlight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+
+def normalize_text(text):
+    """Canonical form of a document for hashing: NFC, single spaces, trimmed."""
+    return ' '.join(unicodedata.normalize('NFC', text).split())
+
+def content_hash(text):
+    return hashlib.sha256(normalize_text(text).encode('utf-8')).hexdigest()
+
+def _lookup(key, prompt_version):
+    return (
+        DocumentAnalysis.objects
+        .filter(content_hash=key, prompt_version=prompt_version, expires_at__gt=timezone.now())
+        .values_list('result', flat=True)
+        .first()
+    )
+
+def _store(key, prompt_version, result):
+    DocumentAnalysis.objects.update_or_create(
+        content_hash=key,
+        prompt_version=prompt_version,
+        defaults={
+            'result': result,
+            'expires_at': timezone.now() + timedelta(seconds=settings.AI_ANALYSIS_CACHE_TTL),
+        }
+    )
+
+def cached_analysis(text, prompt_version, analyze):
+    """
+    Return the analysis of ``text``, calling ``analyze(text)`` only on a miss.
+    
+    Concurrent misses for the same content in this process wait for the
+    first caller's model call instead of making their own. Failures are not
+    cached and are re-raised to every waiting caller.
+    
+    Args:
+        text (str): Document text
+        prompt_version (str): Version of the prompt ``analyze`` uses
+        analyze (callable): Produces the JSON-serialisable analysis
+    
+    Returns:
+        dict: The analysis
+    """
+    key = content_hash(text)
+    result = _lookup(key, prompt_version)
+    if result is not None:
+        return result
+    
+    flight_key = (key, prompt_version)
+    with _in_flight_lock:
+        flight = _in_flight.get(flight_key)
+        leader = flight is None
+        if leader:
+            flight = _in_flight[flight_key] = _InFlight()
+    
+    if not leader:
+        flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+    
+    try:
+        # Another process may have finished while this one was waiting
+        result = _lookup(key, prompt_version)
+        if result is None:
+            result = analyze(text)
+            _store(key, prompt_version, result)
+        flight.result = result
+        return result
+    except Exception as e:
+        flight.error = e
+        raise
+    finally:
+        with _in_flight_lock:
+            del _in_flight[flight_key]
+        flight.done.set()
+
+def prune_analyses(max_rows=None, batch_size=1000):
+    """
+    Delete expired analyses, then the oldest ones beyond ``max_rows``.
+    
+    Returns:
+        int: Number of analyses deleted
+    """
+    deleted = 0
+    stale = DocumentAnalysis.objects.filter(expires_at__lte=timezone.now())
+    while True:
+        ids = list(stale.values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            break
+        deleted += DocumentAnalysis.objects.filter(pk__in=ids).delete()[0]
+    
+    if max_rows is not None:
+        excess = DocumentAnalysis.objects.count() - max_rows
+        while excess > 0:
+            ids = list(DocumentAnalysis.objects.order_by('created_at').values_list('pk', flat=True)[:min(batch_size, excess)])
+            count = DocumentAnalysis.objects.filter(pk__in=ids).delete()[0]
+            deleted += count
+            excess -= count
+            if not count:
+                break
+    
+    return deleted
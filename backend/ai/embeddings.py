@@ -0,0 +1,201 @@
+import hashlib
+import re
+import threading
+from datetime import timedelta
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from .gateway import get_gateway
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Rows committed just after a sync can carry a slightly earlier timestamp;
+# each sync re-reads this window so they are not missed.
+SYNC_OVERLAP = timedelta(seconds=5)
+
+class HashingEmbedder:
+    """
+    Deterministic local embedder using the hashing trick.
+    
+    Words and word pairs are hashed into a fixed number of signed buckets, so
+    vectors need no model, no network and are identical across processes;
+    suitable for tests and development.
+    """
+    def __init__(self, dimensions=None):
+        self.dimensions = dimensions or settings.AI_EMBEDDING_DIMENSIONS
+        self.name = f'hashing-{self.dimensions}'
+    
+    def _features(self, text):
+        words = TOKEN_RE.findall(text.lower())
+        return words + [f'{first} {second}' for first, second in zip(words, words[1:])]
+    
+    def embed(self, texts):
+        vectors = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                digest = hashlib.blake2b(feature.encode(), digest_size=8).digest()
+                value = int.from_bytes(digest, 'big')
+                vectors[row, value % self.dimensions] += 1.0 if value & (1 << 63) else -1.0
+        return normalize(vectors)
+
+class OpenAIEmbedder:
+    """Embeddings from the OpenAI embeddings API (``AI_EMBEDDING_MODEL``), via the AI gateway."""
+    def __init__(self, model=None):
+        self.model = model or settings.AI_EMBEDDING_MODEL
+        self.name = f'openai-{self.model}'
+    
+    def embed(self, texts):
+        gateway = get_gateway()
+        vectors = gateway.call(gateway.embed(texts, model=self.model))
+        return normalize(np.array(vectors, dtype=np.float32))
+
+def normalize(vectors):
+    """Scale rows to unit length so a dot product is the cosine similarity."""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+def get_embedder():
+    """Build the configured embedder (``AI_EMBEDDER_CLASS``)."""
+    return import_string(settings.AI_EMBEDDER_CLASS)()
+
+def lawyer_document(lawyer):
+    """Text a lawyer profile is embedded from."""
+    user = lawyer.user
+    return '\n'.join(part for part in [
+        lawyer.specialization,
+        lawyer.jurisdiction,
+        user.location,
+        f'{lawyer.years_of_experience} years of experience',
+        user.bio,
+    ] if part)
+
+def bounty_document(bounty):
+    """Text a bounty is embedded from when looking for lawyers."""
+    return '\n'.join(part for part in [
+        bounty.title,
+        getattr(bounty, 'category', ''),
+        getattr(bounty, 'location', ''),
+        bounty.description,
+    ] if part)
+
+def embed_lawyers(lawyers, embedder=None):
+    """
+    Compute and store embeddings for the given lawyer profiles.
+    
+    Args:
+        lawyers (list): LawyerProfile instances, with ``user`` loaded
+        embedder: Embedder to use; defaults to the configured one
+    
+    Returns:
+        int: Number of embeddings written
+    """
+    from .models import LawyerEmbedding
+    
+    lawyers = list(lawyers)
+    if not lawyers:
+        return 0
+    
+    embedder = embedder or get_embedder()
+    vectors = embedder.embed([lawyer_document(lawyer) for lawyer in lawyers])
+    now = timezone.now()
+    
+    LawyerEmbedding.objects.bulk_create(
+        [
+            LawyerEmbedding(lawyer=lawyer, embedder=embedder.name, vector=vector.tobytes(), updated_at=now)
+            for lawyer, vector in zip(lawyers, vectors)
+        ],
+        update_conflicts=True,
+        unique_fields=['lawyer'],
+        update_fields=['embedder', 'vector', 'updated_at']
+    )
+    return len(lawyers)
+
+class LawyerIndex:
+    """
+    In-memory matrix of lawyer embeddings for top-k cosine retrieval.
+    
+    Rows are unit vectors, so a query is one matrix-vector product. The
+    index loads lazily and then only pulls embeddings written since its last
+    sync, which keeps every process current with a single indexed query.
+    """
+    def __init__(self, embedder):
+        self.embedder = embedder
+        self.ids = np.empty(0, dtype=np.int64)
+        self.matrix = np.empty((0, 0), dtype=np.float32)
+        self.positions = {}
+        self.synced_at = None
+        self._lock = threading.Lock()
+    
+    def sync(self):
+        from .models import LawyerEmbedding
+        
+        with self._lock:
+            rows = LawyerEmbedding.objects.filter(embedder=self.embedder.name)
+            if self.synced_at is not None:
+                rows = rows.filter(updated_at__gte=self.synced_at - SYNC_OVERLAP)
+            rows = list(rows.order_by('updated_at').values_list('lawyer_id', 'vector', 'updated_at'))
+            if not rows:
+                return
+            
+            ids = list(self.ids)
+            vectors = list(self.matrix)
+            for lawyer_id, vector, updated_at in rows:
+                vector = np.frombuffer(bytes(vector), dtype=np.float32)
+                if lawyer_id in self.positions:
+                    vectors[self.positions[lawyer_id]] = vector
+                else:
+                    self.positions[lawyer_id] = len(ids)
+                    ids.append(lawyer_id)
+                    vectors.append(vector)
+            
+            self.ids = np.array(ids, dtype=np.int64)
+            self.matrix = np.vstack(vectors).astype(np.float32)
+            self.synced_at = rows[-1][2]
+    
+    def discard(self, lawyer_id):
+        with self._lock:
+            position = self.positions.pop(lawyer_id, None)
+            if position is None:
+                return
+            keep = np.ones(len(self.ids), dtype=bool)
+            keep[position] = False
+            self.ids = self.ids[keep]
+            self.matrix = self.matrix[keep]
+            self.positions = {int(other): index for index, other in enumerate(self.ids)}
+    
+    def search(self, text, k, candidate_ids=None):
+        """
+        Return up to ``k`` ``(lawyer_id, score)`` pairs, most similar first.
+        
+        ``candidate_ids`` restricts the search to the given lawyers.
+        """
+        self.sync()
+        query = self.embedder.embed([text])[0]
+        
+        with self._lock:
+            ids, matrix = self.ids, self.matrix
+        
+        if candidate_ids is not None:
+            mask = np.isin(ids, np.fromiter(candidate_ids, dtype=np.int64))
+            ids, matrix = ids[mask], matrix[mask]
+        if not len(ids):
+            return []
+        
+        scores = matrix @ query
+        k = min(k, len(ids))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(ids[i]), float(scores[i])) for i in top]
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_lawyer_index():
+    """Process-wide lawyer index for the configured embedder."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = LawyerIndex(get_embedder())
+        return _index
@@ -0,0 +1,273 @@
+import asyncio
+import json
+import logging
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+import openai
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Rough size of a token for English text; good enough for rate budgeting
+# and chunking without depending on a particular tokenizer.
+CHARS_PER_TOKEN = 4
+
+RETRYABLE_ERRORS = (
+    asyncio.TimeoutError,
+    openai.error.Timeout,
+    openai.error.RateLimitError,
+    openai.error.APIError,
+    openai.error.APIConnectionError,
+    openai.error.ServiceUnavailableError,
+)
+
+FENCE_RE = re.compile(r'^```(?:json)?\s*(.*?)\s*```$', re.DOTALL)
+
+class AIResponseError(ValueError):
+    """A model reply that is not the JSON that was asked for."""
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+def parse_json(content, expected=dict):
+    """
+    Parse a model reply as JSON of the ``expected`` type.
+    
+    A single surrounding Markdown code fence is tolerated; anything else
+    that is not valid JSON raises AIResponseError. Replies are never
+    evaluated as code.
+    """
+    text = content.strip()
+    match = FENCE_RE.match(text)
+    if match:
+        text = match.group(1)
+    
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError as e:
+        raise AIResponseError(f"Model reply is not valid JSON: {e}") from e
+    
+    if not isinstance(data, expected):
+        raise AIResponseError(f"Model reply is a JSON {type(data).__name__}, expected {expected.__name__}")
+    return data
+
+class TokenBucket:
+    """Asyncio token bucket refilled at ``rate`` per second up to ``capacity``."""
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self, amount=1):
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+class GatewayMetrics:
+    """
+    Per-operation call counts, latency and token usage since start-up.
+    
+    Every attempt is recorded, whatever its outcome: ``errors`` counts all
+    failed attempts, ``retried`` those that were retried, and ``errors_by_type``
+    breaks failures down by exception class.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totals = defaultdict(lambda: {
+            'calls': 0, 'errors': 0, 'retried': 0, 'latency': 0.0, 'prompt_tokens': 0, 'completion_tokens': 0,
+            'errors_by_type': defaultdict(int),
+        })
+    
+    def record(self, operation, latency, usage=None, error=None, retried=False):
+        usage = usage or {}
+        with self._lock:
+            totals = self._totals[operation]
+            totals['calls'] += 1
+            totals['latency'] += latency
+            totals['prompt_tokens'] += usage.get('prompt_tokens', 0)
+            totals['completion_tokens'] += usage.get('completion_tokens', 0)
+            if error is not None:
+                totals['errors'] += 1
+                totals['errors_by_type'][type(error).__name__] += 1
+            if retried:
+                totals['retried'] += 1
+        
+        logger.info(
+            "AI %s call: %.0fms, %s prompt / %s completion tokens%s",
+            operation, latency * 1000, usage.get('prompt_tokens', 0), usage.get('completion_tokens', 0),
+            f", error: {error}" if error is not None else ''
+        )
+    
+    def snapshot(self):
+        with self._lock:
+            return {
+                operation: {
+                    **totals,
+                    'errors_by_type': dict(totals['errors_by_type']),
+                    'avg_latency_ms': totals['latency'] * 1000 / totals['calls'],
+                }
+                for operation, totals in self._totals.items()
+            }
+
+class AIGateway:
+    """
+    Single entry point for model calls from this process.
+    
+    Calls run on one background asyncio loop, so the concurrency limit and
+    the request and token rate limits apply across every thread. Each call
+    has a timeout and is retried with jittered exponential backoff on
+    transient errors. Concurrent embedding requests are merged into batched
+    API calls. Synchronous code uses ``call()`` to wait for a coroutine.
+    """
+    def __init__(self, concurrency=None, requests_per_minute=None, tokens_per_minute=None,
+                 timeout=None, max_retries=None, embedding_batch_size=None, embedding_batch_wait=None):
+        openai.api_key = settings.OPENAI_API_KEY
+        self.concurrency = concurrency or settings.AI_MAX_CONCURRENCY
+        self.requests_per_minute = requests_per_minute or settings.AI_REQUESTS_PER_MINUTE
+        self.tokens_per_minute = tokens_per_minute or settings.AI_TOKENS_PER_MINUTE
+        self.timeout = timeout or settings.AI_REQUEST_TIMEOUT
+        self.max_retries = settings.AI_MAX_RETRIES if max_retries is None else max_retries
+        self.embedding_batch_size = embedding_batch_size or settings.AI_EMBEDDING_BATCH_SIZE
+        self.embedding_batch_wait = embedding_batch_wait or settings.AI_EMBEDDING_BATCH_WAIT
+        self.metrics = GatewayMetrics()
+        
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name='ai-gateway', daemon=True)
+        self._thread.start()
+        self.call(self._start())
+    
+    async def _start(self):
+        # asyncio primitives belong to the loop that creates them
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._requests = TokenBucket(self.requests_per_minute / 60, self.requests_per_minute)
+        self._tokens = TokenBucket(self.tokens_per_minute / 60, self.tokens_per_minute)
+        self._embeddings = asyncio.Queue()
+        self._batcher = self._loop.create_task(self._batch_embeddings())
+    
+    def call(self, coro):
+        """Run ``coro`` on the gateway loop and wait for its result."""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+    
+    def submit(self, coro):
+        """Schedule ``coro`` on the gateway loop; returns a concurrent Future."""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+    
+    async def _request(self, operation, create, estimated_tokens):
+        attempt = 0
+        while True:
+            await self._requests.acquire()
+            await self._tokens.acquire(estimated_tokens)
+            
+            started = time.monotonic()
+            try:
+                async with self._semaphore:
+                    response = await asyncio.wait_for(create(), self.timeout)
+            except RETRYABLE_ERRORS as e:
+                retry = attempt < self.max_retries
+                self.metrics.record(operation, time.monotonic() - started, error=e, retried=retry)
+                if not retry:
+                    raise
+                attempt += 1
+                await asyncio.sleep(settings.AI_RETRY_BACKOFF * 2 ** (attempt - 1) * random.uniform(0.5, 1.5))
+                continue
+            except BaseException as e:
+                # Invalid requests, auth failures and cancellations count too
+                self.metrics.record(operation, time.monotonic() - started, error=e)
+                raise
+            
+            self.metrics.record(operation, time.monotonic() - started, usage=response.get('usage'))
+            return response
+    
+    async def chat(self, system, prompt, model=None, temperature=0.2, max_tokens=None):
+        """Return the text of a chat completion."""
+        kwargs = {
+            'model': model or settings.AI_CHAT_MODEL,
+            'messages': [
+                {"role": "system", "content": system},
+                {"role": "user", "content": prompt}
+            ],
+            'temperature': temperature,
+        }
+        if max_tokens:
+            kwargs['max_tokens'] = max_tokens
+        
+        estimated = estimate_tokens(system) + estimate_tokens(prompt) + (max_tokens or 0)
+        response = await self._request('chat', lambda: openai.ChatCompletion.acreate(**kwargs), estimated)
+        return response.choices[0].message.content
+    
+    async def chat_json(self, system, prompt, expected=dict, **kwargs):
+        """Return a chat completion parsed with ``parse_json``."""
+        return parse_json(await self.chat(system, prompt, **kwargs), expected)
+    
+    async def embed(self, texts, model=None):
+        """Return one embedding per text; concurrent calls share API requests."""
+        future = self._loop.create_future()
+        await self._embeddings.put((model or settings.AI_EMBEDDING_MODEL, list(texts), future))
+        return await future
+    
+    async def _batch_embeddings(self):
+        while True:
+            batch = [await self._embeddings.get()]
+            size = len(batch[0][1])
+            deadline = self._loop.time() + self.embedding_batch_wait
+            
+            while size < self.embedding_batch_size:
+                remaining = deadline - self._loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._embeddings.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                batch.append(item)
+                size += len(item[1])
+            
+            by_model = defaultdict(list)
+            for item in batch:
+                by_model[item[0]].append(item)
+            for model, items in by_model.items():
+                self._loop.create_task(self._embed_batch(model, items))
+    
+    async def _embed_batch(self, model, items):
+        inputs = [text for _, texts, _ in items for text in texts]
+        try:
+            response = await self._request(
+                'embedding',
+                lambda: openai.Embedding.acreate(model=model, input=inputs),
+                sum(estimate_tokens(text) for text in inputs)
+            )
+        except Exception as e:
+            for _, _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        vectors = [row['embedding'] for row in sorted(response['data'], key=lambda row: row['index'])]
+        offset = 0
+        for _, texts, future in items:
+            if not future.done():
+                future.set_result(vectors[offset:offset + len(texts)])
+            offset += len(texts)
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+def get_gateway():
+    """Process-wide AI gateway, started on first use."""
+    global _gateway
+    with _gateway_lock:
+        if _gateway is None:
+            _gateway = AIGateway()
+        return _gateway
@@ -0,0 +1,124 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+from haki.heartbeat import Heartbeat
+from .analysis_cache import cached_analysis
+from .embeddings import embed_lawyers
+from .models import AnalysisJob
+from .pipeline import analyze_document
+from .services import analysis_version
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=settings.AI_JOB_WORKERS, thread_name_prefix='ai-job')
+        return _executor
+
+def submit_document_analysis(document_text, user=None):
+    """
+    Queue a document analysis to run off the request thread.
+    
+    The job starts once the surrounding transaction commits; poll it for
+    progress and the result.
+    
+    Returns:
+        AnalysisJob: The queued job
+    """
+    job = AnalysisJob.objects.create(document_text=document_text, created_by=user)
+    transaction.on_commit(lambda: _get_executor().submit(run_analysis_job, job.pk))
+    return job
+
+def run_analysis_job(job_id, stale_before=None):
+    """
+    Run a queued analysis job, recording progress and outcome on the row.
+    
+    Only a queued job is claimed, or a running one whose last heartbeat
+    (``updated_at``) is older than ``stale_before``, so two workers never run
+    the same job. A timer refreshes ``updated_at`` while the analysis runs,
+    so a slow chunk is not mistaken for a dead worker; every other write
+    refreshes it too, since ``update()`` leaves ``auto_now`` fields alone.
+    
+    Args:
+        job_id: Primary key of the job
+        stale_before (datetime, optional): Take over running jobs idle since before this
+    """
+    close_old_connections()
+    try:
+        claimable = Q(status=AnalysisJob.Status.QUEUED)
+        if stale_before is not None:
+            claimable |= Q(status=AnalysisJob.Status.RUNNING, updated_at__lt=stale_before)
+        
+        claimed = AnalysisJob.objects.filter(claimable, pk=job_id).update(
+            status=AnalysisJob.Status.RUNNING, updated_at=timezone.now()
+        )
+        if not claimed:
+            return
+        
+        job = AnalysisJob.objects.get(pk=job_id)
+        
+        def progress(event):
+            AnalysisJob.objects.filter(pk=job_id).update(
+                completed_chunks=event['completed'], total_chunks=event['total'], updated_at=timezone.now()
+            )
+        
+        heartbeat = Heartbeat(
+            lambda: AnalysisJob.objects.filter(pk=job_id, status=AnalysisJob.Status.RUNNING).update(
+                updated_at=timezone.now()
+            ),
+            settings.AI_JOB_HEARTBEAT_INTERVAL
+        )
+        try:
+            with heartbeat:
+                result = cached_analysis(
+                    job.document_text,
+                    analysis_version(),
+                    lambda text: analyze_document(text, progress=progress)
+                )
+        except Exception as e:
+            logger.warning("Analysis job %s failed: %s", job_id, e)
+            AnalysisJob.objects.filter(pk=job_id).update(
+                status=AnalysisJob.Status.FAILED, error_message=str(e), updated_at=timezone.now()
+            )
+            return
+        
+        AnalysisJob.objects.filter(pk=job_id).update(
+            status=AnalysisJob.Status.SUCCEEDED, result=result, error_message=None, updated_at=timezone.now()
+        )
+    finally:
+        close_old_connections()
+
+def submit_lawyer_embedding(lawyer_id):
+    """Re-embed a lawyer profile off the request thread once the transaction commits."""
+    submit_lawyer_embeddings([lawyer_id])
+
+def submit_lawyer_embeddings(lawyer_ids):
+    """
+    Embed several lawyer profiles in one background job once the transaction commits.
+    
+    Used for writes that skip ``post_save``, such as bulk imports.
+    """
+    lawyer_ids = list(lawyer_ids)
+    if lawyer_ids:
+        transaction.on_commit(lambda: _get_executor().submit(run_lawyer_embeddings, lawyer_ids))
+
+def run_lawyer_embeddings(lawyer_ids):
+    """Compute and store the embeddings of lawyer profiles that still exist, in one embedder call."""
+    from users.models import LawyerProfile
+    
+    close_old_connections()
+    try:
+        embed_lawyers(LawyerProfile.objects.select_related('user').filter(pk__in=lawyer_ids))
+    except Exception as e:
+        logger.warning("Embedding lawyers %s failed: %s", lawyer_ids, e)
+    finally:
+        close_old_connections()
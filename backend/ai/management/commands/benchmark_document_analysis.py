@@ -0,0 +1,28 @@
+import time
+from django.core.management.base import BaseCommand
+from ai.pipeline import FakeModelClient, analyze_document
+
+PARAGRAPH = (
+    "The applicant, a tenant of the suit premises since 2009, contends that the respondent landlord "
+    "issued an eviction notice without the statutory period and disconnected water to the premises. "
+    "The respondent denies the allegations and asserts that rent arrears justify the termination. "
+)
+
+class Command(BaseCommand):
+    help = 'Time the chunked analysis pipeline against a local fake model'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--paragraphs', type=int, default=2000, help='Size of the synthetic document')
+        parser.add_argument('--latency', type=float, default=0.2, help='Seconds the fake model takes per call')
+        parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 8], help='Pool sizes to compare')
+        parser.add_argument('--chunk-tokens', type=int, default=None, help='Override AI_CHUNK_TOKENS')
+    
+    def handle(self, *args, **options):
+        text = '\n\n'.join(PARAGRAPH for _ in range(options['paragraphs']))
+        
+        for workers in options['workers']:
+            client = FakeModelClient(latency=options['latency'])
+            started = time.monotonic()
+            analyze_document(text, client=client, workers=workers, max_tokens=options['chunk_tokens'])
+            elapsed = time.monotonic() - started
+            self.stdout.write(f"workers={workers}: {client.calls} model calls in {elapsed:.2f}s")
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from ai.embeddings import embed_lawyers, get_embedder
+from users.models import LawyerProfile
+
+class Command(BaseCommand):
+    help = 'Compute embeddings for every lawyer profile with the configured embedder'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=256, help='Profiles embedded per request')
+    
+    def handle(self, *args, **options):
+        embedder = get_embedder()
+        batch_size = options['batch_size']
+        lawyers = LawyerProfile.objects.select_related('user').order_by('pk')
+        
+        batch = []
+        total = 0
+        for lawyer in lawyers.iterator(chunk_size=batch_size):
+            batch.append(lawyer)
+            if len(batch) == batch_size:
+                total += embed_lawyers(batch, embedder)
+                batch = []
+        total += embed_lawyers(batch, embedder)
+        
+        self.stdout.write(self.style.SUCCESS(f"Embedded {total} lawyer profiles with {embedder.name}"))
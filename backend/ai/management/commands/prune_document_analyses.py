@@ -0,0 +1,15 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from ai.analysis_cache import prune_analyses
+
+class Command(BaseCommand):
+    help = 'Delete expired cached document analyses and cap the cache size'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--max-rows', type=int, default=settings.AI_ANALYSIS_CACHE_MAX_ROWS,
+                            help='Keep at most this many analyses, evicting the oldest')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows deleted per statement')
+    
+    def handle(self, *args, **options):
+        deleted = prune_analyses(max_rows=options['max_rows'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} cached analyses"))
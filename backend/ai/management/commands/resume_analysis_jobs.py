@@ -0,0 +1,24 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+from ai.jobs import run_analysis_job
+from ai.models import AnalysisJob
+
+class Command(BaseCommand):
+    help = 'Run analysis jobs left queued or running by a restarted process'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--stale-after', type=int, default=600,
+                            help='Seconds without progress before a running job is taken over')
+    
+    def handle(self, *args, **options):
+        stale = timezone.now() - timedelta(seconds=options['stale_after'])
+        job_ids = AnalysisJob.objects.filter(
+            Q(status=AnalysisJob.Status.QUEUED, created_at__lt=stale)
+            | Q(status=AnalysisJob.Status.RUNNING, updated_at__lt=stale)
+        ).values_list('pk', flat=True)
+        
+        for job_id in job_ids:
+            run_analysis_job(job_id, stale_before=stale)
+            self.stdout.write(f"Job {job_id}: {AnalysisJob.objects.get(pk=job_id).status}")
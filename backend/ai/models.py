@@ -0,0 +1,71 @@
+from django.db import models
+from users.models import LawyerProfile, User
+
+class LawyerEmbedding(models.Model):
+    """
+    Precomputed embedding of a lawyer profile for candidate retrieval.
+    
+    The vector is stored as raw float32 bytes; ``embedder`` names the model
+    that produced it so vectors from a previous embedder are never compared
+    with new ones.
+    """
+    lawyer = models.OneToOneField(LawyerProfile, on_delete=models.CASCADE, related_name='embedding')
+    embedder = models.CharField(max_length=100)
+    vector = models.BinaryField()
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['embedder', 'updated_at'], name='lawyer_embedding_sync_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.lawyer} - {self.embedder}"
+
+class DocumentAnalysis(models.Model):
+    """
+    Cached model analysis of a document, addressed by its content.
+    
+    ``content_hash`` is the SHA-256 of the normalized document text, so the
+    same document uploaded twice, or attached to several bounties, is only
+    analysed once per prompt version and model.
+    """
+    content_hash = models.CharField(max_length=64)
+    prompt_version = models.CharField(max_length=100)
+    result = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['content_hash', 'prompt_version'], name='document_analysis_unique'),
+        ]
+    
+    def __str__(self):
+        return f"{self.content_hash[:12]} ({self.prompt_version})"
+
+class AnalysisJob(models.Model):
+    """Document analysis submitted from a request and run in the background."""
+    class Status(models.TextChoices):
+        QUEUED = 'queued', 'Queued'
+        RUNNING = 'running', 'Running'
+        SUCCEEDED = 'succeeded', 'Succeeded'
+        FAILED = 'failed', 'Failed'
+    
+    document_text = models.TextField()
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.QUEUED)
+    completed_chunks = models.PositiveIntegerField(default=0)
+    total_chunks = models.PositiveIntegerField(default=0)
+    result = models.JSONField(null=True, blank=True)
+    error_message = models.TextField(null=True, blank=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='analysis_jobs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'updated_at'], name='analysis_job_status_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Analysis {self.pk} ({self.status})"
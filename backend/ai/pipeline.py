@@ -0,0 +1,204 @@
+import json
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from django.conf import settings
+from .gateway import CHARS_PER_TOKEN, AIResponseError, estimate_tokens, get_gateway, parse_json
+
+ANALYSIS_SYSTEM_PROMPT = "You are a legal assistant that analyzes documents."
+
+CHUNK_PROMPT = """
+    Analyze the following part ({index} of {total}) of a legal document and provide:
+    1. A concise summary (max 3 sentences)
+    2. Key points (bullet points)
+    3. Potential legal issues identified
+    4. Recommended actions
+    
+    Document part:
+    {text}
+    
+    Format your response as JSON with the following structure:
+    {{
+      "summary": "string",
+      "keyPoints": ["string"],
+      "legalIssues": ["string"],
+      "recommendedActions": ["string"]
+    }}
+    """
+
+MERGE_PROMPT = """
+    The following are summaries of consecutive parts of one legal document.
+    Write a concise summary of the whole document (max 3 sentences).
+    
+    {summaries}
+    
+    Respond with JSON: {{"summary": "string"}}
+    """
+
+LIST_FIELDS = ('keyPoints', 'legalIssues', 'recommendedActions')
+
+SENTENCE_RE = re.compile(r'(?<=[.!?;:])\s+')
+
+class OpenAIChatClient:
+    """Chat model client that goes through the process's AI gateway."""
+    def __init__(self, model=None, temperature=0.2):
+        self.model = model or settings.AI_CHAT_MODEL
+        self.temperature = temperature
+    
+    def complete(self, system, prompt):
+        gateway = get_gateway()
+        return gateway.call(gateway.chat(system, prompt, model=self.model, temperature=self.temperature))
+
+class FakeModelClient:
+    """
+    Local stand-in for a chat model, for tests and benchmarks.
+    
+    Answers every prompt with well-formed JSON built from the prompt text,
+    after ``latency`` seconds, and counts the calls it receives.
+    """
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = 0
+    
+    def complete(self, system, prompt):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        
+        body = prompt.split('Document part:')[-1].split('Format your response')[0]
+        return json.dumps({
+            "summary": ' '.join(body.split()[:25]),
+            "keyPoints": [f"Point from call {self.calls}"],
+            "legalIssues": [f"Issue from call {self.calls}"],
+            "recommendedActions": ["Review with counsel"],
+        })
+
+def _pieces(text, max_tokens):
+    """Split text on paragraphs, then sentences, then hard limits, so no piece is over budget."""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    for paragraph in re.split(r'\n\s*\n', text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if len(paragraph) <= max_chars:
+            yield paragraph
+            continue
+        for sentence in SENTENCE_RE.split(paragraph):
+            for start in range(0, len(sentence), max_chars):
+                yield sentence[start:start + max_chars]
+
+def chunk_document(text, max_tokens=None):
+    """
+    Split a document into chunks of at most ``max_tokens`` estimated tokens.
+    
+    Paragraphs are kept whole where they fit, and consecutive pieces are
+    packed together up to the budget.
+    
+    Returns:
+        list: Chunk texts, in document order
+    """
+    max_tokens = max_tokens or settings.AI_CHUNK_TOKENS
+    chunks = []
+    current = []
+    size = 0
+    
+    for piece in _pieces(text, max_tokens):
+        tokens = estimate_tokens(piece)
+        if current and size + tokens > max_tokens:
+            chunks.append('\n\n'.join(current))
+            current, size = [], 0
+        current.append(piece)
+        size += tokens
+    
+    if current:
+        chunks.append('\n\n'.join(current))
+    return chunks
+
+def parse_analysis(content):
+    """Parse a model reply into the analysis shape, rejecting anything else."""
+    data = parse_json(content)
+    if not isinstance(data.get('summary'), str):
+        raise AIResponseError("Analysis reply is missing a summary")
+    
+    analysis = {'summary': data['summary']}
+    for field in LIST_FIELDS:
+        values = data.get(field) or []
+        if not isinstance(values, list):
+            raise AIResponseError(f"Analysis field {field} is not a list")
+        analysis[field] = [str(value) for value in values]
+    return analysis
+
+def _merge_lists(partials, field, limit):
+    seen = set()
+    merged = []
+    for partial in partials:
+        for value in partial[field]:
+            key = value.strip().lower()
+            if key and key not in seen:
+                seen.add(key)
+                merged.append(value.strip())
+    return merged[:limit]
+
+def merge_analyses(partials, client):
+    """
+    Reduce per-chunk analyses to one, in the shape of a single analysis.
+    
+    List fields are concatenated in document order without duplicates; the
+    summaries are condensed by one further model call.
+    """
+    if len(partials) == 1:
+        return partials[0]
+    
+    summaries = '\n'.join(f"Part {index}: {partial['summary']}" for index, partial in enumerate(partials, 1))
+    reply = parse_json(client.complete(ANALYSIS_SYSTEM_PROMPT, MERGE_PROMPT.format(summaries=summaries)))
+    if not isinstance(reply.get('summary'), str):
+        raise AIResponseError("Merge reply is missing a summary")
+    
+    limit = settings.AI_ANALYSIS_MAX_ITEMS
+    return {
+        'summary': reply['summary'],
+        **{field: _merge_lists(partials, field, limit) for field in LIST_FIELDS},
+    }
+
+def iter_document_analysis(text, client=None, max_tokens=None, workers=None):
+    """
+    Analyze a document chunk by chunk, yielding progress as chunks finish.
+    
+    Chunks are analysed concurrently on a bounded thread pool. Each finished
+    chunk yields ``{'completed', 'total', 'chunk', 'partial'}``; the last
+    event is ``{'completed', 'total', 'result'}`` with the merged analysis.
+    """
+    client = client or OpenAIChatClient()
+    chunks = chunk_document(text, max_tokens) or ['']
+    total = len(chunks)
+    partials = [None] * total
+    
+    def analyze(index):
+        prompt = CHUNK_PROMPT.format(index=index + 1, total=total, text=chunks[index])
+        return parse_analysis(client.complete(ANALYSIS_SYSTEM_PROMPT, prompt))
+    
+    with ThreadPoolExecutor(max_workers=min(workers or settings.AI_ANALYSIS_WORKERS, total)) as executor:
+        futures = {executor.submit(analyze, index): index for index in range(total)}
+        for completed, future in enumerate(as_completed(futures), 1):
+            index = futures[future]
+            partials[index] = future.result()
+            yield {'completed': completed, 'total': total, 'chunk': index, 'partial': partials[index]}
+    
+    yield {'completed': total, 'total': total, 'result': merge_analyses(partials, client)}
+
+def analyze_document(text, client=None, progress=None, **options):
+    """
+    Analyze a document of any length with a map-reduce over its chunks.
+    
+    Args:
+        text (str): Document text
+        client: Model client with ``complete(system, prompt)``; defaults to OpenAI
+        progress (callable): Called with each progress event
+    
+    Returns:
+        dict: summary, keyPoints, legalIssues and recommendedActions
+    """
+    for event in iter_document_analysis(text, client, **options):
+        if progress is not None:
+            progress(event)
+    return event['result']
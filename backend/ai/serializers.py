@@ -0,0 +1,11 @@
+from rest_framework import serializers
+from .models import AnalysisJob
+
+class AnalysisJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AnalysisJob
+        fields = ['id', 'document_text', 'status', 'completed_chunks', 'total_chunks',
+                  'result', 'error_message', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'status', 'completed_chunks', 'total_chunks',
+                            'result', 'error_message', 'created_at', 'updated_at']
+        extra_kwargs = {'document_text': {'write_only': True}}
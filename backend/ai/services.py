@@ -1,14 +1,33 @@
-import os
-import openai
+import json
 from django.conf import settings
+from .analysis_cache import cached_analysis
+from .embeddings import bounty_document, get_lawyer_index
+from .gateway import get_gateway
+from .pipeline import analyze_document
 
-# Configure OpenAI API key
-openai.api_key = settings.OPENAI_API_KEY
+def shortlist_lawyers(bounty, lawyers, size=None):
+    """
+    Retrieve the lawyers whose profiles are closest to the bounty
+    
+    Lawyers without a stored embedding are not retrievable; run
+    ``build_lawyer_index`` after changing the embedder.
+    """
+    size = size or settings.AI_LAWYER_SHORTLIST_SIZE
+    by_id = {lawyer.id: lawyer for lawyer in lawyers}
+    matches = get_lawyer_index().search(bounty_document(bounty), size, candidate_ids=by_id)
+    return [by_id[lawyer_id] for lawyer_id, _ in matches]
 
 def match_lawyers_to_bounty(bounty, lawyers):
     """
     Use AI to match lawyers to a legal bounty based on expertise and requirements
+    
+    Only the embedding shortlist is sent to the ranking model, so the prompt
+    stays the same size however many lawyers there are.
     """
+    lawyers = shortlist_lawyers(bounty, lawyers)
+    if not lawyers:
+        return []
+    
     # Format the bounty data
     bounty_data = {
         "title": bounty.title,
@@ -23,9 +42,10 @@ def match_lawyers_to_bounty(bounty, lawyers):
         lawyers_data.append({
             "id": lawyer.id,
             "specialization": lawyer.specialization,
+            "jurisdiction": lawyer.jurisdiction,
             "experience": lawyer.years_of_experience,
-            "location": lawyer.location,
-            "bio": lawyer.bio,
+            "location": lawyer.user.location,
+            "bio": lawyer.user.bio,
         })
     
     # Create the prompt
@@ -39,68 +59,55 @@ def match_lawyers_to_bounty(bounty, lawyers):
     Location: {bounty_data['location']}
     
     Lawyers:
-    {lawyers_data}
+    {json.dumps(lawyers_data)}
     
     Return a JSON array of lawyer IDs ranked from best match to worst match.
     """
     
     try:
-        response = openai.ChatCompletion.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "You are an AI assistant that matches lawyers to legal bounties."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.2,
-        )
+        gateway = get_gateway()
+        ranked_ids = gateway.call(gateway.chat_json(
+            "You are an AI assistant that matches lawyers to legal bounties.",
+            prompt,
+            expected=list
+        ))
         
-        # Parse the response
-        ranked_ids = eval(response.choices[0].message.content)
-        
-        # Return lawyers in the ranked order
-        return [lawyer for lawyer_id in ranked_ids 
-                for lawyer in lawyers if str(lawyer.id) == str(lawyer_id)]
+        # Return lawyers in the ranked order, ignoring ids that were not offered
+        by_id = {str(lawyer.id): lawyer for lawyer in lawyers}
+        ranked = dict.fromkeys(str(lawyer_id) for lawyer_id in ranked_ids)
+        return [by_id[lawyer_id] for lawyer_id in ranked if lawyer_id in by_id]
     
     except Exception as e:
         print(f"Error matching lawyers: {e}")
-        # Fall back to simple matching
+        # Fall back to the embedding order
         return lawyers
 
-def analyze_legal_document(document_text):
+# Bump when the analysis prompt changes so cached analyses are not reused
+ANALYSIS_PROMPT_VERSION = '2'
+
+def analysis_version():
+    """Cache partition of analyses from the configured model and the current prompt."""
+    return f'{ANALYSIS_PROMPT_VERSION}:{settings.AI_CHAT_MODEL}'
+
+def analyze_legal_document(document_text, client=None, progress=None):
     """
     Analyze a legal document using AI
-    """
-    prompt = f"""
-    Analyze the following legal document and provide:
-    1. A concise summary (max 3 sentences)
-    2. Key points (bullet points)
-    3. Potential legal issues identified
-    4. Recommended actions
-    
-    Document:
-    {document_text}
     
-    Format your response as JSON with the following structure:
-    {{
-      "summary": "string",
-      "keyPoints": ["string"],
-      "legalIssues": ["string"],
-      "recommendedActions": ["string"]
-    }}
+    Long documents are split into chunks that are analysed concurrently and
+    merged (see ``ai.pipeline``). Analyses are cached by a hash of the
+    normalized text, so a document that has been analysed before is a
+    database lookup. Only the configured model's analyses are cached; an
+    injected ``client`` always runs.
     """
-    
     try:
-        response = openai.ChatCompletion.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "You are a legal assistant that analyzes documents."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.2,
-        )
+        if client is not None:
+            return analyze_document(document_text, client=client, progress=progress)
         
-        # Parse the response
-        return eval(response.choices[0].message.content)
+        return cached_analysis(
+            document_text,
+            analysis_version(),
+            lambda text: analyze_document(text, progress=progress)
+        )
     
     except Exception as e:
         print(f"Error analyzing document: {e}")
@@ -110,4 +117,3 @@ def analyze_legal_document(document_text):
             "legalIssues": ["Unable to identify issues due to error"],
             "recommendedActions": ["Please try again or consult a legal professional"]
         }
-
@@ -0,0 +1,32 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from users.models import LawyerProfile, User
+from .embeddings import get_lawyer_index
+from .jobs import submit_lawyer_embedding
+
+# Fields the lawyer document is built from (see embeddings.lawyer_document)
+LAWYER_EMBEDDED_FIELDS = {'user', 'specialization', 'jurisdiction', 'years_of_experience'}
+USER_EMBEDDED_FIELDS = {'bio', 'location', 'role'}
+
+def _changes(update_fields, fields):
+    # A save without update_fields may have changed anything
+    return update_fields is None or bool(fields & set(update_fields))
+
+@receiver(post_save, sender=LawyerProfile)
+def refresh_lawyer_embedding(sender, instance, update_fields=None, **kwargs):
+    if _changes(update_fields, LAWYER_EMBEDDED_FIELDS):
+        submit_lawyer_embedding(instance.pk)
+
+@receiver(post_save, sender=User)
+def refresh_user_lawyer_embedding(sender, instance, update_fields=None, **kwargs):
+    # Bio and location live on the user; logins and password upgrades save
+    # other fields and are skipped
+    if instance.role != User.Role.LAWYER or not _changes(update_fields, USER_EMBEDDED_FIELDS):
+        return
+    lawyer_id = LawyerProfile.objects.filter(user=instance).values_list('pk', flat=True).first()
+    if lawyer_id is not None:
+        submit_lawyer_embedding(lawyer_id)
+
+@receiver(post_delete, sender=LawyerProfile)
+def discard_lawyer_embedding(sender, instance, **kwargs):
+    get_lawyer_index().discard(instance.pk)
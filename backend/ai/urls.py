@@ -0,0 +1,10 @@
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from .views import AnalysisJobViewSet
+
+router = DefaultRouter()
+router.register(r'analyses', AnalysisJobViewSet, basename='analysis-job')
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
@@ -0,0 +1,24 @@
+from rest_framework import mixins, status, viewsets
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from .jobs import submit_document_analysis
+from .models import AnalysisJob
+from .serializers import AnalysisJobSerializer
+
+class AnalysisJobViewSet(mixins.CreateModelMixin, viewsets.ReadOnlyModelViewSet):
+    """Submit documents for background analysis and poll their progress."""
+    serializer_class = AnalysisJobSerializer
+    permission_classes = [IsAuthenticated]
+    
+    def get_queryset(self):
+        if self.request.user.role == 'admin':
+            return AnalysisJob.objects.all()
+        return AnalysisJob.objects.filter(created_by=self.request.user)
+    
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        job = submit_document_analysis(serializer.validated_data['document_text'], request.user)
+        
+        return Response(self.get_serializer(job).data, status=status.HTTP_202_ACCEPTED)
@@ -0,0 +1,330 @@
+import logging
+from decimal import Decimal
+import requests
+from django.conf import settings
+from django.db import transaction
+from eth_abi import decode
+from web3 import Web3
+from bounties.cache import invalidate_bounty
+from bounties.models import Bounty
+from marketplace.models import MarketplaceItem, Purchase
+from .models import BlockchainTransaction, IndexerCheckpoint, WalletAddress
+
+logger = logging.getLogger(__name__)
+
+# Events declared in contracts/HakiBounty.sol and contracts/HakiMarketplace.sol:
+# name -> (indexed argument names/types, data argument names/types)
+EVENTS = {
+    'BountyCreated': ([('bountyId', 'uint256'), ('creator', 'address')], [('reward', 'uint256')]),
+    'BountyAccepted': ([('bountyId', 'uint256'), ('worker', 'address')], []),
+    'BountyCompleted': ([('bountyId', 'uint256'), ('worker', 'address')], [('reward', 'uint256')]),
+    'BountyCancelled': ([('bountyId', 'uint256')], []),
+    'ItemListed': ([('itemId', 'uint256'), ('seller', 'address')], [('price', 'uint256')]),
+    'ItemSold': ([('itemId', 'uint256'), ('buyer', 'address'), ('seller', 'address')], [('price', 'uint256')]),
+    'ItemDelisted': ([('itemId', 'uint256')], []),
+}
+
+def _signature(name):
+    indexed, data = EVENTS[name]
+    types = ','.join(arg_type for _, arg_type in indexed + data)
+    return f"{name}({types})"
+
+TOPICS = {'0x' + Web3.keccak(text=_signature(name)).hex().removeprefix('0x'): name for name in EVENTS}
+
+TRANSACTION_TYPES = {
+    'BountyCreated': 'bounty_creation',
+    'BountyAccepted': 'bounty_acceptance',
+    'BountyCompleted': 'bounty_completion',
+    'ItemListed': 'marketplace_listing',
+    'ItemSold': 'marketplace_purchase',
+}
+
+def _decode_topic(topic, arg_type):
+    value = bytes.fromhex(topic[2:] if topic.startswith('0x') else topic)
+    if arg_type == 'address':
+        return Web3.to_checksum_address(value[-20:])
+    return int.from_bytes(value, 'big')
+
+def decode_log(log):
+    """
+    Decode a mirror-node contract log into ``(event name, args)``.
+    
+    Returns None for logs of events the indexer does not track.
+    """
+    topics = log.get('topics') or []
+    if not topics:
+        return None
+    
+    name = TOPICS.get(topics[0].lower())
+    if name is None:
+        return None
+    
+    indexed, data = EVENTS[name]
+    args = {
+        arg_name: _decode_topic(topic, arg_type)
+        for (arg_name, arg_type), topic in zip(indexed, topics[1:])
+    }
+    
+    if data:
+        raw = bytes.fromhex((log.get('data') or '0x')[2:])
+        values = decode([arg_type for _, arg_type in data], raw)
+        args.update({arg_name: value for (arg_name, _), value in zip(data, values)})
+    
+    return name, args
+
+class MirrorNodeSource:
+    """
+    Pages of contract logs from a mirror-node REST API.
+    
+    Any server that implements ``/api/v1/contracts/{id}/results/logs`` with
+    ``links.next`` pagination works, including a local fixture server.
+    """
+    
+    def __init__(self, base_url=None, page_size=100, timeout=10):
+        self.base_url = (base_url or settings.HEDERA_MIRROR_NODE_URL).rstrip('/')
+        self.page_size = page_size
+        self.timeout = timeout
+        self.session = requests.Session()
+    
+    def pages(self, contract_id, from_timestamp):
+        # Inclusive: logs sharing the checkpoint's timestamp may not all have
+        # been ingested, and the indexer skips those that were
+        url = f"{self.base_url}/api/v1/contracts/{contract_id}/results/logs"
+        params = {'order': 'asc', 'limit': self.page_size, 'timestamp': f'gte:{from_timestamp}'}
+        
+        while url:
+            response = self.session.get(url, params=params, timeout=self.timeout)
+            response.raise_for_status()
+            body = response.json()
+            
+            yield body.get('logs', [])
+            
+            next_link = (body.get('links') or {}).get('next')
+            url = f"{self.base_url}{next_link}" if next_link else None
+            params = None
+
+class ContractEventIndexer:
+    """
+    Ingest HakiBounty/HakiMarketplace events into the database.
+    
+    Each page of logs is decoded and applied in one transaction: one
+    transaction row per (tx hash, log index) is upserted with a single
+    bulk_create, bounty and marketplace state with bulk_update, and the
+    checkpoint advances to the (consensus timestamp, log index) of the last
+    log of the page, so a restart resumes where the previous run committed
+    without skipping or repeating a log.
+    """
+    
+    def __init__(self, source=None):
+        self.source = source or MirrorNodeSource()
+        self.scale = Decimal(10) ** getattr(settings, 'HAKI_TOKEN_DECIMALS', 18)
+    
+    def run(self, contract_id):
+        """
+        Index all new events of a contract.
+        
+        Returns:
+            int: Number of tracked events ingested
+        """
+        checkpoint, _ = IndexerCheckpoint.objects.get_or_create(contract_id=contract_id)
+        ingested = 0
+        
+        position = self._position(checkpoint.last_timestamp, checkpoint.last_index)
+        
+        for logs in self.source.pages(contract_id, checkpoint.last_timestamp):
+            if not logs:
+                break
+            
+            logs = [log for log in logs if self._position(log['timestamp'], log.get('index', 0)) > position]
+            if not logs:
+                continue
+            position = self._position(logs[-1]['timestamp'], logs[-1].get('index', 0))
+            
+            events = []
+            for log in logs:
+                decoded = decode_log(log)
+                if decoded is not None:
+                    events.append((log, *decoded))
+            
+            with transaction.atomic():
+                self.apply(events)
+                checkpoint.last_timestamp = logs[-1]['timestamp']
+                checkpoint.last_index = logs[-1].get('index', 0)
+                checkpoint.events_indexed += len(events)
+                checkpoint.save(update_fields=['last_timestamp', 'last_index', 'events_indexed', 'updated_at'])
+            
+            ingested += len(events)
+        
+        return ingested
+    
+    @staticmethod
+    def _position(timestamp, index):
+        seconds, _, nanos = timestamp.partition('.')
+        return int(seconds), int(nanos or 0), int(index)
+    
+    def _amount(self, value):
+        return (Decimal(value) / self.scale).quantize(Decimal('0.00000001'))
+    
+    def apply(self, events):
+        transactions = {}
+        bounty_updates = {}
+        created_bounties = {}
+        item_updates = {}
+        listed_items = {}
+        sales = []
+        
+        for log, name, args in events:
+            tx_hash = log['transaction_hash']
+            
+            if name in TRANSACTION_TYPES:
+                from_address, to_address, amount = self._parties(name, args)
+                log_index = log.get('index', 0)
+                transactions[(tx_hash, log_index)] = BlockchainTransaction(
+                    tx_hash=tx_hash,
+                    log_index=log_index,
+                    from_address=from_address,
+                    to_address=to_address,
+                    amount=amount,
+                    transaction_type=TRANSACTION_TYPES[name],
+                    status='confirmed',
+                    data={'event': name, 'timestamp': log['timestamp'],
+                          'args': {key: str(value) for key, value in args.items()}}
+                )
+            
+            if name == 'BountyCreated':
+                created_bounties[tx_hash] = str(args['bountyId'])
+            elif name.startswith('Bounty'):
+                update = bounty_updates.setdefault(str(args['bountyId']), {})
+                if name == 'BountyAccepted':
+                    update['status'] = 'in_progress'
+                elif name == 'BountyCompleted':
+                    update.update({'status': 'completed', 'completion_tx_hash': tx_hash})
+                elif name == 'BountyCancelled':
+                    update['status'] = 'cancelled'
+            elif name == 'ItemListed':
+                listed_items[tx_hash] = str(args['itemId'])
+            elif name == 'ItemDelisted':
+                item_updates.setdefault(str(args['itemId']), {})['is_active'] = False
+            elif name == 'ItemSold':
+                item_updates.setdefault(str(args['itemId']), {})
+                sales.append((str(args['itemId']), args['buyer'], self._amount(args['price']), tx_hash))
+        
+        if transactions:
+            BlockchainTransaction.objects.bulk_create(
+                transactions.values(),
+                update_conflicts=True,
+                unique_fields=['tx_hash', 'log_index'],
+                update_fields=['from_address', 'to_address', 'amount', 'transaction_type', 'status', 'data']
+            )
+        
+        self._apply_bounties(created_bounties, bounty_updates)
+        items = self._apply_items(listed_items, item_updates)
+        self._apply_sales(sales, items)
+    
+    def _parties(self, name, args):
+        if name == 'BountyCreated':
+            return args['creator'], None, self._amount(args['reward'])
+        if name == 'BountyAccepted':
+            return args['worker'], None, None
+        if name == 'BountyCompleted':
+            return None, args['worker'], self._amount(args['reward'])
+        if name == 'ItemListed':
+            return args['seller'], None, self._amount(args['price'])
+        return args['buyer'], args['seller'], self._amount(args['price'])
+    
+    def _apply_bounties(self, created, updates):
+        changed = {}
+        
+        # Bounties submitted from the platform are matched on their creation transaction
+        for bounty in Bounty.objects.filter(blockchain_tx_hash__in=created):
+            bounty.blockchain_id = created[bounty.blockchain_tx_hash]
+            bounty.is_on_chain = True
+            changed[bounty.pk] = bounty
+        
+        # Later events match on blockchain_id, including ids assigned just
+        # above and not yet written
+        by_chain_id = {bounty.blockchain_id: bounty for bounty in changed.values()}
+        for bounty in Bounty.objects.filter(blockchain_id__in=updates).exclude(pk__in=changed):
+            by_chain_id[bounty.blockchain_id] = bounty
+        
+        for chain_id, fields in updates.items():
+            bounty = by_chain_id.get(chain_id)
+            if bounty is None:
+                continue
+            for field, value in fields.items():
+                setattr(bounty, field, value)
+            bounty.is_on_chain = True
+            changed[bounty.pk] = bounty
+        
+        if changed:
+            Bounty.objects.bulk_update(
+                changed.values(),
+                ['blockchain_id', 'is_on_chain', 'status', 'completion_tx_hash'],
+                batch_size=500
+            )
+            # bulk_update sends no post_save, so cached bounties are moved on here
+            for bounty_id in changed:
+                invalidate_bounty(bounty_id)
+    
+    def _apply_items(self, listed, updates):
+        changed = {}
+        
+        for item in MarketplaceItem.objects.filter(blockchain_tx_hash__in=listed):
+            item.blockchain_id = listed[item.blockchain_tx_hash]
+            item.is_on_chain = True
+            changed[item.pk] = item
+        
+        by_chain_id = {item.blockchain_id: item for item in changed.values()}
+        for item in MarketplaceItem.objects.filter(blockchain_id__in=updates).exclude(pk__in=changed):
+            by_chain_id[item.blockchain_id] = item
+        
+        for chain_id, fields in updates.items():
+            item = by_chain_id.get(chain_id)
+            if item is None:
+                continue
+            for field, value in fields.items():
+                setattr(item, field, value)
+            item.is_on_chain = True
+            changed[item.pk] = item
+        
+        if changed:
+            MarketplaceItem.objects.bulk_update(
+                changed.values(), ['blockchain_id', 'is_on_chain', 'is_active'], batch_size=500
+            )
+        return by_chain_id
+    
+    def _apply_sales(self, sales, items):
+        """
+        Record ItemSold events as on-chain purchases.
+        
+        Purchases made through the platform already exist and are confirmed
+        in place; the rest are created for buyers with a known wallet.
+        """
+        if not sales:
+            return
+        
+        addresses = {buyer for _, buyer, _, _ in sales}
+        wallets = {
+            wallet.address.lower(): wallet.user_id
+            for wallet in WalletAddress.objects.filter(
+                address__in=addresses | {address.lower() for address in addresses}
+            )
+        }
+        
+        purchases = {}
+        for item_id, buyer, price, tx_hash in sales:
+            item = items.get(item_id)
+            buyer_id = wallets.get(buyer.lower())
+            if item is None or buyer_id is None:
+                logger.info("Sale of item %s to %s has no matching item or wallet", item_id, buyer)
+                continue
+            purchases[(item.pk, buyer_id)] = Purchase(
+                item=item, buyer_id=buyer_id, price_paid=price, transaction_hash=tx_hash, is_on_chain=True
+            )
+        
+        Purchase.objects.bulk_create(
+            purchases.values(),
+            update_conflicts=True,
+            unique_fields=['item', 'buyer'],
+            update_fields=['price_paid', 'transaction_hash', 'is_on_chain']
+        )
@@ -0,0 +1,138 @@
+import itertools
+import threading
+import time
+from django.conf import settings
+from .services import chunk_transfers
+
+class LocalHederaService:
+    """
+    In-process stand-in for HederaService.
+    
+    Mirrors HederaService's signatures and return shapes, returns
+    deterministic fake transaction ids without touching the network and
+    records every submission in ``calls``. A transaction id is executed at
+    most once, as on Hedera. Select it with
+    ``HEDERA_SERVICE_CLASS = 'blockchain.local.LocalHederaService'``.
+    """
+    _sequence = itertools.count(1)
+    _lock = threading.Lock()
+    calls = []
+    executed = set()
+    
+    @property
+    def round_trips(self):
+        """Number of transactions submitted so far."""
+        return len(self.calls)
+    
+    def new_transaction_id(self):
+        with self._lock:
+            number = next(self._sequence)
+        return f"0.0.2@{int(time.time())}.{number:09d}"
+    
+    def _submit(self, method, transaction_id=None, **kwargs):
+        """
+        Returns:
+            tuple: (transaction_id, whether this id had already executed)
+        """
+        transaction_id = transaction_id or self.new_transaction_id()
+        with self._lock:
+            if transaction_id in self.executed:
+                return transaction_id, True
+            self.executed.add(transaction_id)
+            self.calls.append((method, kwargs))
+        return transaction_id, False
+    
+    def _status(self, duplicate, wait_for_receipt):
+        return 'SUCCESS' if wait_for_receipt and not duplicate else 'SUBMITTED'
+    
+    def get_receipt_status(self, transaction_id):
+        return 'SUCCESS' if transaction_id in self.executed else 'RECEIPT_NOT_FOUND'
+    
+    def lookup_transaction(self, transaction_id):
+        return 'SUCCESS' if transaction_id in self.executed else None
+    
+    def transfer_hbar(self, recipient_id, amount, wait_for_receipt=True):
+        transaction_id, duplicate = self._submit('transfer_hbar', recipient_id=recipient_id, amount=amount)
+        return {
+            'transaction_id': transaction_id,
+            'status': self._status(duplicate, wait_for_receipt),
+            'amount': amount
+        }
+    
+    def _batch(self, method, transfers, wait_for_receipt, **kwargs):
+        max_transfers = getattr(settings, 'HEDERA_MAX_TRANSFERS_PER_TX', 10)
+        results = []
+        for chunk in chunk_transfers(list(transfers), max_transfers):
+            transaction_id, duplicate = self._submit(method, transfers=chunk, **kwargs)
+            results.extend(
+                {'recipient_id': recipient_id, 'amount': amount, 'transaction_id': transaction_id,
+                 'status': self._status(duplicate, wait_for_receipt), 'error': None}
+                for recipient_id, amount in chunk
+            )
+        return results
+    
+    def transfer_hbar_batch(self, transfers, memo="Haki Platform Payout", wait_for_receipt=True):
+        return self._batch('transfer_hbar_batch', transfers, wait_for_receipt, memo=memo)
+    
+    def transfer_tokens_batch(self, token_id, transfers, memo="Haki Platform Reward", wait_for_receipt=True):
+        return self._batch('transfer_tokens_batch', transfers, wait_for_receipt, token_id=token_id, memo=memo)
+    
+    def mint_and_distribute(self, token_id, allocations, memo="Haki Platform Reward"):
+        total = sum(amount for _, amount in allocations)
+        mint = self.mint_tokens(token_id, total)
+        return {
+            'mint': mint,
+            'transfers': self.transfer_tokens_batch(token_id, allocations, memo)
+        }
+    
+    def create_token(self, name, symbol, initial_supply=0):
+        self._submit('create_token', name=name, symbol=symbol, initial_supply=initial_supply)
+        with self._lock:
+            number = next(self._sequence)
+        return {
+            'token_id': f"0.0.{number}",
+            'name': name,
+            'symbol': symbol,
+            'initial_supply': initial_supply
+        }
+    
+    def mint_tokens(self, token_id, amount, wait_for_receipt=True, transaction_id=None):
+        transaction_id, duplicate = self._submit('mint_tokens', transaction_id, token_id=token_id, amount=amount)
+        return {
+            'transaction_id': transaction_id,
+            'status': self._status(duplicate, wait_for_receipt),
+            'token_id': token_id,
+            'amount': amount
+        }
+    
+    def release_milestone_payment(self, contract_id, escrow_id, milestone_index, wait_for_receipt=True,
+                                  transaction_id=None):
+        transaction_id, duplicate = self._submit(
+            'release_milestone_payment', transaction_id,
+            contract_id=contract_id, escrow_id=escrow_id, milestone_index=milestone_index
+        )
+        return {
+            'transaction_id': transaction_id,
+            'status': self._status(duplicate, wait_for_receipt),
+            'escrow_id': escrow_id,
+            'milestone_index': milestone_index
+        }
+    
+    # Operations the outbox handlers call that HederaService does not
+    # implement yet; they keep the signatures of those call sites.
+    
+    def create_escrow(self, bounty_id, ngo_id, total_amount, milestones, transaction_id=None):
+        # The contract id is read from the creating transaction's record, so a
+        # resubmitted id returns the contract it already created
+        return self._submit('create_escrow', transaction_id, bounty_id=bounty_id, ngo_id=ngo_id,
+                            total_amount=total_amount, milestones=milestones)[0]
+    
+    def process_withdrawal(self, user_id, amount, withdrawal_type, bank_details=None, crypto_details=None,
+                           transaction_id=None):
+        return self._submit('process_withdrawal', transaction_id, user_id=user_id, amount=amount,
+                            withdrawal_type=withdrawal_type)[0]
+    
+    def convert_tokens_to_usd(self, user_id, token_amount, conversion_rate):
+        transaction_id, _ = self._submit('convert_tokens_to_usd', user_id=user_id,
+                                         token_amount=token_amount, conversion_rate=conversion_rate)
+        return {'transaction_id': transaction_id}
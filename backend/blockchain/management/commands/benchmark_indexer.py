@@ -0,0 +1,67 @@
+import secrets
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from blockchain.indexer import ContractEventIndexer, MirrorNodeSource
+from blockchain.mirror_fixture import FixtureMirrorNode, encode_log
+
+class Rollback(Exception):
+    pass
+
+class Command(BaseCommand):
+    help = 'Measure contract event ingestion (events/s) against a local fixture mirror node, rolling everything back'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=10000)
+        parser.add_argument('--page-sizes', type=int, nargs='+', default=[25, 100])
+        parser.add_argument('--events-per-transaction', type=int, default=2)
+    
+    def _logs(self, count, per_transaction):
+        """Bounty lifecycles and marketplace sales, several events per transaction."""
+        run = int(secrets.token_hex(4), 16)
+        creator = '0x' + secrets.token_hex(20)
+        worker = '0x' + secrets.token_hex(20)
+        amount = 10 ** 18
+        events = [
+            lambda n: ('BountyCreated', {'bountyId': n, 'creator': creator, 'reward': amount}),
+            lambda n: ('BountyAccepted', {'bountyId': n, 'worker': worker}),
+            lambda n: ('BountyCompleted', {'bountyId': n, 'worker': worker, 'reward': amount}),
+            lambda n: ('ItemListed', {'itemId': n, 'seller': creator, 'price': amount}),
+            lambda n: ('ItemSold', {'itemId': n, 'buyer': worker, 'seller': creator, 'price': amount}),
+        ]
+        
+        logs = []
+        for number in range(count):
+            transaction_number = number // per_transaction
+            name, args = events[number % len(events)](number)
+            logs.append(encode_log(
+                name, args,
+                '0x' + f'{run:08x}{transaction_number:056x}',
+                f'{1700000000 + transaction_number}.000000001',
+                index=number % per_transaction
+            ))
+        return logs
+    
+    def handle(self, *args, **options):
+        contract_id = f'0.0.{secrets.randbelow(10 ** 9)}'
+        logs = self._logs(options['events'], options['events_per_transaction'])
+        
+        with FixtureMirrorNode() as mirror:
+            mirror.add(contract_id, logs)
+            
+            for page_size in options['page_sizes']:
+                mirror.requests.clear()
+                ingested = 0
+                try:
+                    with transaction.atomic():
+                        started = time.monotonic()
+                        ingested = ContractEventIndexer(MirrorNodeSource(mirror.url, page_size=page_size)).run(contract_id)
+                        elapsed = max(time.monotonic() - started, 1e-6)
+                        raise Rollback()
+                except Rollback:
+                    pass
+                
+                self.stdout.write(
+                    f"page={page_size}: {ingested} events in {elapsed:.2f}s over {len(mirror.requests)} requests "
+                    f"({ingested / elapsed:.0f} events/s)"
+                )
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand, CommandError
+from blockchain.services import get_client_pool
+
+class Command(BaseCommand):
+    help = 'Check that the Hedera client pool can reach the network'
+    
+    def handle(self, *args, **options):
+        status = get_client_pool().health_check()
+        
+        for key, value in status.items():
+            self.stdout.write(f"{key}: {value}")
+        
+        if not status['healthy']:
+            raise CommandError('Hedera client pool is unhealthy')
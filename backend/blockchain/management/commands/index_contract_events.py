@@ -0,0 +1,36 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from blockchain.indexer import ContractEventIndexer, MirrorNodeSource
+
+class Command(BaseCommand):
+    help = 'Ingest HakiBounty and HakiMarketplace events from the mirror node'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--mirror-url', help='Mirror node base URL (defaults to HEDERA_MIRROR_NODE_URL)')
+        parser.add_argument('--contract', action='append', help='Contract ID to index (repeatable)')
+        parser.add_argument('--poll-interval', type=float, default=5.0)
+        parser.add_argument('--once', action='store_true', help='Catch up once and exit')
+    
+    def handle(self, *args, **options):
+        contracts = options['contract'] or [
+            contract_id for contract_id in (settings.HAKI_BOUNTY_CONTRACT_ID, settings.HAKI_MARKETPLACE_CONTRACT_ID)
+            if contract_id
+        ]
+        if not contracts:
+            raise CommandError('No contracts configured; set HAKI_BOUNTY_CONTRACT_ID/HAKI_MARKETPLACE_CONTRACT_ID or pass --contract')
+        
+        indexer = ContractEventIndexer(MirrorNodeSource(options['mirror_url']))
+        
+        while True:
+            started = time.monotonic()
+            ingested = sum(indexer.run(contract_id) for contract_id in contracts)
+            elapsed = max(time.monotonic() - started, 1e-6)
+            
+            if ingested:
+                self.stdout.write(f"Ingested {ingested} events in {elapsed:.2f}s ({ingested / elapsed:.0f} events/s)")
+            
+            if options['once']:
+                break
+            if not ingested:
+                time.sleep(options['poll_interval'])
@@ -0,0 +1,20 @@
+import json
+from django.core.management.base import BaseCommand
+from blockchain.reconciliation import BalanceReconciler
+
+class Command(BaseCommand):
+    help = 'Reconcile TokenBalance and payments.Token with on-chain HAKI balances'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--workers', type=int, default=16)
+        parser.add_argument('--dry-run', action='store_true', help='Report differences without writing')
+    
+    def handle(self, *args, **options):
+        reconciler = BalanceReconciler(
+            chunk_size=options['chunk_size'],
+            workers=options['workers'],
+            dry_run=options['dry_run']
+        )
+        report = reconciler.run()
+        self.stdout.write(json.dumps(report, indent=2))
@@ -0,0 +1,29 @@
+import time
+from django.core.management.base import BaseCommand
+from blockchain.receipts import ReceiptTracker
+
+class Command(BaseCommand):
+    help = 'Resolve receipts for pending blockchain transactions and submitted payouts'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=500)
+        parser.add_argument('--poll-interval', type=float, default=5.0)
+        parser.add_argument('--once', action='store_true', help='Run a single sweep and exit')
+    
+    def handle(self, *args, **options):
+        tracker = ReceiptTracker()
+        
+        try:
+            while True:
+                report = tracker.resolve_pending(limit=options['limit'])
+                self.stdout.write(
+                    f"Polled {report['polled']}: {report['confirmed']} confirmed, {report['failed']} failed, "
+                    f"{report['reconcile']} sent to reconciliation"
+                )
+                
+                if options['once']:
+                    break
+                # Rows still pending are retried next sweep, not immediately
+                time.sleep(options['poll_interval'])
+        finally:
+            tracker.shutdown()
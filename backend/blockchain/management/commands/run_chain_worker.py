@@ -0,0 +1,32 @@
+import time
+from django.core.management.base import BaseCommand
+from blockchain.outbox import autodiscover, claim_jobs, run_job
+from blockchain.receipts import ReceiptTracker
+
+class Command(BaseCommand):
+    help = 'Run queued Hedera operations (escrow creation, milestone releases, withdrawals)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10)
+        parser.add_argument('--poll-interval', type=float, default=1.0)
+        parser.add_argument('--once', action='store_true', help='Process due jobs once and exit')
+        parser.add_argument('--resolve-receipts', action='store_true',
+                            help='Also sweep receipts in this process (needed with LocalHederaService)')
+    
+    def handle(self, *args, **options):
+        autodiscover()
+        tracker = ReceiptTracker() if options['resolve_receipts'] else None
+        
+        while True:
+            jobs = claim_jobs(options['batch_size'])
+            for job in jobs:
+                job = run_job(job)
+                self.stdout.write(f"Job {job.pk} {job.operation}: {job.status}")
+            
+            if tracker is not None:
+                tracker.resolve_pending()
+            
+            if options['once']:
+                break
+            if not jobs:
+                time.sleep(options['poll_interval'])
@@ -0,0 +1,130 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from eth_abi import encode
+from .indexer import EVENTS, TOPICS
+
+_TOPIC_BY_NAME = {name: topic for topic, name in TOPICS.items()}
+
+def encode_log(name, args, transaction_hash, timestamp, index=0):
+    """
+    Build a mirror-node contract log for a tracked event.
+    
+    Args:
+        name (str): Event name from ``EVENTS``
+        args (dict): Event arguments by name
+        transaction_hash (str): Hash of the emitting transaction
+        timestamp (str): Consensus timestamp, ``seconds.nanos``
+        index (int): Position of the log within its transaction
+    
+    Returns:
+        dict: The log, as ``/results/logs`` returns it
+    """
+    indexed, data = EVENTS[name]
+    topics = [_TOPIC_BY_NAME[name]]
+    for arg_name, arg_type in indexed:
+        value = args[arg_name]
+        raw = bytes.fromhex(value[2:]) if arg_type == 'address' else int(value).to_bytes(32, 'big')
+        topics.append('0x' + raw.rjust(32, b'\0').hex())
+    
+    payload = encode([arg_type for _, arg_type in data], [args[arg_name] for arg_name, _ in data]) if data else b''
+    return {
+        'topics': topics,
+        'data': '0x' + payload.hex(),
+        'transaction_hash': transaction_hash,
+        'timestamp': timestamp,
+        'index': index,
+    }
+
+def _position(log):
+    seconds, _, nanos = log['timestamp'].partition('.')
+    return int(seconds), int(nanos or 0), int(log.get('index', 0))
+
+class FixtureMirrorNode:
+    """
+    Local HTTP server implementing the mirror node's contract-logs endpoint.
+    
+    Serves ``/api/v1/contracts/{id}/results/logs`` in ascending order with
+    ``limit``, ``timestamp=gte:`` and ``links.next`` pagination over logs
+    added with ``add``, so MirrorNodeSource and the indexer can run against
+    it without network access. Every request is recorded in ``requests``.
+    
+    Usage::
+        
+        with FixtureMirrorNode() as mirror:
+            mirror.add('0.0.1001', logs)
+            ContractEventIndexer(MirrorNodeSource(mirror.url)).run('0.0.1001')
+    """
+    
+    def __init__(self):
+        self.logs = {}
+        self.requests = []
+        self._server = None
+        self._thread = None
+    
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def add(self, contract_id, logs):
+        self.logs.setdefault(contract_id, []).extend(logs)
+        self.logs[contract_id].sort(key=_position)
+    
+    def page(self, contract_id, query):
+        """Select one page of logs and the link to the next one."""
+        limit = int(query.get('limit', ['25'])[0])
+        logs = self.logs.get(contract_id, [])
+        
+        timestamp = query.get('timestamp', ['gte:0'])[0].partition(':')[2]
+        seconds, _, nanos = timestamp.partition('.')
+        start = (int(seconds), int(nanos or 0), -1)
+        if 'index' in query:
+            start = (start[0], start[1], int(query['index'][0].partition(':')[2]))
+        
+        selected = [log for log in logs if _position(log) > start][:limit]
+        next_link = None
+        if len(selected) == limit:
+            last = selected[-1]
+            next_link = (
+                f"/api/v1/contracts/{contract_id}/results/logs"
+                f"?order=asc&limit={limit}&timestamp=gte:{last['timestamp']}&index=gt:{last.get('index', 0)}"
+            )
+        return {'logs': selected, 'links': {'next': next_link}}
+    
+    def _handler(self):
+        mirror = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                mirror.requests.append(self.path)
+                parts = url.path.strip('/').split('/')
+                if len(parts) != 6 or parts[:3] != ['api', 'v1', 'contracts'] or parts[4:] != ['results', 'logs']:
+                    self.send_error(404)
+                    return
+                
+                body = json.dumps(mirror.page(parts[3], parse_qs(url.query))).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, format, *args):
+                pass
+        
+        return Handler
+    
+    def __enter__(self):
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+    
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+        return False
@@ -1,5 +1,7 @@
 from django.db import models
+from django.db.models import Q
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 class WalletAddress(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='wallet')
@@ -11,6 +13,32 @@ class WalletAddress(models.Model):
     def __str__(self):
         return f"{self.user.username}'s wallet: {self.address}"
 
+class BlockchainTransactionQuerySet(models.QuerySet):
+    def for_wallet_owner(self, user):
+        """
+        Transactions from or to the user's linked wallet, as a single query.
+        
+        The wallet address is resolved in a subquery instead of loading
+        ``user.wallet`` first, and users without a wallet simply get an
+        empty result.
+        """
+        address = WalletAddress.objects.filter(user=user).values('address')
+        return self.filter(Q(from_address__in=address) | Q(to_address__in=address))
+    
+    def wallet_owner_branches(self, user):
+        """
+        ``for_wallet_owner`` split into disjoint querysets, one per direction.
+        
+        Each is served by its own ``(<address>, created_at, id)`` index, so
+        KeysetPagination can UNION ALL a page from each instead of sorting
+        the wallet's whole history.
+        """
+        address = WalletAddress.objects.filter(user=user).values('address')
+        return [
+            self.filter(from_address__in=address),
+            self.filter(to_address__in=address).exclude(from_address__in=address),
+        ]
+
 class BlockchainTransaction(models.Model):
     TRANSACTION_TYPES = (
         ('token_transfer', 'Token Transfer'),
@@ -27,8 +55,11 @@ class BlockchainTransaction(models.Model):
         ('failed', 'Failed'),
     )
     
-    tx_hash = models.CharField(max_length=255, unique=True)
-    from_address = models.CharField(max_length=255)
+    tx_hash = models.CharField(max_length=255)
+    # Position of the contract log within its transaction; one transaction
+    # can emit several indexed events
+    log_index = models.PositiveIntegerField(default=0)
+    from_address = models.CharField(max_length=255, null=True, blank=True)
     to_address = models.CharField(max_length=255, null=True, blank=True)
     amount = models.DecimalField(max_digits=18, decimal_places=8, null=True, blank=True)
     transaction_type = models.CharField(max_length=50, choices=TRANSACTION_TYPES)
@@ -40,6 +71,18 @@ class BlockchainTransaction(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = BlockchainTransactionQuerySet.as_manager()
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='chain_tx_created_id_idx'),
+            models.Index(fields=['from_address', '-created_at', '-id'], name='chain_tx_from_created_idx'),
+            models.Index(fields=['to_address', '-created_at', '-id'], name='chain_tx_to_created_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['tx_hash', 'log_index'], name='chain_tx_unique_hash_log'),
+        ]
+    
     def __str__(self):
         return f"{self.transaction_type} - {self.tx_hash[:10]}..."
 
@@ -51,6 +94,17 @@ class TokenBalance(models.Model):
     def __str__(self):
         return f"{self.user.username}'s balance: {self.balance}"
 
+class TokenTransactionQuerySet(models.QuerySet):
+    def for_participant(self, user):
+        return self.filter(Q(from_user=user) | Q(to_user=user))
+    
+    def participant_branches(self, user):
+        """``for_participant`` split into disjoint querysets, one per direction."""
+        return [
+            self.filter(from_user=user),
+            self.filter(to_user=user).exclude(from_user=user),
+        ]
+
 class TokenTransaction(models.Model):
     TRANSACTION_TYPES = (
         ('transfer', 'Transfer'),
@@ -68,6 +122,62 @@ class TokenTransaction(models.Model):
     blockchain_tx = models.ForeignKey(BlockchainTransaction, on_delete=models.SET_NULL, null=True, blank=True, related_name='token_transactions')
     created_at = models.DateTimeField(auto_now_add=True)
     
+    objects = TokenTransactionQuerySet.as_manager()
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='chain_token_tx_created_idx'),
+            models.Index(fields=['from_user', '-created_at', '-id'], name='chain_token_tx_from_idx'),
+            models.Index(fields=['to_user', '-created_at', '-id'], name='chain_token_tx_to_idx'),
+        ]
+    
     def __str__(self):
         return f"{self.transaction_type} - {self.amount} tokens"
 
+
+class ChainJob(models.Model):
+    """
+    Durable outbox entry for a Hedera operation.
+    
+    Views enqueue jobs and return immediately; the ``run_chain_worker``
+    management command claims due jobs, runs the registered handler and
+    retries failures with exponential backoff.
+    """
+    class Status(models.TextChoices):
+        QUEUED = 'queued', 'Queued'
+        RUNNING = 'running', 'Running'
+        SUCCEEDED = 'succeeded', 'Succeeded'
+        FAILED = 'failed', 'Failed'
+    
+    operation = models.CharField(max_length=50)
+    payload = models.JSONField(default=dict)
+    idempotency_key = models.CharField(max_length=255, unique=True)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    error_message = models.TextField(null=True, blank=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='chain_jobs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='chain_job_due_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.operation} - {self.idempotency_key} ({self.status})"
+
+class IndexerCheckpoint(models.Model):
+    """Position, (consensus timestamp, log index), of the last log ingested for a contract."""
+    contract_id = models.CharField(max_length=255, unique=True)
+    last_timestamp = models.CharField(max_length=32, default='0')
+    last_index = models.IntegerField(default=-1)
+    events_indexed = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.contract_id} @ {self.last_timestamp}#{self.last_index}"
@@ -0,0 +1,190 @@
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+from haki.heartbeat import Heartbeat
+from .models import ChainJob
+
+logger = logging.getLogger(__name__)
+
+_handlers = {}
+
+class UnknownOperation(Exception):
+    pass
+
+def register(operation, on_failure=None):
+    """
+    Register the handler for a chain operation.
+    
+    The handler receives the ChainJob and returns a JSON-serialisable result.
+    Handlers must be safe to re-run: a job is retried when the worker dies or
+    the handler raises. A handler that submits to Hedera records its
+    transaction id first (``pin_transaction_id``) so a re-run resubmits
+    under the same id rather than sending twice. ``on_failure`` is called with the job once it has
+    exhausted its attempts.
+    """
+    def decorator(func):
+        _handlers[operation] = (func, on_failure)
+        return func
+    return decorator
+
+def autodiscover():
+    """Import ``chain_jobs`` from every installed app so handlers register."""
+    autodiscover_modules('chain_jobs')
+
+def enqueue(operation, payload, idempotency_key, user=None):
+    """
+    Queue a chain operation, or return the job already queued under the key.
+    
+    A job under the key that has FAILED is queued again with fresh attempts,
+    so repeating the request that created it (e.g. approving the bounty
+    again) retries the operation instead of returning the dead job.
+    
+    Args:
+        operation (str): Registered operation name
+        payload (dict): JSON arguments for the handler
+        idempotency_key (str): Unique key; repeated calls return the same job
+        user (User): User the job is created on behalf of
+        
+    Returns:
+        ChainJob: The queued (or previously queued) job
+    """
+    defaults = {
+        'operation': operation,
+        'payload': payload,
+        'created_by': user,
+        'max_attempts': getattr(settings, 'CHAIN_JOB_MAX_ATTEMPTS', 5),
+    }
+    try:
+        job, _ = ChainJob.objects.get_or_create(idempotency_key=idempotency_key, defaults=defaults)
+    except IntegrityError:
+        job = ChainJob.objects.get(idempotency_key=idempotency_key)
+    
+    if job.status == ChainJob.Status.FAILED:
+        with transaction.atomic():
+            job = ChainJob.objects.select_for_update().get(pk=job.pk)
+            if job.status == ChainJob.Status.FAILED:
+                job.payload = {**job.payload, **payload}
+                job.status = ChainJob.Status.QUEUED
+                job.attempts = 0
+                job.max_attempts = defaults['max_attempts']
+                job.next_attempt_at = timezone.now()
+                job.locked_at = None
+                job.error_message = None
+                job.save(update_fields=[
+                    'payload', 'status', 'attempts', 'max_attempts', 'next_attempt_at', 'locked_at', 'error_message', 'updated_at'
+                ])
+    return job
+
+def claim_jobs(limit):
+    """
+    Claim up to ``limit`` due jobs for this worker.
+    
+    Rows are picked with SKIP LOCKED so several workers can poll the same
+    table without handing out a job twice. ``run_job`` refreshes ``locked_at``
+    while a handler runs, so a running job whose lock is older than
+    ``CHAIN_JOB_LOCK_TIMEOUT`` belongs to a dead worker and is reclaimed.
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=getattr(settings, 'CHAIN_JOB_LOCK_TIMEOUT', 300))
+    
+    with transaction.atomic():
+        jobs = list(
+            ChainJob.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(status=ChainJob.Status.QUEUED, next_attempt_at__lte=now)
+                | Q(status=ChainJob.Status.RUNNING, locked_at__lt=stale)
+            )
+            .order_by('next_attempt_at')[:limit]
+        )
+        ChainJob.objects.filter(pk__in=[job.pk for job in jobs]).update(
+            status=ChainJob.Status.RUNNING,
+            locked_at=now,
+            attempts=F('attempts') + 1
+        )
+    
+    for job in jobs:
+        job.refresh_from_db()
+    return jobs
+
+def _lock_heartbeat(job):
+    """Keep the job's lock fresh while its handler runs."""
+    interval = getattr(settings, 'CHAIN_JOB_LOCK_TIMEOUT', 300) / 3
+    return Heartbeat(
+        lambda: ChainJob.objects.filter(pk=job.pk, status=ChainJob.Status.RUNNING).update(locked_at=timezone.now()),
+        interval
+    )
+
+def pin_transaction_id(job, hedera_service, renew=False):
+    """
+    Record the Hedera transaction id a handler will submit under.
+    
+    The id is saved on the job before anything is sent, so a retry after a
+    crash resubmits under the same id, which Hedera executes at most once,
+    instead of sending the operation again.
+    
+    Args:
+        job (ChainJob): The running job
+        hedera_service: Service used to generate the id
+        renew (bool): Replace the recorded id; only once it provably never executed
+        
+    Returns:
+        str: The recorded transaction id
+    """
+    if renew or not job.payload.get('transaction_id'):
+        job.payload['transaction_id'] = hedera_service.new_transaction_id()
+        ChainJob.objects.filter(pk=job.pk).update(payload=job.payload, updated_at=timezone.now())
+    return job.payload['transaction_id']
+
+def defer(job, until):
+    """
+    Queue a job that has exhausted its attempts for one more try at ``until``.
+    
+    For ``on_failure`` callbacks that cannot settle the operation yet, e.g.
+    while a submitted transaction may still reach consensus.
+    """
+    job.status = ChainJob.Status.QUEUED
+    job.next_attempt_at = until
+    job.max_attempts = job.attempts + 1
+    job.save(update_fields=['status', 'next_attempt_at', 'max_attempts', 'updated_at'])
+
+def _retry_delay(attempts):
+    base = getattr(settings, 'CHAIN_JOB_RETRY_DELAY', 5)
+    return timedelta(seconds=base * 2 ** (attempts - 1))
+
+def run_job(job):
+    """Run a claimed job and record its outcome."""
+    try:
+        handler, on_failure = _handlers[job.operation]
+    except KeyError:
+        job.status = ChainJob.Status.FAILED
+        job.error_message = f"Unknown operation: {job.operation}"
+        job.save(update_fields=['status', 'error_message', 'updated_at'])
+        return job
+    
+    try:
+        with _lock_heartbeat(job):
+            result = handler(job)
+    except Exception as e:
+        logger.warning("Chain job %s failed on attempt %s: %s", job.pk, job.attempts, e)
+        job.error_message = str(e)
+        
+        if job.attempts >= job.max_attempts:
+            job.status = ChainJob.Status.FAILED
+            job.save(update_fields=['status', 'error_message', 'updated_at'])
+            if on_failure is not None:
+                on_failure(job)
+        else:
+            job.status = ChainJob.Status.QUEUED
+            job.next_attempt_at = timezone.now() + _retry_delay(job.attempts)
+            job.save(update_fields=['status', 'error_message', 'next_attempt_at', 'updated_at'])
+        return job
+    
+    job.status = ChainJob.Status.SUCCEEDED
+    job.result = result
+    job.error_message = None
+    job.save(update_fields=['status', 'result', 'error_message', 'updated_at'])
+    return job
@@ -0,0 +1,269 @@
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from .models import BlockchainTransaction
+from .outbox import enqueue
+from .services import TRANSACTION_VALID_DURATION, get_hedera_service, transaction_expired
+
+logger = logging.getLogger(__name__)
+
+# Receipt statuses that mean "not reached consensus yet"
+PENDING_STATUSES = {'UNKNOWN', 'RECEIPT_NOT_FOUND', 'BUSY'}
+
+def _receipt_window_passed(transaction_id):
+    # Nodes only keep receipts for a few minutes; past that, a missing
+    # receipt says nothing and the mirror node has to answer instead
+    return time.time() > float(transaction_id.split('@')[1]) + TRANSACTION_VALID_DURATION
+
+class ReceiptTracker:
+    """
+    Resolve transaction receipts in the background.
+    
+    Submitting code returns as soon as a transaction is accepted by a node
+    (``wait_for_receipt=False`` on HederaService) and leaves the row
+    SUBMITTED; ``resolve_pending`` picks such rows up. A bounded pool of
+    pollers queries receipts with exponential backoff through the
+    configured Hedera service.
+    """
+    
+    def __init__(self, service=None, max_workers=None, initial_delay=None, max_delay=None, timeout=None):
+        self.service = service or get_hedera_service()
+        self.initial_delay = initial_delay or getattr(settings, 'HEDERA_RECEIPT_INITIAL_DELAY', 0.5)
+        self.max_delay = max_delay or getattr(settings, 'HEDERA_RECEIPT_MAX_DELAY', 8)
+        self.timeout = timeout or getattr(settings, 'HEDERA_RECEIPT_TIMEOUT', 120)
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers or getattr(settings, 'HEDERA_RECEIPT_WORKERS', 8),
+            thread_name_prefix='hedera-receipts'
+        )
+    
+    def poll(self, transaction_id):
+        """
+        Poll one receipt until it leaves a pending status or times out.
+        
+        Returns:
+            dict: transaction_id, status (receipt status; PENDING on
+                timeout; EXPIRED once the node can no longer have the
+                receipt) and error
+        """
+        deadline = time.monotonic() + self.timeout
+        delay = self.initial_delay
+        last_error = None
+        
+        while True:
+            try:
+                status = self.service.get_receipt_status(transaction_id)
+                if status not in PENDING_STATUSES:
+                    return {
+                        'transaction_id': transaction_id,
+                        'status': status,
+                        'error': None if status == 'SUCCESS' else f"Transaction failed with status {status}"
+                    }
+                if status == 'RECEIPT_NOT_FOUND' and _receipt_window_passed(transaction_id):
+                    return {'transaction_id': transaction_id, 'status': 'EXPIRED', 'error': None}
+            except Exception as e:
+                last_error = str(e)
+            
+            if time.monotonic() + delay > deadline:
+                return {'transaction_id': transaction_id, 'status': 'PENDING', 'error': last_error}
+            
+            time.sleep(delay)
+            delay = min(delay * 2, self.max_delay)
+    
+    def track(self, transaction_id):
+        """Start polling a receipt and return a Future with the poll result."""
+        return self.executor.submit(self.poll, transaction_id)
+    
+    def resolve(self, transaction_ids):
+        """Poll many receipts concurrently and return their results."""
+        return list(self.executor.map(self.poll, transaction_ids))
+    
+    def resolve_pending(self, limit=500):
+        """
+        Resolve pending BlockchainTransaction rows and submitted payouts.
+        
+        Payouts still unresolved ``HEDERA_RECONCILE_AFTER`` seconds after
+        submission, or whose receipt has expired, move to RECONCILE and are
+        settled from the mirror node.
+        
+        Returns:
+            dict: Number of receipts polled, rows confirmed and failed, and
+                payouts handed to reconciliation
+        """
+        from payments.models import Payment
+        
+        stale = timezone.now() - timedelta(seconds=getattr(settings, 'HEDERA_RECONCILE_AFTER', 600))
+        to_reconcile = Payment.objects.filter(status=Payment.Status.SUBMITTED, updated_at__lt=stale).update(
+            status=Payment.Status.RECONCILE, updated_at=timezone.now()
+        )
+        
+        chain_ids = list(
+            BlockchainTransaction.objects.filter(status='pending')
+            .order_by('created_at').values_list('tx_hash', flat=True)[:limit]
+        )
+        payment_ids = list(
+            Payment.objects.filter(status=Payment.Status.SUBMITTED).exclude(transaction_id='')
+            .order_by('updated_at').values_list('transaction_id', flat=True)[:limit]
+        )
+        
+        transaction_ids = list(dict.fromkeys(chain_ids + payment_ids))
+        results = self.resolve(transaction_ids)
+        
+        report = {'polled': len(results), 'confirmed': 0, 'failed': 0, 'reconcile': to_reconcile}
+        for counts in (apply_chain_results(results), apply_payment_results(results)):
+            report['confirmed'] += counts['confirmed']
+            report['failed'] += counts['failed']
+            report['reconcile'] += counts.get('reconcile', 0)
+        
+        counts = reconcile_payments(self.service, limit)
+        report['confirmed'] += counts['confirmed']
+        report['failed'] += counts['failed']
+        return report
+    
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+
+def _final(results):
+    return {result['transaction_id']: result for result in results if result['status'] != 'PENDING'}
+
+def apply_chain_results(results):
+    """Write resolved receipts back to BlockchainTransaction rows with bulk_update."""
+    resolved = {
+        transaction_id: result for transaction_id, result in _final(results).items()
+        if result['status'] != 'EXPIRED'
+    }
+    now = timezone.now()
+    counts = {'confirmed': 0, 'failed': 0}
+    
+    transactions = list(BlockchainTransaction.objects.filter(tx_hash__in=resolved, status='pending'))
+    for tx in transactions:
+        result = resolved[tx.tx_hash]
+        if result['status'] == 'SUCCESS':
+            tx.status = 'confirmed'
+            counts['confirmed'] += 1
+        else:
+            tx.status = 'failed'
+            counts['failed'] += 1
+        tx.error_message = result['error']
+        tx.updated_at = now
+    
+    BlockchainTransaction.objects.bulk_update(transactions, ['status', 'error_message', 'updated_at'], batch_size=500)
+    return counts
+
+def settle_payment(payment):
+    """
+    Complete a payment that reached consensus and credit its receiver, in
+    one transaction.
+    
+    Returns:
+        bool: True when this call settled the payment
+    """
+    from bounties.chain_jobs import settle_milestone_payout
+    from payments.models import Payment
+    from payments.services import credit_payment
+    
+    if payment.milestone_id:
+        return settle_milestone_payout(payment)
+    
+    with transaction.atomic():
+        payment = Payment.objects.select_for_update().get(pk=payment.pk)
+        if payment.status not in (Payment.Status.SUBMITTED, Payment.Status.RECONCILE):
+            return False
+        
+        payment.status = Payment.Status.COMPLETED
+        payment.save(update_fields=['status', 'updated_at'])
+        if payment.receiver_id:
+            credit_payment(payment)
+    return True
+
+def _fail_payment(payment, error):
+    from payments.models import Payment
+    
+    return Payment.objects.filter(
+        pk=payment.pk, status__in=[Payment.Status.SUBMITTED, Payment.Status.RECONCILE]
+    ).update(
+        status=Payment.Status.FAILED,
+        transaction_data={**payment.transaction_data, 'error': error},
+        updated_at=timezone.now()
+    )
+
+def apply_payment_results(results):
+    """
+    Settle or fail submitted payments from their receipts.
+    
+    Each settlement changes the status and credits the receiver in one
+    transaction. Payments whose receipt expired go to RECONCILE.
+    """
+    from payments.models import Payment
+    
+    resolved = _final(results)
+    counts = {'confirmed': 0, 'failed': 0, 'reconcile': 0}
+    
+    for payment in Payment.objects.filter(transaction_id__in=resolved, status=Payment.Status.SUBMITTED):
+        result = resolved[payment.transaction_id]
+        if result['status'] == 'SUCCESS':
+            counts['confirmed'] += settle_payment(payment)
+        elif result['status'] == 'EXPIRED':
+            counts['reconcile'] += Payment.objects.filter(pk=payment.pk, status=Payment.Status.SUBMITTED).update(
+                status=Payment.Status.RECONCILE, updated_at=timezone.now()
+            )
+        else:
+            counts['failed'] += _fail_payment(payment, result['error'])
+    
+    return counts
+
+def _resubmit_payout(payment):
+    """Queue a payout whose transaction provably never executed under a fresh id."""
+    from payments.models import Payment
+    
+    with transaction.atomic():
+        if not Payment.objects.filter(pk=payment.pk, status=Payment.Status.RECONCILE).update(
+            status=Payment.Status.PENDING,
+            transaction_id=get_hedera_service().new_transaction_id(),
+            updated_at=timezone.now()
+        ):
+            return
+        enqueue(
+            'release_milestone_payment',
+            {
+                'milestone_id': payment.milestone_id,
+                'approved_by': payment.sender_id,
+                'notes': payment.transaction_data.get('notes', ''),
+            },
+            idempotency_key=f'milestone-release:{payment.milestone_id}:{payment.transaction_id}'
+        )
+
+def reconcile_payments(service, limit=500):
+    """
+    Settle RECONCILE payments from the mirror node's record of their transaction.
+    
+    A payment the mirror node has no record of stays put until its id can
+    no longer execute; a milestone payout is then resubmitted under a new
+    id, and anything else fails.
+    """
+    from payments.models import Payment
+    
+    counts = {'confirmed': 0, 'failed': 0}
+    payments = Payment.objects.filter(status=Payment.Status.RECONCILE).order_by('updated_at')[:limit]
+    
+    for payment in payments:
+        try:
+            result = service.lookup_transaction(payment.transaction_id)
+        except Exception as e:
+            logger.warning("Could not look up transaction %s: %s", payment.transaction_id, e)
+            continue
+        
+        if result == 'SUCCESS':
+            counts['confirmed'] += settle_payment(payment)
+        elif result is not None:
+            counts['failed'] += _fail_payment(payment, f"Transaction failed with status {result}")
+        elif transaction_expired(payment.transaction_id):
+            if payment.milestone_id:
+                _resubmit_payout(payment)
+            else:
+                counts['failed'] += _fail_payment(payment, "Transaction never reached consensus")
+    
+    return counts
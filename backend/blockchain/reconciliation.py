@@ -0,0 +1,197 @@
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+import requests
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from payments.models import Token
+from .models import TokenBalance, WalletAddress
+
+logger = logging.getLogger(__name__)
+
+class LocalBalanceSource:
+    """
+    Balances from a dict or a JSON file mapping wallet address -> balance.
+    
+    Meant for development and tests; wallets that are not listed have a
+    zero balance.
+    """
+    
+    def __init__(self, balances=None, path=None):
+        if balances is None:
+            path = path or getattr(settings, 'LOCAL_BALANCES_PATH', None)
+            balances = {}
+            if path:
+                with open(path) as f:
+                    balances = json.load(f)
+        self.balances = {address: Decimal(str(value)) for address, value in balances.items()}
+    
+    def fetch(self, address):
+        return self.balances.get(address, Decimal('0'))
+
+class MirrorNodeBalanceSource:
+    """HAKI token balance of an account from the mirror-node REST API."""
+    
+    def __init__(self, base_url=None, token_id=None, timeout=10):
+        self.base_url = (base_url or settings.HEDERA_MIRROR_NODE_URL).rstrip('/')
+        self.token_id = token_id or settings.HEDERA_TOKEN_ID
+        self.timeout = timeout
+        self.session = requests.Session()
+        self._scale = None
+    
+    @property
+    def scale(self):
+        if self._scale is None:
+            response = self.session.get(f"{self.base_url}/api/v1/tokens/{self.token_id}", timeout=self.timeout)
+            response.raise_for_status()
+            self._scale = Decimal(10) ** int(response.json()['decimals'])
+        return self._scale
+    
+    def fetch(self, address):
+        response = self.session.get(
+            f"{self.base_url}/api/v1/accounts/{address}/tokens",
+            params={'token.id': self.token_id},
+            timeout=self.timeout
+        )
+        if response.status_code == 404:
+            return Decimal('0')
+        response.raise_for_status()
+        
+        tokens = response.json().get('tokens', [])
+        if not tokens:
+            return Decimal('0')
+        return Decimal(tokens[0]['balance']) / self.scale
+
+def get_balance_source():
+    """Build the configured balance source (``BALANCE_SOURCE_CLASS``)."""
+    source_class = getattr(settings, 'BALANCE_SOURCE_CLASS', 'blockchain.reconciliation.MirrorNodeBalanceSource')
+    return import_string(source_class)()
+
+class BalanceReconciler:
+    """
+    Reconcile ``TokenBalance`` and ``payments.Token`` against chain balances.
+    
+    Wallets are walked in primary-key order one chunk at a time, so memory
+    stays bounded by the chunk size however many wallets exist. Within a
+    chunk balances are fetched concurrently and both tables are loaded with
+    one query each, without locking. Corrections are conditional on the
+    balance that was read: a row that a reward or conversion changed in the
+    meantime is left alone and counted as a conflict, to be corrected on the
+    next run.
+    """
+    
+    SAMPLE_SIZE = 50
+    
+    def __init__(self, source=None, chunk_size=1000, workers=16, dry_run=False):
+        self.source = source or get_balance_source()
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.dry_run = dry_run
+    
+    def _fetch(self, address):
+        try:
+            return self.source.fetch(address)
+        except Exception as e:
+            logger.warning("Could not fetch balance for %s: %s", address, e)
+            return None
+    
+    def run(self):
+        """
+        Returns:
+            dict: Counts of wallets checked, fetch errors and corrections per
+                table, plus a sample of the differences found
+        """
+        report = {
+            'wallets': 0,
+            'fetch_errors': 0,
+            'token_balance_corrections': 0,
+            'token_corrections': 0,
+            'conflicts': 0,
+            'samples': [],
+        }
+        
+        last_pk = 0
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while True:
+                wallets = list(
+                    WalletAddress.objects.filter(pk__gt=last_pk).order_by('pk')
+                    .values_list('pk', 'user_id', 'address')[:self.chunk_size]
+                )
+                if not wallets:
+                    break
+                last_pk = wallets[-1][0]
+                
+                balances = executor.map(self._fetch, [address for _, _, address in wallets])
+                chain = {}
+                for (_, user_id, address), balance in zip(wallets, balances):
+                    if balance is None:
+                        report['fetch_errors'] += 1
+                    else:
+                        chain[user_id] = balance
+                
+                report['wallets'] += len(wallets)
+                self._reconcile_chunk(chain, report)
+        
+        return report
+    
+    def _reconcile_chunk(self, chain, report):
+        now = timezone.now()
+        user_ids = list(chain)
+        
+        token_balances = {row.user_id: row for row in TokenBalance.objects.filter(user_id__in=user_ids)}
+        tokens = {}
+        for token in Token.objects.filter(user_id__in=user_ids).order_by('pk'):
+            tokens.setdefault(token.user_id, token)
+        
+        balance_updates, balance_creates = [], []
+        token_updates, token_creates = [], []
+        
+        for user_id, balance in chain.items():
+            row = token_balances.get(user_id)
+            if row is None:
+                balance_creates.append(TokenBalance(user_id=user_id, balance=balance))
+            elif row.balance != balance:
+                self._sample(report, user_id, 'token_balance', row.balance, balance)
+                balance_updates.append((row, balance))
+            
+            rounded = balance.quantize(Decimal('0.01'))
+            token = tokens.get(user_id)
+            if token is None:
+                if rounded:
+                    token_creates.append(Token(user_id=user_id, balance=rounded))
+            elif token.balance != rounded:
+                self._sample(report, user_id, 'token', token.balance, rounded)
+                token_updates.append((token, rounded))
+        
+        report['token_balance_corrections'] += len(balance_updates) + len(balance_creates)
+        report['token_corrections'] += len(token_updates) + len(token_creates)
+        
+        if self.dry_run:
+            return
+        
+        lost = 0
+        with transaction.atomic():
+            for row, balance in balance_updates:
+                lost += not TokenBalance.objects.filter(pk=row.pk, balance=row.balance).update(
+                    balance=balance, last_synced=now
+                )
+            TokenBalance.objects.bulk_create(balance_creates, batch_size=500, ignore_conflicts=True)
+            for token, balance in token_updates:
+                lost += not Token.objects.filter(pk=token.pk, balance=token.balance).update(balance=balance)
+            Token.objects.bulk_create(token_creates, batch_size=500)
+        
+        if lost:
+            logger.info("%s balances changed during reconciliation and were left for the next run", lost)
+        report['conflicts'] += lost
+    
+    def _sample(self, report, user_id, table, recorded, actual):
+        if len(report['samples']) < self.SAMPLE_SIZE:
+            report['samples'].append({
+                'user_id': user_id,
+                'table': table,
+                'recorded': str(recorded),
+                'chain': str(actual),
+            })
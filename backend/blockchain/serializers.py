@@ -1,2 +1,12 @@
 ... This file was left out for brevity. Assume it is correct and does not need any modifications. ...
 
+
+from .models import ChainJob
+
+class ChainJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ChainJob
+        fields = ['id', 'operation', 'idempotency_key', 'status', 'attempts',
+                  'max_attempts', 'next_attempt_at', 'result', 'error_message',
+                  'created_at', 'updated_at']
+        read_only_fields = fields
@@ -1,7 +1,19 @@
 import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import requests
+from django.conf import settings
+from django.utils.module_loading import import_string
 from hedera import (
     Client,
     AccountId,
+    AccountBalanceQuery,
+    ContractExecuteTransaction,
+    ContractFunctionParameters,
+    ContractId,
     PrivateKey,
     Hbar,
     TransferTransaction,
@@ -9,39 +21,307 @@ from hedera import (
     TokenType,
     TokenSupplyType,
     TokenMintTransaction,
-    TokenId
+    TokenId,
+    TransactionId,
+    TransactionReceiptQuery
 )
 
-class HederaService:
-    def __init__(self):
-        # Get environment variables
-        self.account_id = os.getenv('HEDERA_ACCOUNT_ID')
-        self.private_key = os.getenv('HEDERA_PRIVATE_KEY')
-        self.network = os.getenv('HEDERA_NETWORK', 'testnet')
-        
-        # Initialize client
-        if not self.account_id or not self.private_key:
+class OperatorCredentials:
+    """Operator account and key, parsed once per process."""
+    
+    def __init__(self, account_id, private_key):
+        self.account_id = AccountId.fromString(account_id)
+        self.private_key = PrivateKey.fromString(private_key)
+        self.public_key = self.private_key.getPublicKey()
+    
+    @classmethod
+    def from_env(cls):
+        account_id = os.getenv('HEDERA_ACCOUNT_ID') or getattr(settings, 'HEDERA_OPERATOR_ID', None)
+        private_key = os.getenv('HEDERA_PRIVATE_KEY') or getattr(settings, 'HEDERA_OPERATOR_KEY', None)
+        
+        if not account_id or not private_key:
             raise ValueError("HEDERA_ACCOUNT_ID and HEDERA_PRIVATE_KEY must be set")
         
-        # Create client based on network
+        return cls(account_id, private_key)
+
+class HederaClientPool:
+    """
+    Thread-safe pool of long-lived Hedera clients.
+    
+    Clients are created lazily, up to ``size``, and reused for the life of the
+    process, so channel setup and operator parsing happen once rather than per
+    request. Callers borrow a client with ``with pool.client() as client:``
+    and block for at most ``acquire_timeout`` seconds when all are in use.
+    """
+    
+    def __init__(self, network, credentials, size=4, acquire_timeout=30):
+        self.network = network
+        self.credentials = credentials
+        self.size = size
+        self.acquire_timeout = acquire_timeout
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+    
+    def _new_client(self):
         if self.network == 'mainnet':
-            self.client = Client.forMainnet()
+            client = Client.forMainnet()
         else:
-            self.client = Client.forTestnet()
+            client = Client.forTestnet()
+        
+        client.setOperator(self.credentials.account_id, self.credentials.private_key)
+        return client
+    
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                create = True
+            else:
+                create = False
+        
+        if create:
+            try:
+                return self._new_client()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+        
+        try:
+            return self._idle.get(timeout=self.acquire_timeout)
+        except queue.Empty:
+            raise Exception(f"No Hedera client available after {self.acquire_timeout}s")
+    
+    @contextmanager
+    def client(self):
+        client = self._acquire()
+        try:
+            yield client
+        finally:
+            self._idle.put(client)
+    
+    def health_check(self):
+        """
+        Query the operator balance through a pooled client.
+        
+        Returns:
+            dict: Network, pool usage and operator balance, or the error
+        """
+        status = {
+            'network': self.network,
+            'pool_size': self.size,
+            'clients_created': self._created,
+            'clients_idle': self._idle.qsize(),
+        }
+        try:
+            with self.client() as client:
+                balance = AccountBalanceQuery().setAccountId(self.credentials.account_id).execute(client)
+            status.update({'healthy': True, 'operator_balance': balance.hbars.toString()})
+        except Exception as e:
+            status.update({'healthy': False, 'error': str(e)})
+        return status
+
+# Seconds a transaction id stays submittable after its valid start, and
+# allowance for the mirror node to catch up with consensus
+TRANSACTION_VALID_DURATION = 180
+MIRROR_NODE_LAG = 60
+
+def transaction_expired(transaction_id):
+    """
+    Whether a transaction id can no longer reach consensus.
+    
+    Once this holds, a mirror node with no record of the id proves the
+    transaction never executed, so the operation is safe to resend under a
+    new id.
+    """
+    valid_start = float(transaction_id.split('@')[1])
+    return time.time() > valid_start + TRANSACTION_VALID_DURATION + MIRROR_NODE_LAG
+
+def submit_pinned(hedera_service, transaction_id, submit, renew):
+    """
+    Submit an operation under its recorded transaction id.
+    
+    Resubmitting a recorded id is safe, since Hedera executes it at most
+    once. If the id has expired, the mirror node decides: an id that
+    executed is not sent again, and only an id that provably never executed
+    is replaced by a new one, recorded through ``renew`` before it is sent.
+    
+    Args:
+        hedera_service: Service used for lookups and new ids
+        transaction_id (str): Recorded transaction id
+        submit (callable): Sends the operation under the id it is given
+        renew (callable): Records the replacement id
+        
+    Returns:
+        The result of ``submit``, or None when the expired id had already executed
+    """
+    try:
+        return submit(transaction_id)
+    except Exception as e:
+        if 'TRANSACTION_EXPIRED' not in str(e):
+            raise
+    
+    if hedera_service.lookup_transaction(transaction_id) == 'SUCCESS':
+        return None
+    if not transaction_expired(transaction_id):
+        raise Exception(f"Transaction {transaction_id} is not on the mirror node yet")
+    
+    transaction_id = hedera_service.new_transaction_id()
+    renew(transaction_id)
+    return submit(transaction_id)
+
+def chunk_transfers(transfers, max_transfers):
+    """
+    Split (recipient_id, amount) pairs into groups that fit one transaction.
+    
+    The operator debit takes one of the network's ``max_transfers`` account
+    adjustments, so each group holds at most ``max_transfers - 1`` credits.
+    """
+    per_transaction = max(max_transfers - 1, 1)
+    return [transfers[i:i + per_transaction] for i in range(0, len(transfers), per_transaction)]
+
+def _batch_settings():
+    max_transfers = getattr(settings, 'HEDERA_MAX_TRANSFERS_PER_TX', 10)
+    concurrency = getattr(settings, 'HEDERA_BATCH_CONCURRENCY', 4)
+    return max_transfers, concurrency
+
+_client_pool = None
+_client_pool_lock = threading.Lock()
+
+def get_client_pool():
+    """Return the process-wide client pool, creating it on first use."""
+    global _client_pool
+    
+    if _client_pool is None:
+        with _client_pool_lock:
+            if _client_pool is None:
+                _client_pool = HederaClientPool(
+                    network=os.getenv('HEDERA_NETWORK', 'testnet'),
+                    credentials=OperatorCredentials.from_env(),
+                    size=getattr(settings, 'HEDERA_CLIENT_POOL_SIZE', 4),
+                    acquire_timeout=getattr(settings, 'HEDERA_CLIENT_ACQUIRE_TIMEOUT', 30)
+                )
+    return _client_pool
+
+class HederaService:
+    """
+    Hedera operations signed by the platform operator.
+    
+    Instances are cheap: clients and parsed operator credentials come from the
+    shared process-wide pool.
+    """
+    
+    def __init__(self, pool=None):
+        self.pool = pool or get_client_pool()
+        self.network = self.pool.network
+        self.operator = self.pool.credentials
+    
+    def _receipt_status(self, transaction_response, client, wait_for_receipt):
+        """
+        Wait for consensus, or return SUBMITTED and leave the receipt to the
+        ReceiptTracker when ``wait_for_receipt`` is False.
+        """
+        if not wait_for_receipt:
+            return 'SUBMITTED'
+        return transaction_response.getReceipt(client).status.toString()
+    
+    def new_transaction_id(self):
+        """
+        Generate a transaction id for the operator, to be recorded before submitting
+        
+        Hedera executes a transaction id at most once, so resubmitting under
+        the recorded id cannot apply an operation twice. The id is only
+        accepted for about three minutes after it is generated.
+        
+        Returns:
+            str: Transaction ID
+        """
+        return TransactionId.generate(self.operator.account_id).toString()
+    
+    def _execute(self, transaction, client, transaction_id, wait_for_receipt):
+        """
+        Submit a transaction, pinned to ``transaction_id`` when one is given
+        
+        A node that has already seen the id refuses it as a duplicate; that
+        means an earlier submission went through, and is reported as
+        SUBMITTED for the receipt to be resolved later.
+        
+        Returns:
+            tuple: (transaction_id, status)
+        """
+        try:
+            transaction_response = transaction.execute(client)
+        except Exception as e:
+            if transaction_id and 'DUPLICATE_TRANSACTION' in str(e):
+                return transaction_id, 'SUBMITTED'
+            raise
         
-        # Set operator
-        self.client.setOperator(
-            AccountId.fromString(self.account_id),
-            PrivateKey.fromString(self.private_key)
+        return (
+            transaction_response.transactionId.toString(),
+            self._receipt_status(transaction_response, client, wait_for_receipt)
         )
     
-    def transfer_hbar(self, recipient_id, amount):
+    def lookup_transaction(self, transaction_id):
+        """
+        Look a transaction up on the mirror node
+        
+        Nodes drop receipts a few minutes after consensus; the mirror node
+        keeps the record, so this settles transactions the receipt query can
+        no longer answer.
+        
+        Args:
+            transaction_id (str): Transaction ID
+            
+        Returns:
+            str: Result of the executed transaction (e.g. SUCCESS), or None
+                when the mirror node has no record of it
+        """
+        account_id, valid_start = transaction_id.split('@')
+        seconds, nanos = valid_start.split('.')
+        base_url = settings.HEDERA_MIRROR_NODE_URL.rstrip('/')
+        response = requests.get(f"{base_url}/api/v1/transactions/{account_id}-{seconds}-{nanos}", timeout=10)
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        
+        # Later submissions of the same id are recorded as duplicates after
+        # the one that executed
+        transactions = response.json().get('transactions') or []
+        return transactions[0]['result'] if transactions else None
+    
+    def get_receipt_status(self, transaction_id):
+        """
+        Query the receipt status of a submitted transaction
+        
+        Args:
+            transaction_id (str): Transaction ID
+            
+        Returns:
+            str: Receipt status, e.g. SUCCESS or RECEIPT_NOT_FOUND
+        """
+        with self.pool.client() as client:
+            receipt = (
+                TransactionReceiptQuery()
+                .setTransactionId(TransactionId.fromString(transaction_id))
+                .setMaxAttempts(1)
+                .execute(client)
+            )
+        return receipt.status.toString()
+    
+    def transfer_hbar(self, recipient_id, amount, wait_for_receipt=True):
         """
         Transfer HBAR from operator account to recipient
         
         Args:
             recipient_id (str): Recipient account ID
             amount (float): Amount of HBAR to transfer
+            wait_for_receipt (bool): Block until consensus
             
         Returns:
             dict: Transaction details
@@ -50,25 +330,143 @@ class HederaService:
             # Create transfer transaction
             transaction = (
                 TransferTransaction()
-                .addHbarTransfer(AccountId.fromString(self.account_id), Hbar(-amount))
+                .addHbarTransfer(self.operator.account_id, Hbar(-amount))
                 .addHbarTransfer(AccountId.fromString(recipient_id), Hbar(amount))
                 .setTransactionMemo("Haki Platform Transfer")
             )
             
-            # Submit transaction
-            transaction_response = transaction.execute(self.client)
-            
-            # Get receipt
-            receipt = transaction_response.getReceipt(self.client)
+            with self.pool.client() as client:
+                # Submit transaction
+                transaction_response = transaction.execute(client)
+                
+                # Get receipt
+                receipt_status = self._receipt_status(transaction_response, client, wait_for_receipt)
             
             return {
                 'transaction_id': transaction_response.transactionId.toString(),
-                'status': receipt.status.toString(),
+                'status': receipt_status,
                 'amount': amount
             }
         except Exception as e:
             raise Exception(f"Failed to transfer HBAR: {str(e)}")
     
+    def _run_batch(self, transfers, submit_chunk):
+        """
+        Submit transfer chunks concurrently and flatten per-recipient results.
+        
+        A chunk is one atomic transaction, so a failure is reported against
+        every recipient in that chunk and leaves the other chunks untouched.
+        """
+        max_transfers, concurrency = _batch_settings()
+        chunks = chunk_transfers(list(transfers), max_transfers)
+        if not chunks:
+            return []
+        
+        def run(chunk):
+            try:
+                outcome = submit_chunk(chunk)
+            except Exception as e:
+                outcome = {'transaction_id': None, 'status': 'FAILED', 'error': str(e)}
+            return [
+                {'recipient_id': recipient_id, 'amount': amount, **outcome}
+                for recipient_id, amount in chunk
+            ]
+        
+        with ThreadPoolExecutor(max_workers=min(concurrency, len(chunks))) as executor:
+            return [result for chunk_results in executor.map(run, chunks) for result in chunk_results]
+    
+    def _submit_hbar_chunk(self, chunk, memo, wait_for_receipt):
+        total = sum(amount for _, amount in chunk)
+        transaction = TransferTransaction().addHbarTransfer(self.operator.account_id, Hbar(-total))
+        for recipient_id, amount in chunk:
+            transaction.addHbarTransfer(AccountId.fromString(recipient_id), Hbar(amount))
+        transaction.setTransactionMemo(memo)
+        
+        with self.pool.client() as client:
+            transaction_response = transaction.execute(client)
+            receipt_status = self._receipt_status(transaction_response, client, wait_for_receipt)
+        
+        return {
+            'transaction_id': transaction_response.transactionId.toString(),
+            'status': receipt_status,
+            'error': None
+        }
+    
+    def transfer_hbar_batch(self, transfers, memo="Haki Platform Payout", wait_for_receipt=True):
+        """
+        Transfer HBAR from the operator to many recipients
+        
+        Transfers are packed into as few TransferTransactions as the network's
+        per-transaction limit allows, and the transactions run concurrently.
+        
+        Args:
+            transfers (list): (recipient_id, amount) pairs
+            memo (str): Transaction memo
+            wait_for_receipt (bool): Block until consensus
+            
+        Returns:
+            list: One dict per transfer with recipient_id, amount,
+                transaction_id, status and error
+        """
+        return self._run_batch(transfers, lambda chunk: self._submit_hbar_chunk(chunk, memo, wait_for_receipt))
+    
+    def _submit_token_chunk(self, token_id, chunk, memo, wait_for_receipt):
+        token = TokenId.fromString(token_id)
+        total = sum(amount for _, amount in chunk)
+        transaction = TransferTransaction().addTokenTransfer(token, self.operator.account_id, -total)
+        for recipient_id, amount in chunk:
+            transaction.addTokenTransfer(token, AccountId.fromString(recipient_id), amount)
+        transaction.setTransactionMemo(memo)
+        
+        with self.pool.client() as client:
+            transaction.freezeWith(client)
+            signed_tx = transaction.sign(self.operator.private_key)
+            transaction_response = signed_tx.execute(client)
+            receipt_status = self._receipt_status(transaction_response, client, wait_for_receipt)
+        
+        return {
+            'transaction_id': transaction_response.transactionId.toString(),
+            'status': receipt_status,
+            'error': None
+        }
+    
+    def transfer_tokens_batch(self, token_id, transfers, memo="Haki Platform Reward", wait_for_receipt=True):
+        """
+        Transfer tokens from the operator treasury to many recipients
+        
+        Args:
+            token_id (str): Token ID
+            transfers (list): (recipient_id, amount) pairs, amounts in the
+                token's smallest unit
+            memo (str): Transaction memo
+            wait_for_receipt (bool): Block until consensus
+            
+        Returns:
+            list: One dict per transfer, as for transfer_hbar_batch
+        """
+        return self._run_batch(
+            transfers, lambda chunk: self._submit_token_chunk(token_id, chunk, memo, wait_for_receipt)
+        )
+    
+    def mint_and_distribute(self, token_id, allocations, memo="Haki Platform Reward"):
+        """
+        Mint the total of many rewards once and distribute it in batches
+        
+        Args:
+            token_id (str): Token ID
+            allocations (list): (recipient_id, amount) pairs
+            memo (str): Transaction memo
+            
+        Returns:
+            dict: Mint transaction details and per-recipient transfer results
+        """
+        total = sum(amount for _, amount in allocations)
+        mint = self.mint_tokens(token_id, total)
+        return {
+            'mint': mint,
+            'transfers': self.transfer_tokens_batch(token_id, allocations, memo)
+        }
+    
     def create_token(self, name, symbol, initial_supply=0):
         """
         Create a new token
@@ -82,26 +480,28 @@ class HederaService:
             dict: Token details
         """
         try:
-            # Create token
-            transaction = (
-                TokenCreateTransaction()
-                .setTokenName(name)
-                .setTokenSymbol(symbol)
-                .setTokenType(TokenType.FUNGIBLE_COMMON)
-                .setDecimals(0)
-                .setInitialSupply(initial_supply)
-                .setTreasuryAccountId(AccountId.fromString(self.account_id))
-                .setSupplyType(TokenSupplyType.INFINITE)
-                .setSupplyKey(PrivateKey.fromString(self.private_key).getPublicKey())
-                .freezeWith(self.client)
-            )
+            with self.pool.client() as client:
+                # Create token
+                transaction = (
+                    TokenCreateTransaction()
+                    .setTokenName(name)
+                    .setTokenSymbol(symbol)
+                    .setTokenType(TokenType.FUNGIBLE_COMMON)
+                    .setDecimals(0)
+                    .setInitialSupply(initial_supply)
+                    .setTreasuryAccountId(self.operator.account_id)
+                    .setSupplyType(TokenSupplyType.INFINITE)
+                    .setSupplyKey(self.operator.public_key)
+                    .freezeWith(client)
+                )
+                
+                # Sign and submit transaction
+                signed_tx = transaction.sign(self.operator.private_key)
+                transaction_response = signed_tx.execute(client)
+                
+                # Get receipt
+                receipt = transaction_response.getReceipt(client)
             
-            # Sign and submit transaction
-            signed_tx = transaction.sign(PrivateKey.fromString(self.private_key))
-            transaction_response = signed_tx.execute(self.client)
-            
-            # Get receipt
-            receipt = transaction_response.getReceipt(self.client)
             token_id = receipt.tokenId.toString()
             
             return {
@@ -113,42 +513,86 @@ class HederaService:
         except Exception as e:
             raise Exception(f"Failed to create token: {str(e)}")
     
-    def mint_tokens(self, token_id, amount):
+    def mint_tokens(self, token_id, amount, wait_for_receipt=True, transaction_id=None):
         """
         Mint new tokens
         
         Args:
             token_id (str): Token ID
             amount (int): Amount of tokens to mint
+            wait_for_receipt (bool): Block until consensus
+            transaction_id (str): Id from new_transaction_id, recorded before
+                calling so a resubmission cannot mint twice
             
         Returns:
             dict: Transaction details
         """
         try:
-            # Mint tokens
             transaction = (
                 TokenMintTransaction()
                 .setTokenId(TokenId.fromString(token_id))
                 .setAmount(amount)
-                .freezeWith(self.client)
             )
+            if transaction_id:
+                transaction.setTransactionId(TransactionId.fromString(transaction_id))
             
-            # Sign and submit transaction
-            signed_tx = transaction.sign(PrivateKey.fromString(self.private_key))
-            transaction_response = signed_tx.execute(self.client)
-            
-            # Get receipt
-            receipt = transaction_response.getReceipt(self.client)
+            with self.pool.client() as client:
+                # Sign and submit transaction
+                signed_tx = transaction.freezeWith(client).sign(self.operator.private_key)
+                transaction_id, receipt_status = self._execute(signed_tx, client, transaction_id, wait_for_receipt)
             
             return {
-                'transaction_id': transaction_response.transactionId.toString(),
-                'status': receipt.status.toString(),
+                'transaction_id': transaction_id,
+                'status': receipt_status,
                 'token_id': token_id,
                 'amount': amount
             }
         except Exception as e:
             raise Exception(f"Failed to mint tokens: {str(e)}")
+    
+    def release_milestone_payment(self, contract_id, escrow_id, milestone_index, wait_for_receipt=True,
+                                  transaction_id=None):
+        """
+        Release a completed milestone's payment from the escrow contract
+        
+        Args:
+            contract_id (str): Escrow contract ID
+            escrow_id (str): Escrow ID within the contract
+            milestone_index (int): Position of the milestone in the escrow
+            wait_for_receipt (bool): Block until consensus
+            transaction_id (str): Id from new_transaction_id, recorded before
+                calling so a resubmission cannot release twice
+            
+        Returns:
+            dict: Transaction details
+        """
+        try:
+            transaction = (
+                ContractExecuteTransaction()
+                .setContractId(ContractId.fromString(contract_id))
+                .setGas(getattr(settings, 'HEDERA_CONTRACT_GAS', 300000))
+                .setFunction(
+                    'releaseMilestonePayment',
+                    ContractFunctionParameters().addString(escrow_id).addUint256(milestone_index)
+                )
+            )
+            if transaction_id:
+                transaction.setTransactionId(TransactionId.fromString(transaction_id))
+            
+            with self.pool.client() as client:
+                transaction_id, receipt_status = self._execute(transaction, client, transaction_id, wait_for_receipt)
+            
+            return {
+                'transaction_id': transaction_id,
+                'status': receipt_status,
+                'escrow_id': escrow_id,
+                'milestone_index': milestone_index
+            }
+        except Exception as e:
+            raise Exception(f"Failed to release milestone payment: {str(e)}")
 
-# Create singleton instance
-hedera_service = HederaService()
+def get_hedera_service():
+    """Build the configured Hedera service (``HEDERA_SERVICE_CLASS``)."""
+    service_class = getattr(settings, 'HEDERA_SERVICE_CLASS', 'blockchain.services.HederaService')
+    return import_string(service_class)()
 
@@ -0,0 +1,127 @@
+import math
+from decimal import Decimal
+from django.test import SimpleTestCase, TestCase, override_settings
+from bounties.models import Bounty
+from users.models import User
+from .indexer import ContractEventIndexer, MirrorNodeSource
+from .local import LocalHederaService
+from .mirror_fixture import FixtureMirrorNode, encode_log
+from .models import BlockchainTransaction, IndexerCheckpoint
+
+CONTRACT_ID = '0.0.1001'
+CREATOR = '0x' + '11' * 20
+WORKER = '0x' + '22' * 20
+REWARD = 500 * 10 ** 18
+
+def tx_hash(number):
+    return '0x' + f'{number:064x}'
+
+class ContractEventIndexerTests(TestCase):
+    def setUp(self):
+        self.mirror = FixtureMirrorNode().__enter__()
+        self.addCleanup(self.mirror.__exit__, None, None, None)
+    
+    def _run(self, page_size=100):
+        return ContractEventIndexer(MirrorNodeSource(self.mirror.url, page_size=page_size)).run(CONTRACT_ID)
+    
+    def _lifecycle(self, bounty_id, transaction, timestamp):
+        """Create, accept and complete a bounty, each event in its own transaction."""
+        return [
+            encode_log('BountyCreated', {'bountyId': bounty_id, 'creator': CREATOR, 'reward': REWARD},
+                       tx_hash(transaction), f'{timestamp}.000000001'),
+            encode_log('BountyAccepted', {'bountyId': bounty_id, 'worker': WORKER},
+                       tx_hash(transaction + 1), f'{timestamp + 1}.000000001'),
+            encode_log('BountyCompleted', {'bountyId': bounty_id, 'worker': WORKER, 'reward': REWARD},
+                       tx_hash(transaction + 2), f'{timestamp + 2}.000000001'),
+        ]
+    
+    def test_events_of_one_transaction_get_a_row_each(self):
+        self.mirror.add(CONTRACT_ID, [
+            encode_log('BountyCreated', {'bountyId': 1, 'creator': CREATOR, 'reward': REWARD},
+                       tx_hash(1), '100.000000001', index=0),
+            encode_log('BountyCreated', {'bountyId': 2, 'creator': CREATOR, 'reward': REWARD},
+                       tx_hash(1), '100.000000001', index=1),
+        ])
+        
+        self.assertEqual(self._run(), 2)
+        rows = BlockchainTransaction.objects.filter(tx_hash=tx_hash(1)).order_by('log_index')
+        self.assertEqual([row.data['args']['bountyId'] for row in rows], ['1', '2'])
+    
+    def test_completion_has_no_sender(self):
+        self.mirror.add(CONTRACT_ID, self._lifecycle(1, 1, 100))
+        self._run()
+        
+        completion = BlockchainTransaction.objects.get(transaction_type='bounty_completion')
+        self.assertIsNone(completion.from_address)
+        self.assertEqual(completion.to_address.lower(), WORKER)
+        self.assertEqual(completion.amount, Decimal('500'))
+    
+    def test_applies_bounty_state(self):
+        creator = User.objects.create_user(username='ngo@example.com', email='ngo@example.com', role=User.Role.NGO)
+        bounty = Bounty.objects.create(
+            created_by=creator, title='Land rights case', description='Representation',
+            reward=Decimal('500'), blockchain_tx_hash=tx_hash(1)
+        )
+        self.mirror.add(CONTRACT_ID, self._lifecycle(7, 1, 100))
+        self._run()
+        
+        bounty.refresh_from_db()
+        self.assertEqual(bounty.blockchain_id, '7')
+        self.assertEqual(bounty.status, 'completed')
+        self.assertEqual(bounty.completion_tx_hash, tx_hash(3))
+    
+    def test_resumes_without_skipping_or_repeating(self):
+        # Two logs share each timestamp, and pages of three split them
+        logs = [
+            encode_log('BountyCreated', {'bountyId': number, 'creator': CREATOR, 'reward': REWARD},
+                       tx_hash(number // 2), f'{100 + number // 2}.000000001', index=number % 2)
+            for number in range(6)
+        ]
+        self.mirror.add(CONTRACT_ID, logs[:5])
+        self.assertEqual(self._run(page_size=3), 5)
+        
+        self.mirror.add(CONTRACT_ID, logs[5:])
+        self.assertEqual(self._run(page_size=3), 1)
+        self.assertEqual(self._run(page_size=3), 0)
+        
+        self.assertEqual(BlockchainTransaction.objects.count(), 6)
+        checkpoint = IndexerCheckpoint.objects.get(contract_id=CONTRACT_ID)
+        self.assertEqual((checkpoint.last_timestamp, checkpoint.last_index), ('102.000000001', 1))
+        self.assertEqual(checkpoint.events_indexed, 6)
+    
+    def test_rerun_over_indexed_logs_upserts(self):
+        self.mirror.add(CONTRACT_ID, self._lifecycle(1, 1, 100))
+        self._run()
+        IndexerCheckpoint.objects.filter(contract_id=CONTRACT_ID).delete()
+        
+        self.assertEqual(self._run(), 3)
+        self.assertEqual(BlockchainTransaction.objects.count(), 3)
+
+@override_settings(HEDERA_MAX_TRANSFERS_PER_TX=10)
+class BatchedTransferRoundTripTests(SimpleTestCase):
+    """N transfers cost ceil(N / batch) transactions, not N."""
+    def setUp(self):
+        self.service = LocalHederaService()
+    
+    def _round_trips(self, submit):
+        before = self.service.round_trips
+        results = submit()
+        return self.service.round_trips - before, results
+    
+    def test_hbar_transfers_are_chunked(self):
+        for count in (1, 10, 11, 25):
+            transfers = [(f'0.0.{5000 + i}', 1) for i in range(count)]
+            
+            trips, results = self._round_trips(lambda: self.service.transfer_hbar_batch(transfers))
+            
+            self.assertEqual(trips, math.ceil(count / 10))
+            self.assertEqual(len(results), count)
+            self.assertEqual(len({result['transaction_id'] for result in results}), trips)
+    
+    def test_mint_and_distribute_adds_one_mint(self):
+        allocations = [(f'0.0.{5000 + i}', 3) for i in range(25)]
+        
+        trips, result = self._round_trips(lambda: self.service.mint_and_distribute('0.0.9000', allocations))
+        
+        self.assertEqual(trips, 1 + math.ceil(25 / 10))
+        self.assertEqual(result['mint']['amount'], 75)
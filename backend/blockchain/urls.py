@@ -2,7 +2,7 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
     BlockchainTransactionViewSet, EscrowContractViewSet,
-    TokenBalanceViewSet, TokenTransactionViewSet
+    TokenBalanceViewSet, TokenTransactionViewSet, ChainJobViewSet
 )
 
 router = DefaultRouter()
@@ -10,6 +10,7 @@ router.register(r'transactions', BlockchainTransactionViewSet)
 router.register(r'escrows', EscrowContractViewSet)
 router.register(r'token-balances', TokenBalanceViewSet)
 router.register(r'token-transactions', TokenTransactionViewSet)
+router.register(r'jobs', ChainJobViewSet, basename='chain-job')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -2,14 +2,17 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from .models import WalletAddress, BlockchainTransaction, TokenBalance, TokenTransaction
+from .models import WalletAddress, BlockchainTransaction, TokenBalance, TokenTransaction, ChainJob
 from .serializers import (
     WalletAddressSerializer, 
     BlockchainTransactionSerializer, 
     TokenBalanceSerializer,
-    TokenTransactionSerializer
+    TokenTransactionSerializer,
+    ChainJobSerializer
 )
 from django.contrib.auth.models import User
+from haki.pagination import KeysetPagination
+from .reconciliation import get_balance_source
 
 class WalletAddressViewSet(viewsets.ModelViewSet):
     serializer_class = WalletAddressSerializer
@@ -52,13 +55,13 @@ class WalletAddressViewSet(viewsets.ModelViewSet):
 class BlockchainTransactionViewSet(viewsets.ModelViewSet):
     serializer_class = BlockchainTransactionSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
     
     def get_queryset(self):
-        return BlockchainTransaction.objects.filter(
-            from_address=self.request.user.wallet.address
-        ) | BlockchainTransaction.objects.filter(
-            to_address=self.request.user.wallet.address
-        )
+        return BlockchainTransaction.objects.for_wallet_owner(self.request.user)
+    
+    def get_keyset_branches(self):
+        return BlockchainTransaction.objects.wallet_owner_branches(self.request.user)
 
 class TokenBalanceViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = TokenBalanceSerializer
@@ -79,13 +82,23 @@ class TokenBalanceViewSet(viewsets.ReadOnlyModelViewSet):
 class TokenTransactionViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = TokenTransactionSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
     
     def get_queryset(self):
-        return TokenTransaction.objects.filter(
-            from_user=self.request.user
-        ) | TokenTransaction.objects.filter(
-            to_user=self.request.user
-        )
+        return TokenTransaction.objects.for_participant(self.request.user)
+    
+    def get_keyset_branches(self):
+        return TokenTransaction.objects.participant_branches(self.request.user)
+
+class ChainJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """Status of queued Hedera operations (escrow, release, withdrawal)."""
+    serializer_class = ChainJobSerializer
+    permission_classes = [IsAuthenticated]
+    
+    def get_queryset(self):
+        if self.request.user.role == 'admin':
+            return ChainJob.objects.all()
+        return ChainJob.objects.filter(created_by=self.request.user)
 
 class BlockchainSyncViewSet(viewsets.ViewSet):
     permission_classes = [IsAuthenticated]
@@ -94,7 +107,6 @@ class BlockchainSyncViewSet(viewsets.ViewSet):
     def sync(self, request):
         wallet_address = request.data.get('wallet_address')
         bounties = request.data.get('bounties', [])
-        token_balance = request.data.get('token_balance')
         
         # Verify wallet belongs to user
         try:
@@ -106,15 +118,17 @@ class BlockchainSyncViewSet(viewsets.ViewSet):
             return Response({'error': 'User has no linked wallet'}, 
                            status=status.HTTP_400_BAD_REQUEST)
         
-        # Update token balance
-        if token_balance is not None:
-            balance, created = TokenBalance.objects.get_or_create(
-                user=request.user,
-                defaults={'balance': token_balance}
-            )
-            if not created:
-                balance.balance = token_balance
-                balance.save()
+        # Update token balance from the chain rather than trusting the client
+        try:
+            token_balance = get_balance_source().fetch(wallet.address)
+        except Exception as e:
+            return Response({'error': f'Could not fetch token balance: {e}'},
+                           status=status.HTTP_502_BAD_GATEWAY)
+        
+        TokenBalance.objects.update_or_create(
+            user=request.user,
+            defaults={'balance': token_balance}
+        )
         
         # Process bounties
         synced_bounties = 0
@@ -0,0 +1,8 @@
+from django.apps import AppConfig
+
+class BountiesConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'bounties'
+    
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,117 @@
+import hashlib
+import time
+import uuid
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+# Every bounty has a version token in the cache; serialized representations
+# and ETags are keyed by it, so invalidation is a single write and stale
+# entries simply age out. A browse page is keyed by the versions of the
+# bounties it contains, so a change only moves the pages showing that bounty.
+
+def _version_key(bounty_id):
+    return f'bounty:{bounty_id}:version'
+
+def _get_version(key):
+    version = cache.get(key)
+    if version is None:
+        # A lost token is replaced by a fresh one, never reused
+        cache.add(key, uuid.uuid4().hex, timeout=None)
+        version = cache.get(key)
+    return version
+
+def bounty_version(bounty_id):
+    return _get_version(_version_key(bounty_id))
+
+def page_version(bounty_ids):
+    """Digest of the ids and versions of the bounties on a page, in order."""
+    keys = [_version_key(bounty_id) for bounty_id in bounty_ids]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            versions[key] = _get_version(key)
+    
+    encoded = ','.join(f'{bounty_id}={versions[key]}' for bounty_id, key in zip(bounty_ids, keys))
+    return hashlib.sha1(encoded.encode()).hexdigest()[:16]
+
+def invalidate_bounty(bounty_id):
+    """
+    Move a bounty to a new version once the current transaction commits.
+    
+    Deferring to commit keeps a concurrent reader from caching the old rows
+    under the new version.
+    """
+    def bump():
+        cache.set(_version_key(bounty_id), uuid.uuid4().hex, timeout=None)
+    
+    transaction.on_commit(bump)
+
+def signing_window():
+    """
+    Seconds a representation with signed file URLs may be served, or None
+    when storage URLs do not expire.
+    
+    Half the URL lifetime, so a representation served at the end of its
+    window still has links valid for the other half.
+    """
+    if not getattr(settings, 'AWS_QUERYSTRING_AUTH', False):
+        return None
+    return max(settings.AWS_QUERYSTRING_EXPIRE // 2, 1)
+
+def signing_epoch():
+    """Index of the current signing window, or None when URLs do not expire."""
+    window = signing_window()
+    if window is None:
+        return None
+    return int(time.time() // window)
+
+def variant(params):
+    """Digest of the query parameters that shape a representation."""
+    encoded = '&'.join(f'{key}={",".join(params.getlist(key))}' for key in sorted(params))
+    return hashlib.sha1(encoded.encode()).hexdigest()[:16]
+
+def representation_key(scope, version, params, epoch=None):
+    """
+    Cache key, and ETag source, of a representation.
+    
+    Representations that embed signed file URLs pass the current
+    ``signing_epoch()``, so both the entry and the client's ETag move on
+    before the links expire.
+    """
+    key = f'bounty:{scope}:{version}:{variant(params)}'
+    if epoch is not None:
+        key = f'{key}:{epoch}'
+    return key
+
+def etag(key):
+    return '"%s"' % hashlib.sha1(key.encode()).hexdigest()
+
+def not_modified(request, tag):
+    """Whether the request's If-None-Match already names ``tag``."""
+    header = request.headers.get('If-None-Match', '')
+    return tag in (value.strip() for value in header.split(','))
+
+def matches_any(request):
+    """
+    Whether the request sent ``If-None-Match: *``.
+    
+    It matches any current representation, so it may only be answered once
+    the resource has been resolved; a missing one is still a 404.
+    """
+    return request.headers.get('If-None-Match', '').strip() == '*'
+
+def cached_representation(key, build, signed=False):
+    """
+    Return the cached representation under ``key``, building it on a miss.
+    
+    ``signed`` representations are kept no longer than the signing window.
+    """
+    data = cache.get(key)
+    if data is None:
+        data = build()
+        timeout = settings.BOUNTY_CACHE_TIMEOUT
+        if signed and signing_window() is not None:
+            timeout = min(timeout, signing_window())
+        cache.set(key, data, timeout=timeout)
+    return data
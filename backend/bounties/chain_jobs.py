@@ -0,0 +1,237 @@
+from decimal import Decimal, ROUND_DOWN
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from blockchain.outbox import enqueue, pin_transaction_id, register
+from blockchain.services import get_hedera_service, submit_pinned
+from payments.models import Payment, Token, TokenTransaction
+from payments.services import credit_payment
+from users.models import User
+from .models import Bounty, Milestone
+from .services import release_milestone
+
+@register('create_escrow')
+def create_escrow(job):
+    """
+    Create the bounty's escrow contract and activate the bounty.
+    
+    The transaction id is pinned on the job before submission, so a retry
+    after a crash between submitting and saving the contract id resubmits
+    under the same id and gets the existing contract back.
+    """
+    bounty = Bounty.objects.select_related('ngo').get(pk=job.payload['bounty_id'])
+    
+    # A retry after the escrow was recorded has nothing left to do
+    if bounty.status != Bounty.Status.PENDING:
+        return {'contract_id': bounty.contract_id}
+    
+    hedera_service = get_hedera_service()
+    
+    # Extract milestone data, in position order: a milestone's place in this
+    # list is its index in the contract
+    escrowed = list(bounty.milestones.all())
+    milestones = [
+        {
+            'id': str(milestone.id),
+            'amount': float(milestone.amount),
+            'description': milestone.description
+        }
+        for milestone in escrowed
+    ]
+    
+    # Create escrow contract
+    transaction_id = pin_transaction_id(job, hedera_service)
+    contract_id = submit_pinned(
+        hedera_service,
+        transaction_id,
+        lambda transaction_id: hedera_service.create_escrow(
+            bounty_id=str(bounty.id),
+            ngo_id=str(bounty.ngo.id),
+            total_amount=float(bounty.funding_goal),
+            milestones=milestones,
+            transaction_id=transaction_id
+        ),
+        lambda transaction_id: pin_transaction_id(job, hedera_service, renew=True)
+    )
+    if contract_id is None:
+        # Never create a second escrow: the contract must be recovered by hand
+        raise Exception(f"Escrow transaction {transaction_id} executed but has expired; set the contract id from its record")
+    
+    # Update bounty with contract ID, and fix each milestone's contract index
+    with transaction.atomic():
+        for index, milestone in enumerate(escrowed):
+            milestone.chain_index = index
+        Milestone.objects.bulk_update(escrowed, ['chain_index'])
+        
+        bounty.contract_id = contract_id
+        bounty.status = Bounty.Status.ACTIVE
+        bounty.admin_notes = job.payload.get('notes', '')
+        bounty.save(update_fields=['contract_id', 'status', 'admin_notes', 'updated_at'])
+    
+    return {'contract_id': contract_id}
+
+def _prepare_payout(milestone, approver, notes, hedera_service):
+    """
+    Get or create the milestone's payment with its Hedera transaction id.
+    
+    The transaction id is committed before anything is submitted, so a
+    payout interrupted after submission is resubmitted under the same id,
+    which Hedera executes at most once, or looked up on the mirror node. The
+    (milestone, payment_type) constraint makes this safe under concurrent
+    approvals: the losing insert falls back to the existing row.
+    """
+    payment, _ = Payment.objects.get_or_create(
+        milestone=milestone,
+        payment_type=Payment.Type.MILESTONE,
+        defaults={
+            'bounty': milestone.bounty,
+            'sender': approver,
+            'receiver': milestone.bounty.lawyer.user,
+            'amount': milestone.amount,
+            'status': Payment.Status.PENDING,
+            'idempotency_key': f'milestone-payout:{milestone.id}',
+            'transaction_id': hedera_service.new_transaction_id(),
+            'transaction_data': {'notes': notes},
+        }
+    )
+    return payment
+
+def _submit_payout(payment, hedera_service):
+    """
+    Release the milestone on chain under the payment's recorded transaction id.
+    
+    The payment becomes SUBMITTED and the receipt tracker settles it. If the
+    id has expired before this submission, an earlier attempt may or may not
+    have executed, so the payment goes to RECONCILE to be looked up rather
+    than sent again.
+    """
+    milestone = payment.milestone
+    if milestone.chain_index is None:
+        raise Exception(f"Milestone {milestone.pk} is not part of the bounty's escrow")
+    
+    try:
+        hedera_service.release_milestone_payment(
+            contract_id=payment.bounty.contract_id,
+            escrow_id=str(payment.bounty_id),
+            milestone_index=milestone.chain_index,
+            wait_for_receipt=False,
+            transaction_id=payment.transaction_id
+        )
+        payment.status = Payment.Status.SUBMITTED
+    except Exception as e:
+        if 'TRANSACTION_EXPIRED' not in str(e):
+            raise
+        payment.status = Payment.Status.RECONCILE
+    
+    Payment.objects.filter(pk=payment.pk, status=Payment.Status.PENDING).update(
+        status=payment.status, updated_at=timezone.now()
+    )
+
+def settle_milestone_payout(payment):
+    """
+    Complete a payout that reached consensus: credit the lawyer and release
+    the milestone, in one transaction.
+    
+    Queues the lawyer's reward when the release completes the bounty.
+    
+    Returns:
+        bool: True when this call settled the payment
+    """
+    with transaction.atomic():
+        payment = Payment.objects.select_for_update().get(pk=payment.pk)
+        if payment.status not in (Payment.Status.SUBMITTED, Payment.Status.RECONCILE):
+            return False
+        
+        payment.status = Payment.Status.COMPLETED
+        payment.save(update_fields=['status', 'updated_at'])
+        credit_payment(payment)
+        
+        milestone = Milestone.objects.get(pk=payment.milestone_id)
+        if release_milestone(milestone, payment.transaction_data.get('notes', ''), payment.transaction_id):
+            enqueue(
+                'reward_lawyer',
+                {'bounty_id': milestone.bounty_id},
+                idempotency_key=f'bounty-reward:{milestone.bounty_id}'
+            )
+    return True
+
+@register('release_milestone_payment')
+def release_milestone_payment(job):
+    """
+    Submit an approved milestone's payout.
+    
+    The payment moves PENDING -> SUBMITTED, and the receipt tracker moves it
+    on to COMPLETED (see ``settle_milestone_payout``). A retried job
+    resubmits under the transaction id recorded on the first attempt.
+    """
+    milestone = Milestone.objects.select_related('bounty__lawyer__user').get(pk=job.payload['milestone_id'])
+    approver = User.objects.get(pk=job.payload['approved_by'])
+    hedera_service = get_hedera_service()
+    
+    payment = _prepare_payout(milestone, approver, job.payload.get('notes', ''), hedera_service)
+    if payment.status == Payment.Status.PENDING:
+        _submit_payout(payment, hedera_service)
+    
+    return {'transaction_id': payment.transaction_id, 'payment_id': payment.id}
+
+def _claim_reward(bounty, hedera_service):
+    """
+    Insert the bounty's reward row before anything is minted.
+    
+    The (bounty, reward) constraint lets only one claim exist, so a retry or
+    a concurrent job picks up the same row and its transaction id.
+    """
+    lawyer = bounty.lawyer.user
+    # 5% of the funding goal, in whole tokens: the HTS token has no decimals
+    token_amount = (bounty.funding_goal * Decimal('0.05')).quantize(Decimal('1'), rounding=ROUND_DOWN)
+    
+    token, _ = Token.objects.get_or_create(user=lawyer)
+    try:
+        with transaction.atomic():
+            return TokenTransaction.objects.create(
+                token=token,
+                amount=token_amount,
+                transaction_type=TokenTransaction.Type.REWARD,
+                status=TokenTransaction.Status.PENDING,
+                transaction_id=hedera_service.new_transaction_id(),
+                receiver=lawyer,
+                bounty=bounty
+            )
+    except IntegrityError:
+        return TokenTransaction.objects.get(bounty=bounty, transaction_type=TokenTransaction.Type.REWARD)
+
+def _mint_reward(reward, hedera_service):
+    """Mint a claimed reward under its recorded transaction id."""
+    
+    def renew(transaction_id):
+        reward.transaction_id = transaction_id
+        reward.save(update_fields=['transaction_id'])
+    
+    submit_pinned(
+        hedera_service,
+        reward.transaction_id,
+        lambda transaction_id: hedera_service.mint_tokens(
+            settings.HEDERA_TOKEN_ID, int(reward.amount), transaction_id=transaction_id
+        ),
+        renew
+    )
+
+@register('reward_lawyer')
+def reward_lawyer(job):
+    """Mint the completion reward once per bounty: claim, mint, then complete."""
+    bounty = Bounty.objects.select_related('lawyer__user').get(pk=job.payload['bounty_id'])
+    hedera_service = get_hedera_service()
+    
+    reward = _claim_reward(bounty, hedera_service)
+    if reward.status == TokenTransaction.Status.PENDING:
+        _mint_reward(reward, hedera_service)
+        
+        with transaction.atomic():
+            completed = TokenTransaction.objects.filter(
+                pk=reward.pk, status=TokenTransaction.Status.PENDING
+            ).update(status=TokenTransaction.Status.COMPLETED)
+            if completed:
+                Token.objects.filter(pk=reward.token_id).update(balance=F('balance') + reward.amount)
+    
+    return {'transaction_id': reward.transaction_id, 'amount': str(reward.amount)}
@@ -0,0 +1,97 @@
+import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.db.models import F, Sum
+from bounties.models import Bounty, Donation
+from bounties.services import collapse_funding_shards, funding_total, record_donation
+from users.models import DonorProfile
+
+class Command(BaseCommand):
+    help = (
+        'Donate to one bounty from N parallel donors and check that no update was lost. '
+        'Writes to the database; the donations and donors are removed afterwards unless --keep is given.'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('bounty_id', type=int)
+        parser.add_argument('--donors', type=int, default=50, help='Parallel donors, one thread each')
+        parser.add_argument('--donations', type=int, default=20, help='Donations per donor')
+        parser.add_argument('--amount', type=Decimal, default=Decimal('1.00'))
+        parser.add_argument('--shards', type=int, help='Funding shards to use for the run')
+        parser.add_argument('--keep', action='store_true', help='Keep the donations and donors')
+    
+    def _donors(self, count):
+        run = secrets.token_hex(4)
+        User = get_user_model()
+        donors = User.objects.bulk_create([
+            User(username=f'bench-donor-{run}-{index}', email=f'bench-donor-{run}-{index}@example.com', role='donor')
+            for index in range(count)
+        ])
+        DonorProfile.objects.bulk_create([DonorProfile(user=donor) for donor in donors])
+        return donors
+    
+    def _donate(self, bounty, donor, count, amount):
+        try:
+            for _ in range(count):
+                record_donation(bounty, donor, amount)
+        finally:
+            close_old_connections()
+    
+    def handle(self, *args, **options):
+        bounty = Bounty.objects.filter(pk=options['bounty_id']).first()
+        if bounty is None:
+            raise CommandError(f"Bounty {options['bounty_id']} does not exist")
+        
+        shards = bounty.funding_shards
+        if options['shards'] is not None:
+            Bounty.objects.filter(pk=bounty.pk).update(funding_shards=options['shards'])
+            bounty.refresh_from_db()
+        
+        amount = options['amount']
+        donors = self._donors(options['donors'])
+        before = funding_total(bounty)
+        
+        try:
+            started = time.monotonic()
+            with ThreadPoolExecutor(max_workers=len(donors)) as executor:
+                futures = [
+                    executor.submit(self._donate, bounty, donor, options['donations'], amount)
+                    for donor in donors
+                ]
+                for future in futures:
+                    future.result()
+            elapsed = time.monotonic() - started
+            
+            count = len(donors) * options['donations']
+            expected = amount * count
+            bounty.refresh_from_db()
+            funded = funding_total(bounty) - before
+            donated = DonorProfile.objects.filter(user__in=donors).aggregate(total=Sum('total_donated'))['total']
+            recorded = Donation.objects.filter(donor__in=donors).count()
+            
+            self.stdout.write(
+                f"{count} donations from {len(donors)} donors in {elapsed:.2f}s "
+                f"({count / max(elapsed, 1e-6):.1f}/s), shards={bounty.funding_shards}"
+            )
+            self.stdout.write(f"bounty funding: +{funded} of {expected}")
+            self.stdout.write(f"donor totals:   {donated} of {expected}")
+            self.stdout.write(f"donation rows:  {recorded} of {count}")
+            
+            if funded == expected and donated == expected and recorded == count:
+                self.stdout.write(self.style.SUCCESS('No lost updates'))
+            else:
+                self.stdout.write(self.style.ERROR('Lost updates'))
+        finally:
+            if not options['keep']:
+                collapse_funding_shards(bounty.pk)
+                total = Donation.objects.filter(donor__in=donors).aggregate(total=Sum('amount'))['total']
+                if total:
+                    Bounty.objects.filter(pk=bounty.pk).update(current_funding=F('current_funding') - total)
+                Donation.objects.filter(donor__in=donors).delete()
+                get_user_model().objects.filter(pk__in=[donor.pk for donor in donors]).delete()
+            if options['shards'] is not None:
+                Bounty.objects.filter(pk=bounty.pk).update(funding_shards=shards)
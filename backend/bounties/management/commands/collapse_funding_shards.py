@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from bounties.models import BountyFundingShard
+from bounties.services import collapse_funding_shards
+
+class Command(BaseCommand):
+    help = 'Fold sharded funding counters back into Bounty.current_funding'
+    
+    def handle(self, *args, **options):
+        bounty_ids = BountyFundingShard.objects.filter(amount__gt=0).values_list('bounty_id', flat=True).distinct()
+        
+        for bounty_id in bounty_ids:
+            total = collapse_funding_shards(bounty_id)
+            self.stdout.write(f"Bounty {bounty_id}: folded {total}")
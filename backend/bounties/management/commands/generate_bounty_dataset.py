@@ -0,0 +1,68 @@
+import random
+import time
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from bounties.models import Bounty
+from bounties.search import update_search_vectors
+
+CATEGORIES = ['human-rights', 'land', 'labour', 'family', 'environment', 'refugee', 'criminal-defence', 'housing']
+LOCATIONS = ['Nairobi', 'Mombasa', 'Kisumu', 'Nakuru', 'Eldoret', 'Kampala', 'Dar es Salaam', 'Kigali']
+STATUSES = [choice for choice, _ in Bounty.STATUS_CHOICES]
+TAGS = ['pro-bono', 'urgent', 'appeal', 'class-action', 'women', 'children', 'community', 'eviction',
+        'detention', 'compensation', 'constitutional', 'mediation']
+WORDS = (
+    'court appeal tenant eviction land title dispute community water access wrongful dismissal wages '
+    'detention bail hearing custody inheritance widow compensation pollution river factory permit '
+    'refugee asylum status documentation school fees discrimination police brutality housing rights '
+    'constitutional petition injunction mediation settlement evidence witness affidavit counsel'
+).split()
+
+class Command(BaseCommand):
+    help = 'Generate synthetic bounties for benchmarking search and browse'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=100000, help='Number of bounties to create')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per bulk insert')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed, for repeatable datasets')
+    
+    def _text(self, rng, words):
+        return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize()
+    
+    def _bounty(self, rng, creator):
+        return Bounty(
+            title=self._text(rng, rng.randint(4, 9)),
+            description=self._text(rng, rng.randint(20, 60)),
+            long_description=self._text(rng, rng.randint(80, 300)),
+            category=rng.choice(CATEGORIES),
+            location=rng.choice(LOCATIONS),
+            status=rng.choice(STATUSES),
+            reward=Decimal(rng.randint(100, 500000)),
+            tags=rng.sample(TAGS, rng.randint(0, 4)),
+            created_by=creator
+        )
+    
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        creator, _ = get_user_model().objects.get_or_create(
+            username='dataset-generator', defaults={'email': 'dataset-generator@haki.local'}
+        )
+        
+        remaining = options['count']
+        created = 0
+        started = time.monotonic()
+        
+        while remaining > 0:
+            size = min(options['batch_size'], remaining)
+            bounties = Bounty.objects.bulk_create([self._bounty(rng, creator) for _ in range(size)])
+            # bulk_create sends no post_save, so vectors are filled per batch
+            update_search_vectors(Bounty.objects.filter(pk__in=[bounty.pk for bounty in bounties]))
+            
+            remaining -= size
+            created += size
+            self.stdout.write(f"Created {created} bounties")
+        
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {created} bounties in {elapsed:.1f}s ({created / max(elapsed, 1e-6):.0f}/s)"
+        ))
@@ -1,5 +1,7 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 
 class Bounty(models.Model):
     STATUS_CHOICES = (
@@ -11,18 +13,44 @@ class Bounty(models.Model):
     
     title = models.CharField(max_length=255)
     description = models.TextField()
+    long_description = models.TextField(blank=True)
+    category = models.CharField(max_length=100, blank=True)
+    location = models.CharField(max_length=100, blank=True)
     reward = models.DecimalField(max_digits=18, decimal_places=8)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='open')
     created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='created_bounties')
     assigned_to = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='assigned_bounties')
     is_on_chain = models.BooleanField(default=False)
     blockchain_tx_hash = models.CharField(max_length=255, null=True, blank=True)
-    blockchain_id = models.CharField(max_length=255, null=True, blank=True)
+    blockchain_id = models.CharField(max_length=255, null=True, blank=True, db_index=True)
     completion_tx_hash = models.CharField(max_length=255, null=True, blank=True)
     tags = models.JSONField(default=list)
+    # Number of BountyFundingShard rows donations are spread over; 0 means
+    # donations increment current_funding directly.
+    funding_shards = models.PositiveSmallIntegerField(default=0)
+    # Milestone progression counters, maintained by bounties.services so
+    # approval can detect completion without counting milestones.
+    milestone_count = models.PositiveIntegerField(default=0)
+    released_milestone_count = models.PositiveIntegerField(default=0)
+    # Position for the next milestone; only ever grows, so positions freed
+    # by removed milestones are never reused
+    next_milestone_position = models.PositiveIntegerField(default=0)
+    # Weighted tsvector over title/description/long_description, maintained
+    # by bounties.search; never written from application code.
+    search_vector = SearchVectorField(null=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='bounty_created_id_idx'),
+            GinIndex(fields=['search_vector'], name='bounty_search_vector_idx'),
+            GinIndex(fields=['tags'], name='bounty_tags_gin_idx'),
+            models.Index(fields=['category'], name='bounty_category_idx'),
+            models.Index(fields=['location'], name='bounty_location_idx'),
+            models.Index(fields=['status'], name='bounty_status_idx'),
+        ]
+    
     def __str__(self):
         return self.title
     
@@ -34,6 +62,26 @@ class Bounty(models.Model):
     def assigned_to_username(self):
         return self.assigned_to.username if self.assigned_to else None
 
+class BountyFundingShard(models.Model):
+    """
+    Partial funding counter for very hot bounties.
+    
+    Concurrent donations land on different shard rows instead of queueing on
+    the bounty row; ``collapse_funding_shards`` folds them back into
+    ``Bounty.current_funding``.
+    """
+    bounty = models.ForeignKey(Bounty, on_delete=models.CASCADE, related_name='funding_shard_rows')
+    shard = models.PositiveSmallIntegerField()
+    amount = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['bounty', 'shard'], name='bounty_funding_shard_unique'),
+        ]
+    
+    def __str__(self):
+        return f"{self.bounty.title} - shard {self.shard}"
+
 class Milestone(models.Model):
     STATUS_CHOICES = (
         ('pending', 'Pending'),
@@ -42,6 +90,11 @@ class Milestone(models.Model):
     )
     
     bounty = models.ForeignKey(Bounty, on_delete=models.CASCADE, related_name='milestones')
+    # Order of the milestone within its bounty, assigned on creation
+    position = models.PositiveIntegerField(default=0)
+    # Index of the milestone in the escrow contract, fixed when the escrow is
+    # created; later removals must not shift it
+    chain_index = models.PositiveIntegerField(null=True, blank=True)
     title = models.CharField(max_length=255)
     description = models.TextField()
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
@@ -50,6 +103,12 @@ class Milestone(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    class Meta:
+        ordering = ['position', 'id']
+        constraints = [
+            models.UniqueConstraint(fields=['bounty', 'position'], name='milestone_bounty_position_unique'),
+        ]
+    
     def __str__(self):
         return f"{self.bounty.title} - {self.title}"
 
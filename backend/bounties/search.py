@@ -0,0 +1,88 @@
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db.models import Count, F
+
+# Columns that feed Bounty.search_vector, with their rank weights
+SEARCH_FIELDS = (('title', 'A'), ('description', 'B'), ('long_description', 'C'))
+SEARCH_FIELD_NAMES = {name for name, _ in SEARCH_FIELDS}
+
+FACET_FIELDS = ('category', 'location', 'status')
+
+def search_vector():
+    config = settings.BOUNTY_SEARCH_CONFIG
+    vector = None
+    for name, weight in SEARCH_FIELDS:
+        part = SearchVector(name, weight=weight, config=config)
+        vector = part if vector is None else vector + part
+    return vector
+
+def update_search_vectors(queryset):
+    """
+    Recompute the search vector for every bounty in ``queryset``.
+    
+    Runs as a single UPDATE inside the database, so it suits both a single
+    saved bounty and a bulk backfill.
+    
+    Returns:
+        int: Number of bounties updated
+    """
+    return queryset.update(search_vector=search_vector())
+
+def _search_query(text):
+    return SearchQuery(text, search_type='websearch', config=settings.BOUNTY_SEARCH_CONFIG)
+
+def filter_bounties(queryset, text=None, category=None, location=None, status=None, tags=None):
+    """
+    Filter bounties by full-text query and facet values.
+    
+    Args:
+        queryset (QuerySet): Bounties to search
+        text (str): Web-search style query ("quoted phrases", -exclusions, or)
+        category (str): Exact category
+        location (str): Exact location
+        status (str): Exact status
+        tags (list): Tags the bounty must all carry
+    
+    Returns:
+        QuerySet: Matching bounties
+    """
+    if category:
+        queryset = queryset.filter(category=category)
+    if location:
+        queryset = queryset.filter(location=location)
+    if status:
+        queryset = queryset.filter(status=status)
+    if tags:
+        queryset = queryset.filter(tags__contains=tags)
+    if text:
+        queryset = queryset.filter(search_vector=_search_query(text))
+    return queryset
+
+def rank_bounties(queryset, text=None):
+    """Order matches by relevance to ``text``, or newest first without one."""
+    if not text:
+        return queryset.order_by('-created_at', '-id')
+    
+    rank = SearchRank(F('search_vector'), _search_query(text))
+    return queryset.annotate(rank=rank).order_by('-rank', '-id')
+
+def facet_counts(queryset):
+    """
+    Count matches per category, location and status in one query.
+    
+    The database groups by the three columns together and the per-facet
+    totals are folded here; the number of distinct combinations is small
+    compared with the number of matches.
+    
+    Returns:
+        dict: facet name -> {value: count}
+    """
+    facets = {name: {} for name in FACET_FIELDS}
+    rows = queryset.order_by().values(*FACET_FIELDS).annotate(count=Count('id'))
+    
+    for row in rows:
+        for name in FACET_FIELDS:
+            value = row[name]
+            facets[name][value] = facets[name].get(value, 0) + row['count']
+    
+    return facets
@@ -1,13 +1,17 @@
 from rest_framework import serializers
 from .models import Bounty, Milestone, Donation, BountyDocument, Review
+from .services import add_milestone, funding_total
 from users.serializers import UserSerializer, LawyerProfileSerializer
 
 class MilestoneSerializer(serializers.ModelSerializer):
     class Meta:
         model = Milestone
-        fields = ['id', 'bounty', 'title', 'description', 'amount', 'status',
+        fields = ['id', 'bounty', 'position', 'title', 'description', 'amount', 'status',
                   'due_date', 'completed_date', 'created_at', 'updated_at']
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'position', 'created_at', 'updated_at']
+    
+    def create(self, validated_data):
+        return add_milestone(**validated_data)
 
 class DonationSerializer(serializers.ModelSerializer):
     donor = UserSerializer(read_only=True)
@@ -31,7 +35,70 @@ class ReviewSerializer(serializers.ModelSerializer):
         fields = ['id', 'bounty', 'reviewer', 'rating', 'comment', 'created_at']
         read_only_fields = ['id', 'created_at']
 
-class BountySerializer(serializers.ModelSerializer):
+class FundingTotalField(serializers.DecimalField):
+    """A bounty's funding, including donations still held in shard counters."""
+    def __init__(self, **kwargs):
+        super().__init__(max_digits=18, decimal_places=2, read_only=True, **kwargs)
+    
+    def get_attribute(self, instance):
+        return funding_total(instance)
+
+def parse_field_list(value):
+    """Parse a comma separated ``?fields=``/``?expand=`` value into a set of names."""
+    if not value:
+        return set()
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+class FieldSelectionMixin:
+    """
+    Trim or extend a representation from the serializer context.
+
+    ``fields`` (a set of names) keeps only the listed fields, and ``expand``
+    adds the nested relations declared in ``expandable_fields``. Both are
+    read from the context rather than the request, so serializers nested in
+    other endpoints (payments, escrows) are never affected by their query
+    string.
+    """
+    expandable_fields = {}
+    
+    def get_fields(self):
+        fields = super().get_fields()
+        expand = self.context.get('expand') or set()
+        selected = self.context.get('fields') or set()
+        
+        for name in expand & set(self.expandable_fields):
+            fields[name] = self.expandable_fields[name]()
+        
+        if selected:
+            for name in set(fields) - selected - expand:
+                fields.pop(name)
+        
+        return fields
+
+BOUNTY_RELATIONS = ('ngo', 'lawyer', 'milestones', 'donations', 'documents', 'reviews')
+
+class BountyListSerializer(FieldSelectionMixin, serializers.ModelSerializer):
+    """Compact representation for the browse page; relations are opt-in via ``expand``."""
+    current_funding = FundingTotalField()
+    
+    expandable_fields = {
+        'ngo': lambda: UserSerializer(read_only=True),
+        'lawyer': lambda: LawyerProfileSerializer(read_only=True),
+        'milestones': lambda: MilestoneSerializer(many=True, read_only=True),
+        'donations': lambda: DonationSerializer(many=True, read_only=True),
+        'documents': lambda: BountyDocumentSerializer(many=True, read_only=True),
+        'reviews': lambda: ReviewSerializer(many=True, read_only=True),
+    }
+    
+    class Meta:
+        model = Bounty
+        fields = ['id', 'title', 'description', 'category', 'location',
+                  'funding_goal', 'current_funding', 'deadline', 'status',
+                  'created_at']
+        read_only_fields = fields
+
+class BountySerializer(FieldSelectionMixin, serializers.ModelSerializer):
+    current_funding = FundingTotalField()
     ngo = UserSerializer(read_only=True)
     lawyer = LawyerProfileSerializer(read_only=True)
     milestones = MilestoneSerializer(many=True, read_only=True)
@@ -0,0 +1,178 @@
+import random
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery, Sum
+from .cache import invalidate_bounty
+from .models import Bounty, BountyFundingShard, Donation, Milestone
+from users.models import DonorProfile
+
+def _increment_shard(bounty, amount):
+    shard = random.randrange(bounty.funding_shards)
+    shard_rows = BountyFundingShard.objects.filter(bounty=bounty, shard=shard)
+    
+    if not shard_rows.update(amount=F('amount') + amount):
+        BountyFundingShard.objects.get_or_create(bounty=bounty, shard=shard)
+        shard_rows.update(amount=F('amount') + amount)
+
+def record_donation(bounty, donor, amount):
+    """
+    Record a donation and add it to the bounty and donor totals.
+    
+    All counters are incremented in the database with F() expressions inside
+    one transaction, so concurrent donations never overwrite each other and
+    only the counter columns are written.
+    
+    Args:
+        bounty (Bounty): Bounty being funded
+        donor (User): Donating user
+        amount (Decimal): Donation amount
+        
+    Returns:
+        Donation: The created donation
+    """
+    with transaction.atomic():
+        donation = Donation.objects.create(
+            bounty=bounty,
+            donor=donor,
+            amount=amount
+        )
+        
+        if bounty.funding_shards:
+            _increment_shard(bounty, amount)
+        else:
+            Bounty.objects.filter(pk=bounty.pk).update(current_funding=F('current_funding') + amount)
+        
+        DonorProfile.objects.filter(user=donor).update(total_donated=F('total_donated') + amount)
+    
+    return donation
+
+def with_pending_funding(queryset):
+    """
+    Annotate bounties with ``pending_funding``, their shard amounts not yet
+    folded in, so ``funding_total`` needs no query per bounty.
+    """
+    pending = (
+        BountyFundingShard.objects.filter(bounty=OuterRef('pk'))
+        .values('bounty').annotate(total=Sum('amount')).values('total')
+    )
+    return queryset.annotate(pending_funding=Subquery(pending))
+
+def funding_total(bounty):
+    """Current funding including donations not yet folded in from shards."""
+    if not bounty.funding_shards:
+        return bounty.current_funding
+    
+    if hasattr(bounty, 'pending_funding'):
+        pending = bounty.pending_funding or Decimal('0')
+    else:
+        pending = bounty.funding_shard_rows.aggregate(total=Sum('amount'))['total'] or Decimal('0')
+    return bounty.current_funding + pending
+
+def collapse_funding_shards(bounty_id):
+    """
+    Fold a bounty's shard counters into ``current_funding``.
+    
+    Returns:
+        Decimal: Amount moved from the shards
+    """
+    with transaction.atomic():
+        shards = list(BountyFundingShard.objects.select_for_update().filter(bounty_id=bounty_id))
+        total = sum((shard.amount for shard in shards), Decimal('0'))
+        
+        if total:
+            Bounty.objects.filter(pk=bounty_id).update(current_funding=F('current_funding') + total)
+            BountyFundingShard.objects.filter(pk__in=[shard.pk for shard in shards]).update(amount=0)
+            invalidate_bounty(bounty_id)
+    
+    return total
+
+def add_milestone(bounty, **fields):
+    """
+    Append a milestone to a bounty at the next position.
+    
+    The bounty row is locked so concurrent additions get distinct positions.
+    """
+    with transaction.atomic():
+        bounty = Bounty.objects.select_for_update().get(pk=bounty.pk)
+        milestone = Milestone.objects.create(bounty=bounty, position=bounty.next_milestone_position, **fields)
+        Bounty.objects.filter(pk=bounty.pk).update(
+            milestone_count=F('milestone_count') + 1,
+            next_milestone_position=F('next_milestone_position') + 1
+        )
+    
+    return milestone
+
+def _advance(bounty, milestone, update_fields, start_next=True):
+    """
+    Move a locked bounty on after a milestone was released or removed.
+    
+    Completes the bounty once every remaining milestone is released, and
+    otherwise, with ``start_next``, moves the milestone after ``milestone``
+    to in-progress. Saves ``update_fields`` on the bounty.
+    
+    Returns:
+        bool: True when this call completed the bounty
+    """
+    completed = (
+        bounty.status != Bounty.Status.COMPLETED
+        and 0 < bounty.released_milestone_count >= bounty.milestone_count
+    )
+    if completed:
+        bounty.status = Bounty.Status.COMPLETED
+        update_fields.append('status')
+    bounty.save(update_fields=update_fields)
+    
+    if not completed and start_next:
+        next_milestone = (
+            Milestone.objects.filter(bounty_id=bounty.pk, position__gt=milestone.position)
+            .order_by('position').values('pk')[:1]
+        )
+        Milestone.objects.filter(pk__in=Subquery(next_milestone)).update(status=Milestone.Status.IN_PROGRESS)
+    return completed
+
+def remove_milestone(milestone):
+    """
+    Delete a milestone and keep the bounty's progression in step.
+    
+    The bounty moves on as a release would: removing the last unreleased
+    milestone completes it, and removing the one in progress starts the
+    next.
+    
+    Returns:
+        bool: True when the removal completed the bounty
+    """
+    with transaction.atomic():
+        bounty = Bounty.objects.select_for_update().get(pk=milestone.bounty_id)
+        bounty.milestone_count -= 1
+        if milestone.status == Milestone.Status.RELEASED:
+            bounty.released_milestone_count -= 1
+        started_next = milestone.status == Milestone.Status.IN_PROGRESS
+        milestone.delete()
+        
+        return _advance(
+            bounty, milestone, ['milestone_count', 'released_milestone_count', 'updated_at'], start_next=started_next
+        )
+
+def release_milestone(milestone, notes, transaction_id):
+    """
+    Mark a milestone released and advance the bounty, in constant queries.
+    
+    Locks the bounty, bumps its released counter, and either completes the
+    bounty or moves the milestone at the next position to in-progress. Must
+    be called inside ``transaction.atomic``.
+    
+    Returns:
+        bool: True when this release completed the bounty
+    """
+    bounty = Bounty.objects.select_for_update().get(pk=milestone.bounty_id)
+    
+    milestone.status = Milestone.Status.RELEASED
+    milestone.approval_notes = notes
+    milestone.transaction_id = transaction_id
+    milestone.save(update_fields=['status', 'approval_notes', 'transaction_id', 'updated_at'])
+    
+    bounty.released_milestone_count += 1
+    completed = _advance(bounty, milestone, ['released_milestone_count', 'updated_at'])
+    
+    milestone.bounty = bounty
+    return completed
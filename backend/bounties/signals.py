@@ -0,0 +1,23 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .cache import invalidate_bounty
+from .models import Bounty, Milestone, Donation, BountyDocument, Review
+from .search import SEARCH_FIELD_NAMES, update_search_vectors
+
+@receiver([post_save, post_delete], sender=Bounty)
+def invalidate_saved_bounty(sender, instance, **kwargs):
+    invalidate_bounty(instance.pk)
+
+@receiver(post_save, sender=Bounty)
+def refresh_search_vector(sender, instance, update_fields=None, **kwargs):
+    # Saves that leave the searchable text alone keep the current vector
+    if update_fields is not None and not SEARCH_FIELD_NAMES & set(update_fields):
+        return
+    update_search_vectors(Bounty.objects.filter(pk=instance.pk))
+
+@receiver([post_save, post_delete], sender=Milestone)
+@receiver([post_save, post_delete], sender=Donation)
+@receiver([post_save, post_delete], sender=BountyDocument)
+@receiver([post_save, post_delete], sender=Review)
+def invalidate_parent_bounty(sender, instance, **kwargs):
+    invalidate_bounty(instance.bounty_id)
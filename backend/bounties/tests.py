@@ -0,0 +1,266 @@
+from decimal import Decimal
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from blockchain.models import ChainJob
+from users.models import User
+from .models import Bounty, Donation, Milestone
+from .services import add_milestone, release_milestone, remove_milestone
+
+def make_user(email, role=User.Role.NGO):
+    return User.objects.create_user(username=email, email=email, password='unused-password', role=role)
+
+def make_bounty(creator, **fields):
+    defaults = {'title': 'Land rights case', 'description': 'Representation', 'reward': Decimal('1000')}
+    defaults.update(fields)
+    return Bounty.objects.create(created_by=creator, **defaults)
+
+def add_milestones(bounty, count):
+    return [
+        add_milestone(bounty, title=f'Milestone {i}', description='Work', amount=Decimal('100'))
+        for i in range(count)
+    ]
+
+class MilestonePositionTests(TestCase):
+    def setUp(self):
+        self.bounty = make_bounty(make_user('ngo@example.com'))
+    
+    def test_positions_follow_insertion_order(self):
+        milestones = add_milestones(self.bounty, 3)
+        
+        self.assertEqual([milestone.position for milestone in milestones], [0, 1, 2])
+        self.bounty.refresh_from_db()
+        self.assertEqual(self.bounty.milestone_count, 3)
+    
+    def test_add_after_remove_does_not_reuse_a_position(self):
+        first, second, third = add_milestones(self.bounty, 3)
+        remove_milestone(second)
+        
+        added = add_milestone(self.bounty, title='Appeal', description='Work', amount=Decimal('100'))
+        
+        self.assertEqual(added.position, 3)
+        self.assertEqual(
+            list(Milestone.objects.filter(bounty=self.bounty).values_list('position', flat=True)),
+            [0, 2, 3]
+        )
+        self.bounty.refresh_from_db()
+        self.assertEqual(self.bounty.milestone_count, 3)
+
+class MilestoneRemovalTests(TestCase):
+    """Removing a milestone moves the bounty on as a release would."""
+    def setUp(self):
+        self.bounty = make_bounty(make_user('ngo@example.com'))
+        self.first, self.second, self.third = add_milestones(self.bounty, 3)
+        release_milestone(self.first, 'Approved', '0.0.2@1700000000.000000001')
+        self.second.refresh_from_db()
+    
+    def test_removing_the_last_unreleased_milestone_completes_the_bounty(self):
+        self.assertFalse(remove_milestone(self.third))
+        self.assertTrue(remove_milestone(self.second))
+        
+        self.bounty.refresh_from_db()
+        self.assertEqual(self.bounty.status, Bounty.Status.COMPLETED)
+        self.assertEqual((self.bounty.milestone_count, self.bounty.released_milestone_count), (1, 1))
+    
+    def test_removing_the_milestone_in_progress_starts_the_next(self):
+        self.assertEqual(self.second.status, Milestone.Status.IN_PROGRESS)
+        
+        remove_milestone(self.second)
+        
+        self.third.refresh_from_db()
+        self.assertEqual(self.third.status, Milestone.Status.IN_PROGRESS)
+
+class MilestoneReleaseQueryTests(TestCase):
+    """Releasing a milestone costs the same queries however many the bounty has."""
+    def _release_first(self, count):
+        bounty = make_bounty(make_user(f'ngo{count}@example.com'))
+        milestones = add_milestones(bounty, count)
+        with CaptureQueriesContext(connection) as context:
+            completed = release_milestone(milestones[0], 'Approved', '0.0.2@1700000000.000000001')
+        return completed, len(context.captured_queries)
+    
+    def test_release_is_constant_in_milestone_count(self):
+        few = self._release_first(2)
+        many = self._release_first(25)
+        
+        self.assertEqual(few, (False, 4))
+        self.assertEqual(many, few)
+    
+    def test_release_advances_the_next_milestone(self):
+        bounty = make_bounty(make_user('ngo@example.com'))
+        first, second, third = add_milestones(bounty, 3)
+        
+        release_milestone(first, 'Approved', '0.0.2@1700000000.000000001')
+        
+        second.refresh_from_db()
+        third.refresh_from_db()
+        self.assertEqual(second.status, Milestone.Status.IN_PROGRESS)
+        self.assertNotEqual(third.status, Milestone.Status.IN_PROGRESS)
+    
+    def test_last_release_completes_in_fewer_queries(self):
+        bounty = make_bounty(make_user('ngo@example.com'))
+        milestone, = add_milestones(bounty, 1)
+        
+        with self.assertNumQueries(3):
+            completed = release_milestone(milestone, 'Approved', '0.0.2@1700000000.000000001')
+        
+        self.assertTrue(completed)
+        bounty.refresh_from_db()
+        self.assertEqual(bounty.status, Bounty.Status.COMPLETED)
+        self.assertEqual(bounty.released_milestone_count, 1)
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class BountyViewSetQueryBudgetTests(TestCase):
+    """Browse and detail pages cost a fixed number of queries, whatever the data."""
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(make_user('viewer@example.com', role=User.Role.DONOR))
+        self.creator = make_user('ngo@example.com')
+    
+    def _bounty_with_relations(self, related):
+        bounty = make_bounty(self.creator)
+        add_milestones(bounty, related)
+        for i in range(related):
+            donor = make_user(f'donor-{bounty.pk}-{i}@example.com', role=User.Role.DONOR)
+            Donation.objects.create(bounty=bounty, donor=donor, amount=Decimal('10'))
+        return bounty
+    
+    def _count(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+    
+    def test_list_is_constant_in_page_size_and_relations(self):
+        url = '/api/bounties/?expand=milestones,donations'
+        self._bounty_with_relations(1)
+        few = self._count(url)
+        
+        for _ in range(10):
+            self._bounty_with_relations(5)
+        many = self._count(url)
+        
+        self.assertEqual(many, few)
+    
+    def test_retrieve_is_constant_in_relations(self):
+        few = self._count(f'/api/bounties/{self._bounty_with_relations(1).pk}/')
+        many = self._count(f'/api/bounties/{self._bounty_with_relations(20).pk}/')
+        
+        self.assertEqual(many, few)
+    
+    def test_retrieve_budget(self):
+        bounty = self._bounty_with_relations(3)
+        
+        # The bounty with its users joined, then one query per prefetched
+        # relation: milestones, donations, documents and reviews
+        with self.assertNumQueries(5):
+            self.client.get(f'/api/bounties/{bounty.pk}/')
+    
+    def test_cached_retrieve_hits_no_tables(self):
+        bounty = self._bounty_with_relations(3)
+        self.client.get(f'/api/bounties/{bounty.pk}/')
+        
+        with self.assertNumQueries(0):
+            response = self.client.get(f'/api/bounties/{bounty.pk}/')
+        self.assertEqual(response.status_code, 200)
+    
+    def test_cached_list_reads_only_the_page_ids(self):
+        for _ in range(3):
+            self._bounty_with_relations(2)
+        url = '/api/bounties/?expand=donations'
+        self.client.get(url)
+        
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(len(response.data['results']), 3)
+    
+    def test_donation_moves_only_its_bounty(self):
+        first = self._bounty_with_relations(1)
+        second = self._bounty_with_relations(1)
+        self.client.get(f'/api/bounties/{first.pk}/')
+        self.client.get(f'/api/bounties/{second.pk}/')
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            Donation.objects.create(bounty=first, donor=self.creator, amount=Decimal('5'))
+        
+        with self.assertNumQueries(0):
+            self.client.get(f'/api/bounties/{second.pk}/')
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(f'/api/bounties/{first.pk}/')
+        self.assertTrue(context.captured_queries)
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class BountyETagTests(TestCase):
+    """Conditional GETs answer 304 only for a current representation that exists."""
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(make_user('viewer@example.com', role=User.Role.DONOR))
+        self.bounty = make_bounty(make_user('ngo@example.com'))
+        self.url = f'/api/bounties/{self.bounty.pk}/'
+    
+    def test_matching_tag_is_not_modified(self):
+        tag = self.client.get(self.url)['ETag']
+        
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=tag)
+        
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], tag)
+    
+    def test_stale_tag_gets_the_new_representation(self):
+        tag = self.client.get(self.url)['ETag']
+        self.bounty.title = 'Land rights appeal'
+        self.bounty.save()
+        
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=tag)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], tag)
+        self.assertEqual(response.data['title'], 'Land rights appeal')
+    
+    def test_wildcard_matches_an_existing_bounty(self):
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH='*')
+        
+        self.assertEqual(response.status_code, 304)
+    
+    def test_wildcard_on_a_missing_bounty_is_not_found(self):
+        response = self.client.get(f'/api/bounties/{self.bounty.pk + 1000}/', HTTP_IF_NONE_MATCH='*')
+        
+        self.assertEqual(response.status_code, 404)
+
+class BountyApprovalRetryTests(TestCase):
+    """Approving again after the escrow job failed retries it."""
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(make_user('admin@example.com', role=User.Role.ADMIN))
+        self.bounty = make_bounty(make_user('ngo@example.com'), status=Bounty.Status.PENDING)
+    
+    def _approve(self, notes=''):
+        response = self.client.post(f'/api/bounties/{self.bounty.pk}/approve/', {'notes': notes})
+        self.assertEqual(response.status_code, 202)
+        return ChainJob.objects.get(pk=response.data['id'])
+    
+    def test_repeated_approve_returns_the_queued_job(self):
+        first = self._approve()
+        second = self._approve()
+        
+        self.assertEqual(second.pk, first.pk)
+        self.assertEqual(ChainJob.objects.count(), 1)
+    
+    def test_approve_after_failure_requeues_the_job(self):
+        job = self._approve()
+        ChainJob.objects.filter(pk=job.pk).update(
+            status=ChainJob.Status.FAILED, attempts=job.max_attempts, error_message='node unavailable'
+        )
+        
+        retried = self._approve(notes='second try')
+        
+        self.assertEqual(retried.pk, job.pk)
+        self.assertEqual(retried.status, ChainJob.Status.QUEUED)
+        self.assertEqual(retried.attempts, 0)
+        self.assertIsNone(retried.error_message)
+        self.assertEqual(retried.payload['notes'], 'second try')
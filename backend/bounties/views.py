@@ -1,23 +1,117 @@
+from decimal import Decimal, InvalidOperation
+from django.db.models import Prefetch
 from rest_framework import viewsets, permissions, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from .models import Bounty, Milestone, Donation, BountyDocument, Review
+from .cache import (
+    bounty_version, page_version, signing_epoch, representation_key, etag, not_modified,
+    matches_any, cached_representation
+)
+from .search import filter_bounties, rank_bounties, facet_counts
+from .services import record_donation, remove_milestone, with_pending_funding
 from .serializers import (
-    BountySerializer, BountyCreateSerializer, MilestoneSerializer,
+    BOUNTY_RELATIONS, parse_field_list,
+    BountySerializer, BountyListSerializer, BountyCreateSerializer, MilestoneSerializer,
     DonationSerializer, BountyDocumentSerializer, ReviewSerializer
 )
 from users.permissions import IsAdminUser, IsOwnerOrAdmin
-from blockchain.services import HederaService
-from payments.models import Payment, Escrow, Token, TokenTransaction
+from blockchain.outbox import enqueue
+from blockchain.serializers import ChainJobSerializer
+from haki.pagination import KeysetPagination, SearchPagination
+from uploads.services import UploadError, attach_blob, completed_blob
+
+
+# How to load each nested relation of a bounty. Only the relations that the
+# response will actually render are joined or prefetched; every nested
+# serializer that reaches a user goes through select_related, so a page
+# costs one query per relation regardless of how many donations or reviews
+# the bounties have.
+BOUNTY_RELATION_LOADERS = {
+    'ngo': {'select_related': 'ngo'},
+    'lawyer': {'select_related': 'lawyer__user'},
+    'milestones': {'prefetch_related': lambda: Prefetch(
+        'milestones', queryset=Milestone.objects.order_by('position', 'id'))},
+    'donations': {'prefetch_related': lambda: Prefetch(
+        'donations', queryset=Donation.objects.select_related('donor').order_by('-created_at'))},
+    'documents': {'prefetch_related': lambda: Prefetch(
+        'documents', queryset=BountyDocument.objects.order_by('-uploaded_at'))},
+    'reviews': {'prefetch_related': lambda: Prefetch(
+        'reviews', queryset=Review.objects.select_related('reviewer').order_by('-created_at'))},
+}
+
+# Columns no representation renders.
+BOUNTY_DEFERRED_FIELDS = ('search_vector',)
+
+# Large text columns that the compact list representation never renders.
+BOUNTY_LIST_DEFERRED_FIELDS = BOUNTY_DEFERRED_FIELDS + ('long_description', 'admin_notes')
+
+# Actions rendered with the compact list representation.
+BOUNTY_LIST_ACTIONS = ('list', 'search')
+
+# Mutating actions are left unplanned on purpose: they change related rows
+# after get_object(), and a prefetch cache taken before the change would be
+# serialized stale.
+BOUNTY_PLANNED_ACTIONS = BOUNTY_LIST_ACTIONS + ('retrieve',)
 
 class BountyViewSet(viewsets.ModelViewSet):
     queryset = Bounty.objects.all()
     serializer_class = BountySerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action not in BOUNTY_PLANNED_ACTIONS:
+            return queryset
+        
+        select_related = []
+        prefetch_related = []
+        for name in self.get_rendered_relations():
+            loader = BOUNTY_RELATION_LOADERS[name]
+            if 'select_related' in loader:
+                select_related.append(loader['select_related'])
+            else:
+                prefetch_related.append(loader['prefetch_related']())
+        
+        selected = self.get_selected_fields()
+        if self.action in BOUNTY_LIST_ACTIONS:
+            deferred = set(BOUNTY_LIST_DEFERRED_FIELDS)
+            if selected and 'description' not in selected:
+                deferred.add('description')
+            queryset = queryset.defer(*deferred)
+        else:
+            queryset = queryset.defer(*BOUNTY_DEFERRED_FIELDS)
+        
+        # Sharded bounties render funding from their shard rows as well
+        if not selected or 'current_funding' in selected:
+            queryset = with_pending_funding(queryset)
+        
+        return queryset.select_related(*select_related).prefetch_related(*prefetch_related)
+    
+    def get_selected_fields(self):
+        return parse_field_list(self.request.query_params.get('fields'))
+    
+    def get_expanded_relations(self):
+        return parse_field_list(self.request.query_params.get('expand')) & set(BOUNTY_RELATIONS)
+    
+    def get_rendered_relations(self):
+        """Nested relations the response will render for the current action."""
+        if self.action in BOUNTY_LIST_ACTIONS:
+            relations = self.get_expanded_relations()
+        else:
+            relations = set(BOUNTY_RELATIONS)
+        
+        selected = self.get_selected_fields()
+        if selected:
+            relations &= selected | self.get_expanded_relations()
+        return relations
     
     def get_serializer_class(self):
         if self.action == 'create':
             return BountyCreateSerializer
+        if self.action in BOUNTY_LIST_ACTIONS:
+            return BountyListSerializer
         return BountySerializer
     
     def get_permissions(self):
@@ -30,8 +124,80 @@ class BountyViewSet(viewsets.ModelViewSet):
     def get_serializer_context(self):
         context = super().get_serializer_context()
         context.update({"request": self.request})
+        if self.action in BOUNTY_PLANNED_ACTIONS:
+            context.update({
+                'fields': self.get_selected_fields(),
+                'expand': self.get_expanded_relations(),
+            })
         return context
     
+    def cached_response(self, request, scope, version, build):
+        """Serve a cached representation, or 304 when the client's copy is current."""
+        # Every nested relation renders a user, whose profile image is a
+        # signed URL
+        signed = bool(self.get_rendered_relations())
+        key = representation_key(scope, version, request.query_params, signing_epoch() if signed else None)
+        
+        tag = etag(key)
+        if not_modified(request, tag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': tag})
+        
+        # Resolving the representation raises 404 for a missing bounty before
+        # a wildcard If-None-Match is honoured
+        data = cached_representation(key, build, signed=signed)
+        if matches_any(request):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': tag})
+        return Response(data, headers={'ETag': tag})
+    
+    def list(self, request, *args, **kwargs):
+        # Only the ids and positions of the page are read up front; the page
+        # is keyed by their versions and loaded in full on a miss
+        ordering = [field.lstrip('-') for field in self.paginator.ordering]
+        page = self.paginate_queryset(self.filter_queryset(super().get_queryset()).only(*ordering))
+        ids = [bounty.pk for bounty in page]
+        
+        # Pagination links are absolute, so pages are cached per host
+        scope = f'list:{request.get_host()}'
+        numbered = self.paginator.page_number_pagination
+        if numbered is not None:
+            scope = f'{scope}:{numbered.page.paginator.count}'
+        
+        def build():
+            bounties = self.filter_queryset(self.get_queryset()).in_bulk(ids)
+            page = [bounties[pk] for pk in ids if pk in bounties]
+            return self.get_paginated_response(self.get_serializer(page, many=True).data).data
+        
+        return self.cached_response(request, scope, page_version(ids), build)
+    
+    def retrieve(self, request, *args, **kwargs):
+        bounty_id = kwargs[self.lookup_url_kwarg or self.lookup_field]
+        scope = f'{bounty_id}:{request.get_host()}'
+        
+        def build():
+            return self.get_serializer(self.get_object()).data
+        
+        return self.cached_response(request, scope, bounty_version(bounty_id), build)
+    
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        params = request.query_params
+        text = params.get('q', '').strip()
+        filters = {
+            'text': text,
+            'category': params.get('category'),
+            'location': params.get('location'),
+            'status': params.get('status'),
+            'tags': sorted(parse_field_list(params.get('tags'))),
+        }
+        
+        queryset = rank_bounties(filter_bounties(self.get_queryset(), **filters), text)
+        paginator = SearchPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        
+        response = paginator.get_paginated_response(self.get_serializer(page, many=True).data)
+        response.data['facets'] = facet_counts(filter_bounties(Bounty.objects.all(), **filters))
+        return response
+    
     @action(detail=True, methods=['post'])
     def approve(self, request, pk=None):
         bounty = self.get_object()
@@ -40,37 +206,15 @@ class BountyViewSet(viewsets.ModelViewSet):
         if bounty.status != Bounty.Status.PENDING:
             return Response({'error': 'Only pending bounties can be approved'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Create escrow contract on Hedera
-        try:
-            hedera_service = HederaService()
-            
-            # Extract milestone data
-            milestones = [
-                {
-                    'id': str(milestone.id),
-                    'amount': float(milestone.amount),
-                    'description': milestone.description
-                }
-                for milestone in bounty.milestones.all()
-            ]
-            
-            # Create escrow contract
-            contract_id = hedera_service.create_escrow(
-                bounty_id=str(bounty.id),
-                ngo_id=str(bounty.ngo.id),
-                total_amount=float(bounty.funding_goal),
-                milestones=milestones
-            )
-            
-            # Update bounty with contract ID
-            bounty.contract_id = contract_id
-            bounty.status = Bounty.Status.ACTIVE
-            bounty.admin_notes = notes
-            bounty.save()
-            
-            return Response(BountySerializer(bounty).data)
-        except Exception as e:
-            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        # Escrow creation runs in the chain worker; poll the job for the result
+        job = enqueue(
+            'create_escrow',
+            {'bounty_id': bounty.id, 'notes': notes},
+            idempotency_key=f'bounty-escrow:{bounty.id}',
+            user=request.user
+        )
+        
+        return Response(ChainJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
     
     @action(detail=True, methods=['post'])
     def reject(self, request, pk=None):
@@ -82,7 +226,7 @@ class BountyViewSet(viewsets.ModelViewSet):
         
         bounty.status = Bounty.Status.REJECTED
         bounty.admin_notes = notes
-        bounty.save()
+        bounty.save(update_fields=['status', 'admin_notes', 'updated_at'])
         
         return Response(BountySerializer(bounty).data)
     
@@ -107,7 +251,7 @@ class BountyViewSet(viewsets.ModelViewSet):
         # Update bounty status
         bounty.lawyer = user.lawyer_profile
         bounty.status = Bounty.Status.CLAIMED
-        bounty.save()
+        bounty.save(update_fields=['lawyer', 'status', 'updated_at'])
         
         # Update first milestone to in-progress
         first_milestone = bounty.milestones.first()
@@ -127,39 +271,40 @@ class BountyViewSet(viewsets.ModelViewSet):
             return Response({'error': 'Amount is required'}, status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            amount = float(amount)
-        except ValueError:
+            amount = Decimal(str(amount))
+        except InvalidOperation:
+            return Response({'error': 'Invalid amount'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if not amount.is_finite():
             return Response({'error': 'Invalid amount'}, status=status.HTTP_400_BAD_REQUEST)
         
         if amount <= 0:
             return Response({'error': 'Amount must be positive'}, status=status.HTTP_400_BAD_REQUEST)
         
+        if amount != amount.quantize(Decimal('0.01')):
+            return Response({'error': 'Amount cannot have more than 2 decimal places'}, status=status.HTTP_400_BAD_REQUEST)
+        
         if bounty.status not in [Bounty.Status.ACTIVE, Bounty.Status.CLAIMED]:
             return Response({'error': 'Can only donate to active or claimed bounties'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Create donation
-        donation = Donation.objects.create(
-            bounty=bounty,
-            donor=user,
-            amount=amount
-        )
-        
-        # Update bounty funding
-        bounty.current_funding += amount
-        bounty.save()
-        
-        # Update donor profile
-        if hasattr(user, 'donor_profile'):
-            user.donor_profile.total_donated += amount
-            user.donor_profile.save()
+        donation = record_donation(bounty, user, amount)
         
         return Response(DonationSerializer(donation).data)
 
 class MilestoneViewSet(viewsets.ModelViewSet):
-    queryset = Milestone.objects.all()
+    queryset = Milestone.objects.select_related('bounty__ngo', 'bounty__lawyer__user')
     serializer_class = MilestoneSerializer
     permission_classes = [permissions.IsAuthenticated]
     
+    def perform_destroy(self, instance):
+        if remove_milestone(instance):
+            # The remaining milestones were all released: reward as on a final release
+            enqueue(
+                'reward_lawyer',
+                {'bounty_id': instance.bounty_id},
+                idempotency_key=f'bounty-reward:{instance.bounty_id}'
+            )
+    
     @action(detail=True, methods=['post'])
     def complete(self, request, pk=None):
         milestone = self.get_object()
@@ -181,6 +326,12 @@ class MilestoneViewSet(viewsets.ModelViewSet):
         
         if evidence:
             milestone.evidence = evidence
+        elif request.data.get('evidence_upload'):
+            # Evidence sent earlier through a resumable upload session
+            try:
+                attach_blob(milestone, completed_blob(request.data['evidence_upload'], user), field='evidence')
+            except UploadError as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
         milestone.save()
         
@@ -200,78 +351,12 @@ class MilestoneViewSet(viewsets.ModelViewSet):
         if milestone.status != Milestone.Status.COMPLETED:
             return Response({'error': 'Only completed milestones can be approved'}, status=status.HTTP_400_BAD_REQUEST)
         
-        try:
-            # Release payment on Hedera
-            hedera_service = HederaService()
-            
-            transaction_id = hedera_service.release_milestone_payment(
-                contract_id=bounty.contract_id,
-                milestone_id=str(milestone.id),
-                lawyer_id=str(bounty.lawyer.user.id)
-            )
-            
-            # Create payment record
-            payment = Payment.objects.create(
-                bounty=bounty,
-                milestone=milestone,
-                sender=user,
-                receiver=bounty.lawyer.user,
-                amount=milestone.amount,
-                payment_type=Payment.Type.MILESTONE,
-                status=Payment.Status.COMPLETED,
-                transaction_id=transaction_id
-            )
-            
-            # Update milestone status
-            milestone.status = Milestone.Status.RELEASED
-            milestone.approval_notes = notes
-            milestone.transaction_id = transaction_id
-            milestone.save()
-            
-            # Check if all milestones are released
-            all_released = True
-            next_milestone = None
-            
-            for i, m in enumerate(bounty.milestones.all()):
-                if m.id == milestone.id and i + 1 < bounty.milestones.count():
-                    next_milestone = bounty.milestones.all()[i + 1]
-                
-                if m.status != Milestone.Status.RELEASED:
-                    all_released = False
-            
-            # If all milestones are released, mark bounty as completed
-            if all_released:
-                bounty.status = Bounty.Status.COMPLETED
-                bounty.save()
-                
-                # Mint HAKI tokens as reward to the lawyer
-                token_amount = float(bounty.funding_goal) * 0.05  # 5% of funding goal as reward
-                token_tx_id = hedera_service.mint_tokens(
-                    recipient_id=str(bounty.lawyer.user.id),
-                    amount=token_amount,
-                    reason=f"Completed bounty: {bounty.title}"
-                )
-                
-                # Create or update token balance
-                token, created = Token.objects.get_or_create(user=bounty.lawyer.user)
-                token.balance += token_amount
-                token.save()
-                
-                # Create token transaction record
-                TokenTransaction.objects.create(
-                    token=token,
-                    amount=token_amount,
-                    transaction_type=TokenTransaction.Type.REWARD,
-                    receiver=bounty.lawyer.user,
-                    bounty=bounty
-                )
-                
-            elif next_milestone:
-                # Set next milestone to in-progress
-                next_milestone.status = Milestone.Status.IN_PROGRESS
-                next_milestone.save()
-            
-            return Response(MilestoneSerializer(milestone).data)
-        except Exception as e:
-            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
+        # The release runs in the chain worker; poll the job for the result
+        job = enqueue(
+            'release_milestone_payment',
+            {'milestone_id': milestone.id, 'approved_by': user.id, 'notes': notes},
+            idempotency_key=f'milestone-release:{milestone.id}',
+            user=user
+        )
+        
+        return Response(ChainJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
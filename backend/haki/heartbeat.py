@@ -0,0 +1,47 @@
+import logging
+import threading
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+
+class Heartbeat:
+    """
+    Call ``beat`` every ``interval`` seconds while a block of work runs.
+    
+    Long-running jobs refresh their lock or ``updated_at`` with it, so a job
+    is only taken over as stale when its worker has actually stopped, not
+    because one step outlasted the stale timeout. The beat runs on its own
+    thread and database connection, which is closed when the block exits.
+    
+    Usage::
+        
+        with Heartbeat(lambda: Job.objects.filter(pk=pk).update(locked_at=timezone.now()), 60):
+            run(job)
+    """
+    
+    def __init__(self, beat, interval):
+        self.beat = beat
+        self.interval = interval
+        self._stopped = threading.Event()
+        self._thread = None
+    
+    def _run(self):
+        try:
+            while not self._stopped.wait(self.interval):
+                try:
+                    self.beat()
+                except Exception as e:
+                    logger.warning("Heartbeat failed: %s", e)
+        finally:
+            connection.close()
+    
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._run, name='heartbeat', daemon=True)
+        self._thread.start()
+        return self
+    
+    def __exit__(self, *exc_info):
+        self._stopped.set()
+        self._thread.join()
+        return False
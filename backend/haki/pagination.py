@@ -0,0 +1,195 @@
+import base64
+import json
+from collections import OrderedDict
+from datetime import datetime
+from django.db import connection
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, LimitOffsetPagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset pagination over ``(created_at, id)`` for high-volume feeds.
+    
+    The cursor carries the ``(created_at, id)`` of the row it continues
+    from, and a page is the rows strictly after that tuple in
+    ``ordering``. The filter leads with a bound on ``created_at`` so the
+    page is a range scan on the matching composite index; deep pages cost
+    the same as the first one, rows sharing a timestamp are never skipped or
+    repeated, and no COUNT(*) is issued. Clients that still need numbered
+    pages can opt out by passing ``?page=``.
+    
+    A view whose rows come from several indexes (an OR over columns) can
+    define ``get_keyset_branches()`` returning disjoint querysets. Each
+    branch is paged on its own index with ORDER BY/LIMIT, the pages are
+    combined with UNION ALL, and only the winning rows are loaded from the
+    view's queryset.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    page_number_query_param = 'page'
+    invalid_cursor_message = 'Invalid cursor'
+    
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_number_pagination = None
+        if self.page_number_query_param in request.query_params:
+            self.page_number_pagination = PageNumberPagination()
+            return self.page_number_pagination.paginate_queryset(
+                queryset.order_by(*self.ordering), request, view
+            )
+        
+        self.page_size = self.get_page_size(request)
+        position, self.reverse = self.decode_cursor(request)
+        
+        rows = self.get_rows(queryset, position, self.page_size + 1, view)
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if self.reverse:
+            rows.reverse()
+        
+        # Walking backwards, the rows past the page are the ones before it
+        self.has_next = has_more if not self.reverse else position is not None
+        self.has_previous = has_more if self.reverse else position is not None
+        self.first_position = self._position(rows[0]) if rows else position
+        self.last_position = self._position(rows[-1]) if rows else position
+        return rows
+    
+    def get_rows(self, queryset, position, limit, view=None):
+        """Up to ``limit`` rows after ``position``, in walking order."""
+        ordering = self._ordering()
+        get_branches = getattr(view, 'get_keyset_branches', None)
+        if get_branches is not None and connection.features.supports_slicing_ordering_in_compound:
+            return self._branch_rows(queryset, get_branches(), position, limit)
+        
+        if position is not None:
+            queryset = queryset.filter(self._after(position))
+        return list(queryset.order_by(*ordering)[:limit])
+    
+    def _branch_rows(self, queryset, branches, position, limit):
+        ordering = self._ordering()
+        fields = [field.lstrip('-') for field in ordering]
+        
+        pages = []
+        for branch in branches:
+            if position is not None:
+                branch = branch.filter(self._after(position))
+            pages.append(branch.order_by(*ordering).values_list(*fields)[:limit])
+        
+        keys = pages[0].union(*pages[1:], all=True).order_by(*ordering)[:limit]
+        ids = [pk for _, pk in keys]
+        rows = queryset.in_bulk(ids)
+        return [rows[pk] for pk in ids if pk in rows]
+    
+    def _ordering(self):
+        if not self.reverse:
+            return self.ordering
+        return tuple(field[1:] if field.startswith('-') else f'-{field}' for field in self.ordering)
+    
+    def _after(self, position):
+        (primary, tiebreak), (value, last) = self._ordering(), position
+        primary_field, tiebreak_field = primary.lstrip('-'), tiebreak.lstrip('-')
+        primary_op = 'lt' if primary.startswith('-') else 'gt'
+        tiebreak_op = 'lt' if tiebreak.startswith('-') else 'gt'
+        
+        # (primary, tiebreak) beyond (value, last), with a plain range on
+        # the leading column for the index to seek on
+        return Q(**{f'{primary_field}__{primary_op}e': value}) & (
+            Q(**{f'{primary_field}__{primary_op}': value}) | Q(**{f'{tiebreak_field}__{tiebreak_op}': last})
+        )
+    
+    def _position(self, row):
+        fields = [field.lstrip('-') for field in self.ordering]
+        if isinstance(row, dict):
+            return row[fields[0]], row[fields[1]]
+        return getattr(row, fields[0]), getattr(row, fields[1])
+    
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                size = int(request.query_params[self.page_size_query_param])
+                if size > 0:
+                    return min(size, self.max_page_size)
+            except (KeyError, ValueError):
+                pass
+        return self.page_size
+    
+    def decode_cursor(self, request):
+        """The ``(position, reverse)`` a request's cursor points at; no cursor is the first page."""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            data = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+            position = (datetime.fromisoformat(data['c']), int(data['i']))
+            return position, bool(data.get('r'))
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+    
+    def encode_cursor(self, position, reverse):
+        value, last = position
+        data = {'c': value.isoformat(), 'i': last}
+        if reverse:
+            data['r'] = 1
+        encoded = base64.urlsafe_b64encode(json.dumps(data, separators=(',', ':')).encode()).decode()
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, encoded)
+    
+    def get_next_link(self):
+        if not self.has_next or self.last_position is None:
+            return None
+        return self.encode_cursor(self.last_position, reverse=False)
+    
+    def get_previous_link(self):
+        if not self.has_previous or self.first_position is None:
+            return None
+        return self.encode_cursor(self.first_position, reverse=True)
+    
+    def get_paginated_response(self, data):
+        if self.page_number_pagination is not None:
+            return self.page_number_pagination.get_paginated_response(data)
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+
+class SearchPagination(LimitOffsetPagination):
+    """
+    Limit/offset pagination that never counts the result set.
+
+    Relevance-ordered results cannot be paged with a keyset, and a COUNT(*)
+    over every match would cost more than the page itself, so one extra row
+    is fetched to tell whether there is a next page.
+    """
+    default_limit = 20
+    max_limit = 100
+    
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.limit = self.get_limit(request)
+        self.offset = self.get_offset(request)
+        rows = list(queryset[self.offset:self.offset + self.limit + 1])
+        self.has_next = len(rows) > self.limit
+        return rows[:self.limit]
+    
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.limit_query_param, self.limit)
+        return replace_query_param(url, self.offset_query_param, self.offset + self.limit)
+    
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
@@ -25,6 +25,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     
     # Third-party apps
     'rest_framework',
@@ -37,6 +38,8 @@ INSTALLED_APPS = [
     'bounties',
     'payments',
     'blockchain',
+    'ai',
+    'uploads',
 ]
 
 MIDDLEWARE = [
@@ -82,6 +85,30 @@ DATABASES = {
     }
 }
 
+# Cache
+# Redis in production; per-process memory otherwise (development and tests)
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'haki',
+        }
+    }
+
+# Seconds a serialized bounty representation stays cached; versions make
+# invalidation immediate, this only bounds memory
+BOUNTY_CACHE_TIMEOUT = int(os.getenv('BOUNTY_CACHE_TIMEOUT', '3600'))
+
+# Text search configuration used for Bounty.search_vector and queries
+BOUNTY_SEARCH_CONFIG = os.getenv('BOUNTY_SEARCH_CONFIG', 'english')
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -116,15 +143,25 @@ if os.getenv('AWS_ACCESS_KEY_ID'):
     AWS_SECRET_ACCESS_KEY = os.getenv('AWS_SECRET_ACCESS_KEY')
     AWS_STORAGE_BUCKET_NAME = os.getenv('AWS_STORAGE_BUCKET_NAME')
     AWS_S3_REGION_NAME = os.getenv('AWS_S3_REGION_NAME', 'us-east-1')
+    # Set to an S3-compatible stand-in such as MinIO for local testing
+    AWS_S3_ENDPOINT_URL = os.getenv('AWS_S3_ENDPOINT_URL')
+    AWS_S3_ADDRESSING_STYLE = os.getenv('AWS_S3_ADDRESSING_STYLE')  # 'path' for most stand-ins
     AWS_DEFAULT_ACL = 'private'
-    AWS_S3_CUSTOM_DOMAIN = f'{AWS_STORAGE_BUCKET_NAME}.s3.amazonaws.com'
+    # Objects are private, so file URLs are presigned and expire; a custom
+    # domain would produce unsigned URLs
+    AWS_S3_CUSTOM_DOMAIN = os.getenv('AWS_S3_CUSTOM_DOMAIN')
+    AWS_QUERYSTRING_AUTH = True
+    AWS_QUERYSTRING_EXPIRE = int(os.getenv('AWS_QUERYSTRING_EXPIRE', 300))  # seconds
     AWS_S3_OBJECT_PARAMETERS = {
         'CacheControl': 'max-age=86400',
     }
+    # Clients upload straight to the bucket through presigned URLs
+    UPLOAD_DIRECT = os.getenv('UPLOAD_DIRECT', 'True') == 'True'
 else:
     # Use local storage for development
     MEDIA_URL = '/media/'
     MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+    UPLOAD_DIRECT = False
 
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -135,7 +172,7 @@ AUTH_USER_MODEL = 'users.User'
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -162,6 +199,26 @@ SIMPLE_JWT = {
     'USER_ID_CLAIM': 'user_id',
 }
 
+# Per-process cache of authenticated users
+AUTH_USER_CACHE_SIZE = int(os.getenv('AUTH_USER_CACHE_SIZE', 1024))
+AUTH_USER_CACHE_TTL = int(os.getenv('AUTH_USER_CACHE_TTL', 60))  # seconds
+
+# Login throttling (attempts per minute, burst) and password hashing pool
+LOGIN_IP_RATE = int(os.getenv('LOGIN_IP_RATE', 20))
+LOGIN_IP_BURST = int(os.getenv('LOGIN_IP_BURST', 10))
+LOGIN_ACCOUNT_RATE = int(os.getenv('LOGIN_ACCOUNT_RATE', 5))  # failed attempts
+LOGIN_ACCOUNT_BURST = int(os.getenv('LOGIN_ACCOUNT_BURST', 5))
+LOGIN_HASH_WORKERS = int(os.getenv('LOGIN_HASH_WORKERS', 4))
+LOGIN_HASH_MAX_PENDING = int(os.getenv('LOGIN_HASH_MAX_PENDING', 16))
+LOGIN_HASH_TIMEOUT = float(os.getenv('LOGIN_HASH_TIMEOUT', 5))  # seconds
+LOGIN_TRUST_X_FORWARDED_FOR = os.getenv('LOGIN_TRUST_X_FORWARDED_FOR', 'False') == 'True'
+
+# Bulk user import
+USER_IMPORT_BATCH_SIZE = int(os.getenv('USER_IMPORT_BATCH_SIZE', 500))
+USER_IMPORT_HASH_WORKERS = int(os.getenv('USER_IMPORT_HASH_WORKERS', os.cpu_count() or 2))
+USER_IMPORT_JOB_WORKERS = int(os.getenv('USER_IMPORT_JOB_WORKERS', 1))  # imports running at once per process
+USER_IMPORT_HEARTBEAT_INTERVAL = int(os.getenv('USER_IMPORT_HEARTBEAT_INTERVAL', 30))  # seconds
+
 # CORS settings
 CORS_ALLOWED_ORIGINS = os.getenv('CORS_ALLOWED_ORIGINS', 'http://localhost:3000,http://localhost:5173').split(',')
 CORS_ALLOW_CREDENTIALS = True
@@ -182,4 +239,56 @@ HEDERA_OPERATOR_KEY = os.getenv('HEDERA_OPERATOR_KEY')
 HEDERA_ESCROW_CONTRACT_ID = os.getenv('HEDERA_ESCROW_CONTRACT_ID')
 HEDERA_TOKEN_ID = os.getenv('HEDERA_TOKEN_ID')
 HEDERA_REPUTATION_CONTRACT_ID = os.getenv('HEDERA_REPUTATION_CONTRACT_ID')
+HEDERA_MIRROR_NODE_URL = os.getenv('HEDERA_MIRROR_NODE_URL', f'https://{HEDERA_NETWORK}.mirrornode.hedera.com')
+HAKI_BOUNTY_CONTRACT_ID = os.getenv('HAKI_BOUNTY_CONTRACT_ID')
+HAKI_MARKETPLACE_CONTRACT_ID = os.getenv('HAKI_MARKETPLACE_CONTRACT_ID')
+HAKI_TOKEN_DECIMALS = int(os.getenv('HAKI_TOKEN_DECIMALS', 18))
+BALANCE_SOURCE_CLASS = os.getenv('BALANCE_SOURCE_CLASS', 'blockchain.reconciliation.MirrorNodeBalanceSource')
+LOCAL_BALANCES_PATH = os.getenv('LOCAL_BALANCES_PATH')
+HEDERA_SERVICE_CLASS = os.getenv('HEDERA_SERVICE_CLASS', 'blockchain.services.HederaService')
+HEDERA_CLIENT_POOL_SIZE = int(os.getenv('HEDERA_CLIENT_POOL_SIZE', 4))
+HEDERA_CLIENT_ACQUIRE_TIMEOUT = int(os.getenv('HEDERA_CLIENT_ACQUIRE_TIMEOUT', 30))  # seconds
+HEDERA_CONTRACT_GAS = int(os.getenv('HEDERA_CONTRACT_GAS', 300000))
+HEDERA_MAX_TRANSFERS_PER_TX = int(os.getenv('HEDERA_MAX_TRANSFERS_PER_TX', 10))
+HEDERA_BATCH_CONCURRENCY = int(os.getenv('HEDERA_BATCH_CONCURRENCY', 4))
+HEDERA_RECEIPT_WORKERS = int(os.getenv('HEDERA_RECEIPT_WORKERS', 8))
+HEDERA_RECEIPT_INITIAL_DELAY = float(os.getenv('HEDERA_RECEIPT_INITIAL_DELAY', 0.5))  # seconds, doubled per poll
+HEDERA_RECEIPT_MAX_DELAY = float(os.getenv('HEDERA_RECEIPT_MAX_DELAY', 8))  # seconds
+HEDERA_RECEIPT_TIMEOUT = float(os.getenv('HEDERA_RECEIPT_TIMEOUT', 120))  # seconds
+HEDERA_RECONCILE_AFTER = int(os.getenv('HEDERA_RECONCILE_AFTER', 600))  # seconds a payout may stay submitted
+
+# Chain job queue settings
+CHAIN_JOB_MAX_ATTEMPTS = int(os.getenv('CHAIN_JOB_MAX_ATTEMPTS', 5))
+CHAIN_JOB_RETRY_DELAY = int(os.getenv('CHAIN_JOB_RETRY_DELAY', 5))  # seconds, doubled per attempt
+CHAIN_JOB_LOCK_TIMEOUT = int(os.getenv('CHAIN_JOB_LOCK_TIMEOUT', 300))  # seconds
+
+
+# AI settings
+OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
+AI_EMBEDDER_CLASS = os.getenv('AI_EMBEDDER_CLASS', 'ai.embeddings.HashingEmbedder')
+AI_EMBEDDING_MODEL = os.getenv('AI_EMBEDDING_MODEL', 'text-embedding-ada-002')
+AI_EMBEDDING_DIMENSIONS = int(os.getenv('AI_EMBEDDING_DIMENSIONS', 512))  # hashing embedder only
+AI_LAWYER_SHORTLIST_SIZE = int(os.getenv('AI_LAWYER_SHORTLIST_SIZE', 20))
+AI_ANALYSIS_CACHE_TTL = int(os.getenv('AI_ANALYSIS_CACHE_TTL', 30 * 24 * 3600))  # seconds
+AI_ANALYSIS_CACHE_MAX_ROWS = int(os.getenv('AI_ANALYSIS_CACHE_MAX_ROWS', 100000))
+AI_CHAT_MODEL = os.getenv('AI_CHAT_MODEL', 'gpt-4')
+AI_CHUNK_TOKENS = int(os.getenv('AI_CHUNK_TOKENS', 3000))  # estimated tokens per analysed chunk
+AI_ANALYSIS_WORKERS = int(os.getenv('AI_ANALYSIS_WORKERS', 4))
+AI_ANALYSIS_MAX_ITEMS = int(os.getenv('AI_ANALYSIS_MAX_ITEMS', 20))  # per list in a merged analysis
+AI_MAX_CONCURRENCY = int(os.getenv('AI_MAX_CONCURRENCY', 8))  # model calls in flight per process
+AI_REQUESTS_PER_MINUTE = int(os.getenv('AI_REQUESTS_PER_MINUTE', 200))
+AI_TOKENS_PER_MINUTE = int(os.getenv('AI_TOKENS_PER_MINUTE', 40000))
+AI_REQUEST_TIMEOUT = float(os.getenv('AI_REQUEST_TIMEOUT', 60))  # seconds
+AI_MAX_RETRIES = int(os.getenv('AI_MAX_RETRIES', 3))
+AI_RETRY_BACKOFF = float(os.getenv('AI_RETRY_BACKOFF', 1))  # seconds, doubled per retry
+AI_EMBEDDING_BATCH_SIZE = int(os.getenv('AI_EMBEDDING_BATCH_SIZE', 64))
+AI_EMBEDDING_BATCH_WAIT = float(os.getenv('AI_EMBEDDING_BATCH_WAIT', 0.01))  # seconds
+AI_JOB_WORKERS = int(os.getenv('AI_JOB_WORKERS', 2))
+AI_JOB_HEARTBEAT_INTERVAL = int(os.getenv('AI_JOB_HEARTBEAT_INTERVAL', 60))  # seconds
 
+# Resumable uploads; chunks are staged in the default storage, so any web
+# worker can take the next one
+UPLOAD_MAX_SIZE = int(os.getenv('UPLOAD_MAX_SIZE', 1024 * 1024 * 1024))  # bytes
+UPLOAD_MAX_CHUNK_SIZE = int(os.getenv('UPLOAD_MAX_CHUNK_SIZE', 8 * 1024 * 1024))  # bytes
+UPLOAD_SESSION_TTL = int(os.getenv('UPLOAD_SESSION_TTL', 24 * 3600))  # seconds
+UPLOAD_PRESIGN_EXPIRES = int(os.getenv('UPLOAD_PRESIGN_EXPIRES', 900))  # seconds a presigned PUT stays valid
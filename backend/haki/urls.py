@@ -9,6 +9,8 @@ urlpatterns = [
     path('api/bounties/', include('bounties.urls')),
     path('api/payments/', include('payments.urls')),
     path('api/blockchain/', include('blockchain.urls')),
+    path('api/ai/', include('ai.urls')),
+    path('api/uploads/', include('uploads.urls')),
 ]
 
 if settings.DEBUG:
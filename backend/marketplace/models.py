@@ -20,6 +20,7 @@ class MarketplaceItem(models.Model):
     is_active = models.BooleanField(default=True)
     is_on_chain = models.BooleanField(default=False)
     blockchain_tx_hash = models.CharField(max_length=255, null=True, blank=True)
+    blockchain_id = models.CharField(max_length=255, null=True, blank=True, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -0,0 +1,116 @@
+import time
+from datetime import timedelta
+from django.db import transaction
+from django.utils import timezone
+from blockchain.outbox import defer, register
+from blockchain.services import (
+    MIRROR_NODE_LAG, TRANSACTION_VALID_DURATION, get_hedera_service, submit_pinned, transaction_expired
+)
+from .models import Withdrawal
+from .services import reverse_withdrawal
+
+def fail_withdrawal(job):
+    """
+    Mark the withdrawal failed and return the reserved funds.
+    
+    Funds are only returned once the withdrawal's transaction provably never
+    executed. One the mirror node shows as executed moves on to PROCESSING;
+    one that may still reach consensus is retried after its id expires.
+    """
+    hedera_service = get_hedera_service()
+    with transaction.atomic():
+        withdrawal = Withdrawal.objects.select_for_update().get(pk=job.payload['withdrawal_id'])
+        if withdrawal.status != Withdrawal.Status.PENDING:
+            return
+        
+        if withdrawal.transaction_id:
+            if hedera_service.lookup_transaction(withdrawal.transaction_id) == 'SUCCESS':
+                withdrawal.status = Withdrawal.Status.PROCESSING
+                withdrawal.save(update_fields=['status', 'updated_at'])
+                return
+            if not transaction_expired(withdrawal.transaction_id):
+                valid_start = float(withdrawal.transaction_id.split('@')[1])
+                remaining = valid_start + TRANSACTION_VALID_DURATION + MIRROR_NODE_LAG - time.time()
+                defer(job, timezone.now() + timedelta(seconds=max(remaining, 0) + 1))
+                return
+        
+        withdrawal.status = Withdrawal.Status.FAILED
+        withdrawal.save(update_fields=['status', 'updated_at'])
+        reverse_withdrawal(withdrawal)
+
+def _pin_withdrawal(withdrawal, transaction_id, replace=None):
+    """
+    Record the withdrawal's transaction id before it is submitted.
+    
+    Only a PENDING withdrawal still holding ``replace`` is updated, so a
+    concurrent attempt cannot swap the id under a submitted transaction.
+    
+    Returns:
+        str: The id now recorded on the withdrawal
+    """
+    Withdrawal.objects.filter(
+        pk=withdrawal.pk, status=Withdrawal.Status.PENDING, transaction_id=replace or ''
+    ).update(transaction_id=transaction_id, updated_at=timezone.now())
+    withdrawal.refresh_from_db(fields=['transaction_id'])
+    return withdrawal.transaction_id
+
+@register('process_withdrawal', on_failure=fail_withdrawal)
+def process_withdrawal(job):
+    """
+    Submit a withdrawal under a transaction id recorded on the row first.
+    
+    A retry resubmits under the same id, which Hedera executes at most once,
+    so a crash after submission never pays a withdrawal twice.
+    """
+    withdrawal = Withdrawal.objects.get(pk=job.payload['withdrawal_id'])
+    
+    # A retry after the submission was recorded has nothing left to do
+    if withdrawal.status != Withdrawal.Status.PENDING:
+        return {'transaction_id': withdrawal.transaction_id}
+    
+    # Bank withdrawal details
+    bank_details = None
+    if withdrawal.withdrawal_type == Withdrawal.Type.BANK:
+        bank_details = {
+            'bank_name': withdrawal.bank_name,
+            'account_number': withdrawal.bank_account_number,
+            'routing_number': withdrawal.bank_routing_number
+        }
+    
+    # Crypto withdrawal details
+    crypto_details = None
+    if withdrawal.withdrawal_type == Withdrawal.Type.CRYPTO:
+        crypto_details = {
+            'address': withdrawal.crypto_address,
+            'network': withdrawal.crypto_network
+        }
+    
+    # Process withdrawal
+    hedera_service = get_hedera_service()
+    transaction_id = withdrawal.transaction_id or _pin_withdrawal(withdrawal, hedera_service.new_transaction_id())
+    
+    def renew(new_id):
+        if _pin_withdrawal(withdrawal, new_id, replace=transaction_id) != new_id:
+            raise Exception(f"Withdrawal {withdrawal.pk} was re-pinned concurrently")
+    
+    submit_pinned(
+        hedera_service,
+        transaction_id,
+        lambda transaction_id: hedera_service.process_withdrawal(
+            user_id=str(withdrawal.user_id),
+            amount=float(withdrawal.amount),
+            withdrawal_type=withdrawal.withdrawal_type,
+            bank_details=bank_details,
+            crypto_details=crypto_details,
+            transaction_id=transaction_id
+        ),
+        renew
+    )
+    
+    # Mark the withdrawal submitted
+    Withdrawal.objects.filter(pk=withdrawal.pk, status=Withdrawal.Status.PENDING).update(
+        status=Withdrawal.Status.PROCESSING, updated_at=timezone.now()
+    )
+    withdrawal.refresh_from_db(fields=['transaction_id'])
+    
+    return {'transaction_id': withdrawal.transaction_id}
@@ -1,10 +1,38 @@
 from django.db import models
+from django.db.models import Q
 from users.models import User
 from bounties.models import Bounty, Milestone
 
+class PaymentQuerySet(models.QuerySet):
+    def for_participant(self, user):
+        """
+        Payments a user sent or received, as a single query.
+        
+        Fine for lookups and counts; ordered listings should page over
+        ``participant_branches`` instead, since the planner has to merge and
+        sort the user's whole history to order this OR.
+        """
+        return self.filter(Q(sender=user) | Q(receiver=user))
+    
+    def participant_branches(self, user):
+        """
+        ``for_participant`` split into disjoint querysets, one per role.
+        
+        Each branch is served by its own ``(<side>, created_at, id)`` index,
+        so KeysetPagination can take a page from each with ORDER BY/LIMIT
+        and UNION ALL them instead of sorting the whole history.
+        """
+        return [
+            self.filter(sender=user),
+            self.filter(receiver=user).exclude(sender=user),
+        ]
+
 class Payment(models.Model):
     class Status(models.TextChoices):
         PENDING = 'pending', 'Pending'
+        SUBMITTED = 'submitted', 'Submitted'
+        # Submitted, but the outcome has to be looked up on the mirror node
+        RECONCILE = 'reconcile', 'Needs Reconciliation'
         COMPLETED = 'completed', 'Completed'
         FAILED = 'failed', 'Failed'
         REFUNDED = 'refunded', 'Refunded'
@@ -27,9 +55,29 @@ class Payment(models.Model):
     transaction_id = models.CharField(max_length=255, blank=True)
     transaction_data = models.JSONField(default=dict, blank=True)
     
+    # One payout per key; the Hedera transaction id is recorded before the
+    # submission, so a resumed payout resubmits or looks up that id
+    idempotency_key = models.CharField(max_length=255, unique=True, null=True, blank=True)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = PaymentQuerySet.as_manager()
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='payment_created_id_idx'),
+            models.Index(fields=['sender', '-created_at', '-id'], name='payment_sender_created_idx'),
+            models.Index(fields=['receiver', '-created_at', '-id'], name='payment_receiver_created_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['milestone', 'payment_type'],
+                condition=Q(milestone__isnull=False),
+                name='payment_unique_milestone_type'
+            ),
+        ]
+    
     def __str__(self):
         return f"{self.payment_type} - {self.bounty.title} - ${self.amount}"
 
@@ -56,15 +104,46 @@ class Token(models.Model):
     def __str__(self):
         return f"{self.user.email} - {self.balance} HAKI"
 
+class TokenTransactionQuerySet(models.QuerySet):
+    def for_participant(self, user):
+        """
+        Token transactions on a user's tokens or sent/received by them.
+        
+        The token ownership check is a subquery on ``Token.user`` rather than
+        a join, so the result needs no DISTINCT. Ordered listings should page
+        over ``participant_branches``.
+        """
+        return self.filter(
+            Q(sender=user)
+            | Q(receiver=user)
+            | Q(token__in=Token.objects.filter(user=user).values('pk'))
+        )
+    
+    def participant_branches(self, user):
+        """``for_participant`` split into disjoint querysets, one per ``(<column>, created_at, id)`` index."""
+        tokens = Token.objects.filter(user=user).values('pk')
+        return [
+            self.filter(sender=user),
+            self.filter(receiver=user).exclude(sender=user),
+            self.filter(token__in=tokens).exclude(sender=user).exclude(receiver=user),
+        ]
+
 class TokenTransaction(models.Model):
     class Type(models.TextChoices):
         REWARD = 'reward', 'Reward'
         TRANSFER = 'transfer', 'Transfer'
         BURN = 'burn', 'Burn'
     
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'Pending'
+        COMPLETED = 'completed', 'Completed'
+    
     token = models.ForeignKey(Token, on_delete=models.CASCADE, related_name='transactions')
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     transaction_type = models.CharField(max_length=20, choices=Type.choices)
+    # Rewards are claimed as PENDING before minting and completed afterwards
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.COMPLETED)
+    transaction_id = models.CharField(max_length=255, blank=True)
     
     sender = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='sent_token_transactions')
     receiver = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='received_token_transactions')
@@ -73,6 +152,23 @@ class TokenTransaction(models.Model):
     
     created_at = models.DateTimeField(auto_now_add=True)
     
+    objects = TokenTransactionQuerySet.as_manager()
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='token_tx_created_id_idx'),
+            models.Index(fields=['token', '-created_at', '-id'], name='token_tx_token_created_idx'),
+            models.Index(fields=['sender', '-created_at', '-id'], name='token_tx_sender_created_idx'),
+            models.Index(fields=['receiver', '-created_at', '-id'], name='token_tx_receiver_created_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['bounty'],
+                condition=Q(transaction_type='reward'),
+                name='token_tx_unique_bounty_reward'
+            ),
+        ]
+    
     def __str__(self):
         return f"{self.transaction_type} - {self.token.user.email} - {self.amount} HAKI"
 
@@ -129,3 +225,56 @@ class TokenConversion(models.Model):
     def __str__(self):
         return f"Conversion - {self.user.email} - {self.token_amount} HAKI to ${self.usd_amount}"
 
+
+class Balance(models.Model):
+    """
+    Running balance snapshot per user, kept in step with BalanceLedgerEntry.
+    
+    Rows are only changed through ``payments.services`` while holding a row
+    lock, so reading ``available`` is a single-row lookup.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='balance')
+    available = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.user.email} - ${self.available}"
+
+class BalanceLedgerEntry(models.Model):
+    class Type(models.TextChoices):
+        OPENING = 'opening', 'Opening Balance'
+        PAYMENT = 'payment', 'Payment Received'
+        WITHDRAWAL = 'withdrawal', 'Withdrawal'
+        REVERSAL = 'reversal', 'Withdrawal Reversal'
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='balance_entries')
+    entry_type = models.CharField(max_length=20, choices=Type.choices)
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    balance_after = models.DecimalField(max_digits=12, decimal_places=2)
+    
+    payment = models.ForeignKey(Payment, on_delete=models.PROTECT, null=True, blank=True, related_name='balance_entries')
+    withdrawal = models.ForeignKey(Withdrawal, on_delete=models.PROTECT, null=True, blank=True, related_name='balance_entries')
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id'], name='ledger_user_created_idx'),
+        ]
+        constraints = [
+            # A payment is credited at most once and a withdrawal is debited
+            # and reversed at most once, whatever the retry pattern.
+            models.UniqueConstraint(
+                fields=['payment', 'entry_type'],
+                condition=Q(payment__isnull=False),
+                name='ledger_unique_payment_entry',
+            ),
+            models.UniqueConstraint(
+                fields=['withdrawal', 'entry_type'],
+                condition=Q(withdrawal__isnull=False),
+                name='ledger_unique_withdrawal_entry',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.entry_type} - {self.user.email} - ${self.amount}"
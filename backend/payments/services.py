@@ -0,0 +1,118 @@
+from decimal import Decimal
+from django.db import IntegrityError, models, transaction
+from .models import Balance, BalanceLedgerEntry, Payment, Withdrawal
+
+class InsufficientBalance(Exception):
+    pass
+
+def _opening_balance(user, payment=None, withdrawal=None):
+    """
+    Balance implied by rows written before the ledger existed.
+    
+    Only used once per user, when their Balance row is first created.
+    ``payment`` and ``withdrawal`` are the rows being posted; they are left
+    out because their own ledger entry follows.
+    """
+    payments = Payment.objects.filter(receiver=user, status=Payment.Status.COMPLETED)
+    if payment is not None:
+        payments = payments.exclude(pk=payment.pk)
+    payments_total = payments.aggregate(total=models.Sum('amount'))['total'] or Decimal('0')
+    
+    withdrawals = Withdrawal.objects.filter(user=user, status__in=[
+        Withdrawal.Status.COMPLETED, Withdrawal.Status.PROCESSING, Withdrawal.Status.PENDING
+    ])
+    if withdrawal is not None:
+        withdrawals = withdrawals.exclude(pk=withdrawal.pk)
+    withdrawals_total = withdrawals.aggregate(total=models.Sum('amount'))['total'] or Decimal('0')
+    
+    return payments_total - withdrawals_total
+
+def _lock_balance(user, payment=None, withdrawal=None):
+    """
+    Return the user's Balance row locked with SELECT ... FOR UPDATE.
+    
+    Must be called inside ``transaction.atomic``. Concurrent callers for the
+    same user queue on the row lock, which is what makes debits safe.
+    ``payment`` or ``withdrawal`` is the row about to be posted, excluded
+    from the opening balance if the row has to be created.
+    """
+    balance = Balance.objects.select_for_update().filter(user=user).first()
+    if balance is not None:
+        return balance
+    
+    opening = _opening_balance(user, payment=payment, withdrawal=withdrawal)
+    try:
+        with transaction.atomic():
+            balance = Balance.objects.create(user=user, available=opening)
+            BalanceLedgerEntry.objects.create(
+                user=user,
+                entry_type=BalanceLedgerEntry.Type.OPENING,
+                amount=opening,
+                balance_after=opening
+            )
+    except IntegrityError:
+        # Another request opened the balance first; use theirs.
+        pass
+    
+    return Balance.objects.select_for_update().get(user=user)
+
+def _post_entry(user, amount, entry_type, payment=None, withdrawal=None):
+    with transaction.atomic():
+        balance = _lock_balance(user, payment=payment, withdrawal=withdrawal)
+        new_balance = balance.available + amount
+        
+        if new_balance < 0:
+            raise InsufficientBalance("Insufficient balance for withdrawal")
+        
+        entry = BalanceLedgerEntry.objects.create(
+            user=user,
+            entry_type=entry_type,
+            amount=amount,
+            balance_after=new_balance,
+            payment=payment,
+            withdrawal=withdrawal
+        )
+        
+        balance.available = new_balance
+        balance.save(update_fields=['available', 'updated_at'])
+        
+        return entry
+
+def get_available_balance(user):
+    """Current available balance, read from the snapshot row."""
+    available = Balance.objects.filter(user=user).values_list('available', flat=True).first()
+    if available is None:
+        return _opening_balance(user)
+    return available
+
+def credit_payment(payment):
+    """Credit a completed payment to its receiver."""
+    return _post_entry(
+        payment.receiver,
+        Decimal(payment.amount),
+        BalanceLedgerEntry.Type.PAYMENT,
+        payment=payment
+    )
+
+def debit_withdrawal(withdrawal):
+    """
+    Reserve funds for a withdrawal.
+    
+    Raises InsufficientBalance, leaving the ledger untouched, when the user
+    cannot cover the amount.
+    """
+    return _post_entry(
+        withdrawal.user,
+        -Decimal(withdrawal.amount),
+        BalanceLedgerEntry.Type.WITHDRAWAL,
+        withdrawal=withdrawal
+    )
+
+def reverse_withdrawal(withdrawal):
+    """Return the funds reserved by a withdrawal that failed."""
+    return _post_entry(
+        withdrawal.user,
+        Decimal(withdrawal.amount),
+        BalanceLedgerEntry.Type.REVERSAL,
+        withdrawal=withdrawal
+    )
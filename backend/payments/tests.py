@@ -0,0 +1,107 @@
+import threading
+from decimal import Decimal
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, skipUnlessDBFeature
+from bounties.models import Bounty
+from users.models import User
+from .models import Balance, BalanceLedgerEntry, Payment, Withdrawal
+from .services import InsufficientBalance, credit_payment, debit_withdrawal, get_available_balance
+
+def make_user(email):
+    return User.objects.create_user(username=email, email=email, password='unused-password')
+
+def make_payment(receiver, amount, status=Payment.Status.COMPLETED):
+    sender = make_user(f'sender-{Payment.objects.count()}@example.com')
+    bounty = Bounty.objects.create(title='Bounty', description='Bounty', reward=Decimal('1000'), created_by=sender)
+    return Payment.objects.create(
+        bounty=bounty,
+        sender=sender,
+        receiver=receiver,
+        amount=Decimal(amount),
+        payment_type=Payment.Type.MILESTONE,
+        status=status
+    )
+
+def make_withdrawal(user, amount):
+    return Withdrawal.objects.create(
+        user=user,
+        amount=Decimal(amount),
+        withdrawal_type=Withdrawal.Type.CRYPTO,
+        status=Withdrawal.Status.PENDING
+    )
+
+class FirstEntryTests(TestCase):
+    """The first posting opens the balance from existing rows, excluding itself."""
+    def setUp(self):
+        self.user = make_user('lawyer@example.com')
+    
+    def test_first_withdrawal_is_debited_once(self):
+        make_payment(self.user, '100')
+        
+        withdrawal = make_withdrawal(self.user, '60')
+        entry = debit_withdrawal(withdrawal)
+        
+        self.assertEqual(entry.balance_after, Decimal('40'))
+        self.assertEqual(get_available_balance(self.user), Decimal('40'))
+        opening = BalanceLedgerEntry.objects.get(user=self.user, entry_type=BalanceLedgerEntry.Type.OPENING)
+        self.assertEqual(opening.amount, Decimal('100'))
+    
+    def test_first_credit_is_counted_once(self):
+        payment = make_payment(self.user, '75')
+        
+        entry = credit_payment(payment)
+        
+        self.assertEqual(entry.balance_after, Decimal('75'))
+        self.assertEqual(Balance.objects.get(user=self.user).available, Decimal('75'))
+    
+    def test_overdraw_leaves_ledger_untouched(self):
+        make_payment(self.user, '50')
+        debit_withdrawal(make_withdrawal(self.user, '30'))
+        
+        with self.assertRaises(InsufficientBalance):
+            debit_withdrawal(make_withdrawal(self.user, '30'))
+        
+        self.assertEqual(get_available_balance(self.user), Decimal('20'))
+        self.assertEqual(BalanceLedgerEntry.objects.filter(
+            user=self.user, entry_type=BalanceLedgerEntry.Type.WITHDRAWAL
+        ).count(), 1)
+
+@skipUnlessDBFeature('has_select_for_update')
+class DoubleSpendTests(TransactionTestCase):
+    """Concurrent withdrawals queue on the balance row and cannot overdraw."""
+    def test_concurrent_withdrawals_cannot_overdraw(self):
+        user = make_user('lawyer@example.com')
+        # Opened up front: pending withdrawals count against an opening balance
+        Balance.objects.create(user=user, available=Decimal('100'))
+        withdrawals = [make_withdrawal(user, '60') for _ in range(4)]
+        
+        barrier = threading.Barrier(len(withdrawals))
+        results = []
+        lock = threading.Lock()
+        
+        def withdraw(withdrawal):
+            try:
+                barrier.wait()
+                try:
+                    with transaction.atomic():
+                        debit_withdrawal(withdrawal)
+                    outcome = 'debited'
+                except InsufficientBalance:
+                    outcome = 'refused'
+                with lock:
+                    results.append(outcome)
+            finally:
+                connection.close()
+        
+        threads = [threading.Thread(target=withdraw, args=(withdrawal,)) for withdrawal in withdrawals]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(sorted(results), ['debited', 'refused', 'refused', 'refused'])
+        self.assertEqual(get_available_balance(user), Decimal('40'))
+        balance_after = BalanceLedgerEntry.objects.filter(user=user).order_by('-id').values_list(
+            'balance_after', flat=True
+        ).first()
+        self.assertEqual(balance_after, Decimal('40'))
@@ -1,4 +1,5 @@
-from rest_framework import viewsets, permissions, status
+from django.db import transaction
+from rest_framework import viewsets, permissions, serializers, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from .models import Payment, Token, TokenTransaction, Withdrawal, TokenConversion
@@ -6,16 +7,23 @@ from .serializers import (
     PaymentSerializer, TokenSerializer, TokenTransactionSerializer,
     WithdrawalSerializer, TokenConversionSerializer
 )
+from .services import InsufficientBalance, debit_withdrawal
 from users.permissions import IsOwnerOrAdmin
-from blockchain.services import HederaService
+from blockchain.outbox import enqueue
+from blockchain.serializers import ChainJobSerializer
+from blockchain.services import get_hedera_service
+from haki.pagination import KeysetPagination
 
 class PaymentViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = PaymentSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
     
     def get_queryset(self):
-        user = self.request.user
-        return Payment.objects.filter(receiver=user) | Payment.objects.filter(sender=user)
+        return Payment.objects.for_participant(self.request.user)
+    
+    def get_keyset_branches(self):
+        return Payment.objects.participant_branches(self.request.user)
 
 class TokenViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = TokenSerializer
@@ -34,10 +42,13 @@ class TokenViewSet(viewsets.ReadOnlyModelViewSet):
 class TokenTransactionViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = TokenTransactionSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
     
     def get_queryset(self):
-        user = self.request.user
-        return TokenTransaction.objects.filter(token__user=user) | TokenTransaction.objects.filter(sender=user) | TokenTransaction.objects.filter(receiver=user)
+        return TokenTransaction.objects.for_participant(self.request.user)
+    
+    def get_keyset_branches(self):
+        return TokenTransaction.objects.participant_branches(self.request.user)
 
 class WithdrawalViewSet(viewsets.ModelViewSet):
     serializer_class = WithdrawalSerializer
@@ -49,62 +60,28 @@ class WithdrawalViewSet(viewsets.ModelViewSet):
     
     def perform_create(self, serializer):
         user = self.request.user
-        amount = serializer.validated_data.get('amount')
-        withdrawal_type = serializer.validated_data.get('withdrawal_type')
-        
-        # Check if user has sufficient balance
-        payments_total = Payment.objects.filter(receiver=user, status=Payment.Status.COMPLETED).aggregate(
-            total=models.Sum('amount')
-        )['total'] or 0
         
-        withdrawals_total = Withdrawal.objects.filter(user=user, status__in=[
-            Withdrawal.Status.COMPLETED, Withdrawal.Status.PROCESSING, Withdrawal.Status.PENDING
-        ]).aggregate(total=models.Sum('amount'))['total'] or 0
-        
-        available_balance = payments_total - withdrawals_total
-        
-        if amount > available_balance:
-            raise serializers.ValidationError("Insufficient balance for withdrawal")
-        
-        # Process withdrawal through Hedera
+        # Reserve the funds under the balance row lock and queue the Hedera
+        # submission in the same transaction; concurrent withdrawals for the
+        # same user are serialized here and cannot overdraw.
         try:
-            hedera_service = HederaService()
-            
-            # Bank withdrawal details
-            bank_details = None
-            if withdrawal_type == Withdrawal.Type.BANK:
-                bank_details = {
-                    'bank_name': serializer.validated_data.get('bank_name'),
-                    'account_number': serializer.validated_data.get('bank_account_number'),
-                    'routing_number': serializer.validated_data.get('bank_routing_number')
-                }
-            
-            # Crypto withdrawal details
-            crypto_details = None
-            if withdrawal_type == Withdrawal.Type.CRYPTO:
-                crypto_details = {
-                    'address': serializer.validated_data.get('crypto_address'),
-                    'network': serializer.validated_data.get('crypto_network')
-                }
-            
-            # Process withdrawal
-            transaction_id = hedera_service.process_withdrawal(
-                user_id=str(user.id),
-                amount=float(amount),
-                withdrawal_type=withdrawal_type,
-                bank_details=bank_details,
-                crypto_details=crypto_details
-            )
-            
-            # Save withdrawal with transaction ID
-            serializer.save(
-                user=user,
-                status=Withdrawal.Status.PROCESSING,
-                transaction_id=transaction_id
-            )
-            
-        except Exception as e:
+            with transaction.atomic():
+                withdrawal = serializer.save(user=user, status=Withdrawal.Status.PENDING)
+                debit_withdrawal(withdrawal)
+                self.job = enqueue(
+                    'process_withdrawal',
+                    {'withdrawal_id': withdrawal.id},
+                    idempotency_key=f'withdrawal:{withdrawal.id}',
+                    user=user
+                )
+        except InsufficientBalance as e:
             raise serializers.ValidationError(str(e))
+    
+    def create(self, request, *args, **kwargs):
+        response = super().create(request, *args, **kwargs)
+        response.status_code = status.HTTP_202_ACCEPTED
+        response.data['job'] = ChainJobSerializer(self.job).data
+        return response
 
 class TokenConversionViewSet(viewsets.ModelViewSet):
     serializer_class = TokenConversionSerializer
@@ -126,7 +103,7 @@ class TokenConversionViewSet(viewsets.ModelViewSet):
         
         # Process token conversion through Hedera
         try:
-            hedera_service = HederaService()
+            hedera_service = get_hedera_service()
             conversion_rate = 0.32  # $0.32 per HAKI token
             usd_amount = token_amount * conversion_rate
             
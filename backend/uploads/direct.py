@@ -0,0 +1,166 @@
+import base64
+import hashlib
+import posixpath
+from botocore.exceptions import ClientError
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from .models import StoredBlob, UploadSession, blob_path
+from .services import COPY_BUFFER_SIZE, UploadError, _check_open
+
+# Direct uploads go from the client to the bucket through presigned URLs.
+# The web workers only sign requests and read object metadata; S3 checks
+# the declared SHA-256 as the object is written, so the bytes never pass
+# through Django.
+
+def direct_uploads_enabled():
+    return settings.UPLOAD_DIRECT
+
+def _client():
+    return default_storage.connection.meta.client
+
+def _key(name):
+    location = default_storage.location
+    return posixpath.join(location, name) if location else name
+
+def staging_key(session):
+    return _key(f'upload-staging/{session.pk}')
+
+def presign_upload(session):
+    """
+    Sign a PUT of the whole file to the session's staging key.
+    
+    The client must send the returned headers with the request.
+    
+    Returns:
+        dict: ``url``, ``method``, ``headers`` and ``expires_in``
+    """
+    params = {'Bucket': default_storage.bucket_name, 'Key': staging_key(session)}
+    headers = {}
+    
+    if session.content_type:
+        params['ContentType'] = session.content_type
+        headers['Content-Type'] = session.content_type
+    
+    # S3 rejects the PUT unless the body matches this digest
+    checksum = base64.b64encode(bytes.fromhex(session.sha256)).decode()
+    params['ChecksumSHA256'] = checksum
+    headers['x-amz-checksum-sha256'] = checksum
+    
+    url = _client().generate_presigned_url(
+        'put_object', Params=params, ExpiresIn=settings.UPLOAD_PRESIGN_EXPIRES
+    )
+    return {'url': url, 'method': 'PUT', 'headers': headers, 'expires_in': settings.UPLOAD_PRESIGN_EXPIRES}
+
+def _stored_digest(head):
+    """The object's SHA-256 as recorded by S3, if it kept one."""
+    checksum = head.get('ChecksumSHA256')
+    # Multipart objects carry a checksum of checksums ("...-N")
+    if not checksum or '-' in checksum:
+        return None
+    return base64.b64decode(checksum).hex()
+
+def _digest_object(key):
+    # Only for stand-ins that do not keep checksums
+    body = _client().get_object(Bucket=default_storage.bucket_name, Key=key)['Body']
+    digest = hashlib.sha256()
+    for data in iter(lambda: body.read(COPY_BUFFER_SIZE), b''):
+        digest.update(data)
+    return digest.hexdigest()
+
+def _store_blob(sha256, session, key):
+    blob = StoredBlob.objects.filter(sha256=sha256).first()
+    if blob is not None:
+        return blob
+    
+    blob = StoredBlob(sha256=sha256, size=session.size, content_type=session.content_type)
+    blob.file.name = blob_path(blob, session.filename)
+    
+    # Server-side copy; large objects are copied in parts by the bucket
+    bucket = default_storage.bucket_name
+    _client().copy({'Bucket': bucket, 'Key': key}, bucket, _key(blob.file.name))
+    
+    try:
+        with transaction.atomic():
+            blob.save()
+    except IntegrityError:
+        # Another upload of the same content finished first; its copy has a
+        # different key only when the filename had another extension
+        winner = StoredBlob.objects.get(sha256=sha256)
+        if blob.file.name != winner.file.name:
+            _client().delete_object(Bucket=bucket, Key=_key(blob.file.name))
+        return winner
+    return blob
+
+def _delete_staging(session):
+    _client().delete_object(Bucket=default_storage.bucket_name, Key=staging_key(session))
+
+def complete_direct_session(session):
+    """
+    Verify a direct upload from its object metadata and store it by content hash.
+    
+    The bucket calls (metadata, digest fallback and server-side copy) run
+    before the session row is locked; the lock is only taken to publish the
+    blob. Completing twice, or concurrently, returns the same blob. A wrong
+    size or digest leaves the session open so the client can PUT again.
+    
+    Returns:
+        UploadSession: The completed session, with ``blob`` set
+    """
+    session = UploadSession.objects.get(pk=session.pk)
+    if session.status == UploadSession.Status.COMPLETE:
+        return session
+    
+    _check_open(session)
+    key = staging_key(session)
+    try:
+        head = _client().head_object(Bucket=default_storage.bucket_name, Key=key, ChecksumMode='ENABLED')
+    except ClientError:
+        raise UploadError("Upload has not been received")
+    
+    if head['ContentLength'] != session.size:
+        _delete_staging(session)
+        raise UploadError(f"Received {head['ContentLength']} of {session.size} bytes")
+    
+    sha256 = _stored_digest(head) or _digest_object(key)
+    if sha256 != session.sha256:
+        _delete_staging(session)
+        raise UploadError("Content does not match the declared SHA-256")
+    
+    blob = _store_blob(sha256, session, key)
+    
+    with transaction.atomic():
+        session = UploadSession.objects.select_for_update().get(pk=session.pk)
+        if session.status == UploadSession.Status.COMPLETE:
+            return session
+        
+        _check_open(session)
+        session.blob = blob
+        session.received_bytes = session.size
+        session.status = UploadSession.Status.COMPLETE
+        session.save(update_fields=['blob', 'received_bytes', 'status', 'updated_at'])
+    
+    _delete_staging(session)
+    return session
+
+def abort_direct_session(session):
+    UploadSession.objects.filter(pk=session.pk, status=UploadSession.Status.OPEN).update(
+        status=UploadSession.Status.ABORTED, updated_at=timezone.now()
+    )
+    _delete_staging(session)
+
+def download_url(blob, filename):
+    """
+    A time-limited URL for ``blob`` that saves as ``filename``.
+    
+    Without direct uploads this is the storage's own URL.
+    """
+    if not direct_uploads_enabled():
+        return blob.file.url
+    
+    return _client().generate_presigned_url('get_object', Params={
+        'Bucket': default_storage.bucket_name,
+        'Key': _key(blob.file.name),
+        'ResponseContentDisposition': 'attachment; filename="%s"' % filename.replace('"', ''),
+    }, ExpiresIn=settings.AWS_QUERYSTRING_EXPIRE)
@@ -0,0 +1,55 @@
+import hashlib
+import os
+import time
+import requests
+from django.core.management.base import BaseCommand, CommandError
+from uploads.direct import (
+    abort_direct_session, complete_direct_session, direct_uploads_enabled, download_url, presign_upload
+)
+from uploads.services import UploadError, open_session
+from users.models import User
+
+class Command(BaseCommand):
+    help = 'Round-trip a file through the presigned upload and download flow (e.g. against a local MinIO)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--email', required=True, help='Account that owns the test upload')
+        parser.add_argument('--size', type=int, default=5 * 1024 * 1024, help='Bytes to upload')
+    
+    def handle(self, *args, **options):
+        if not direct_uploads_enabled():
+            raise CommandError('Direct uploads are disabled; set AWS_* and UPLOAD_DIRECT')
+        
+        user = User.objects.get(email=options['email'])
+        content = os.urandom(options['size'])
+        sha256 = hashlib.sha256(content).hexdigest()
+        session = open_session(user, 'direct-upload-check.bin', len(content), 'application/octet-stream',
+                               sha256, direct=True)
+        
+        # A wrong digest must be refused by the bucket
+        upload = presign_upload(session)
+        response = requests.put(upload['url'], data=content[::-1], headers=upload['headers'], timeout=60)
+        self.stdout.write(f"Tampered PUT: HTTP {response.status_code}")
+        
+        started = time.perf_counter()
+        response = requests.put(upload['url'], data=content, headers=upload['headers'], timeout=300)
+        response.raise_for_status()
+        uploaded = time.perf_counter() - started
+        
+        started = time.perf_counter()
+        try:
+            session = complete_direct_session(session)
+        except UploadError as e:
+            abort_direct_session(session)
+            raise CommandError(f'Completion failed: {e}')
+        completed = time.perf_counter() - started
+        
+        response = requests.get(download_url(session.blob, session.filename), timeout=300)
+        response.raise_for_status()
+        if hashlib.sha256(response.content).hexdigest() != sha256:
+            raise CommandError('Downloaded content does not match')
+        
+        self.stdout.write(self.style.SUCCESS(
+            f"Uploaded {len(content)} bytes in {uploaded:.2f}s, completed in {completed * 1000:.0f}ms, "
+            f"blob {session.blob.sha256[:12]} downloaded intact"
+        ))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from uploads.direct import abort_direct_session
+from uploads.models import UploadSession
+from uploads.services import abort_session
+
+class Command(BaseCommand):
+    help = 'Abort expired upload sessions and delete their staged data'
+    
+    def handle(self, *args, **options):
+        expired = UploadSession.objects.filter(status=UploadSession.Status.OPEN, expires_at__lte=timezone.now())
+        
+        count = 0
+        for session in expired.iterator():
+            if session.direct:
+                abort_direct_session(session)
+            else:
+                abort_session(session)
+            count += 1
+        
+        self.stdout.write(self.style.SUCCESS(f"Aborted {count} expired upload sessions"))
@@ -0,0 +1,55 @@
+import os
+import uuid
+from django.db import models
+from users.models import User
+
+def blob_path(instance, filename):
+    # The extension lets storage and browsers infer the type of the file
+    extension = os.path.splitext(filename)[1].lower()
+    if not extension[1:].isalnum() or len(extension) > 16:
+        extension = ''
+    return f'blobs/{instance.sha256[:2]}/{instance.sha256}{extension}'
+
+class StoredBlob(models.Model):
+    """
+    A stored file, addressed by the SHA-256 of its content.
+    
+    Identical uploads resolve to the same blob, so each distinct document is
+    kept in storage once however many records point at it.
+    """
+    sha256 = models.CharField(max_length=64, unique=True)
+    size = models.PositiveBigIntegerField()
+    file = models.FileField(upload_to=blob_path, max_length=255)
+    content_type = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"{self.sha256} ({self.size} bytes)"
+
+class UploadSession(models.Model):
+    """A resumable upload, received in chunks and finished into a StoredBlob."""
+    class Status(models.TextChoices):
+        OPEN = 'open', 'Open'
+        COMPLETE = 'complete', 'Complete'
+        ABORTED = 'aborted', 'Aborted'
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='upload_sessions')
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=255, blank=True)
+    size = models.PositiveBigIntegerField()
+    # Optional client-computed digest, checked on completion
+    sha256 = models.CharField(max_length=64, blank=True)
+    received_bytes = models.PositiveBigIntegerField(default=0)
+    # Storage names of the received chunks, in order
+    parts = models.JSONField(default=list, blank=True)
+    # Sent straight to the bucket through a presigned URL rather than in chunks
+    direct = models.BooleanField(default=False)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.OPEN)
+    blob = models.ForeignKey(StoredBlob, on_delete=models.PROTECT, null=True, blank=True, related_name='uploads')
+    expires_at = models.DateTimeField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.filename} ({self.received_bytes}/{self.size})"
@@ -0,0 +1,18 @@
+from rest_framework import serializers
+from .models import UploadSession
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    blob_sha256 = serializers.CharField(source='blob.sha256', read_only=True, default=None)
+    
+    class Meta:
+        model = UploadSession
+        fields = ['id', 'filename', 'content_type', 'size', 'sha256', 'received_bytes',
+                  'direct', 'status', 'blob_sha256', 'expires_at', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'received_bytes', 'direct', 'status', 'blob_sha256',
+                            'expires_at', 'created_at', 'updated_at']
+    
+    def validate_sha256(self, value):
+        value = value.lower()
+        if value and (len(value) != 64 or any(c not in '0123456789abcdef' for c in value)):
+            raise serializers.ValidationError("Must be a hex SHA-256 digest")
+        return value
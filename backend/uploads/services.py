@@ -0,0 +1,278 @@
+import hashlib
+import io
+import os
+import threading
+import uuid
+from datetime import timedelta
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from .models import StoredBlob, UploadSession
+
+# Bytes read or written at a time; memory use per request stays at this
+# regardless of the file size.
+COPY_BUFFER_SIZE = 1024 * 1024
+
+class UploadError(Exception):
+    """An upload request that cannot be applied; the message is safe to return."""
+
+class UploadConflict(UploadError):
+    """A chunk was sent for an offset other than the session's current one."""
+
+class PartsReader(io.RawIOBase):
+    """Read a sequence of stored part files as one stream."""
+    def __init__(self, names):
+        self._names = list(names)
+        self._current = None
+    
+    def readable(self):
+        return True
+    
+    def readinto(self, buffer):
+        while True:
+            if self._current is None:
+                if not self._names:
+                    return 0
+                self._current = default_storage.open(self._names.pop(0), 'rb')
+            count = self._current.readinto(buffer)
+            if count:
+                return count
+            self._current.close()
+            self._current = None
+    
+    def close(self):
+        if self._current is not None:
+            self._current.close()
+            self._current = None
+        super().close()
+
+class ChunkReader(io.RawIOBase):
+    """Read at most ``length`` bytes of a request body, hashing them as they pass."""
+    def __init__(self, stream, length, digest=None):
+        self._stream = stream
+        self._remaining = length
+        self.digest = digest
+        self.read_bytes = 0
+    
+    def readable(self):
+        return True
+    
+    def readinto(self, buffer):
+        if not self._remaining:
+            return 0
+        data = self._stream.read(min(len(buffer), self._remaining, COPY_BUFFER_SIZE))
+        if not data:
+            return 0
+        
+        count = len(data)
+        buffer[:count] = data
+        self._remaining -= count
+        self.read_bytes += count
+        if self.digest is not None:
+            self.digest.update(data)
+        return count
+
+# Running SHA-256 of each session's received bytes, kept by the process that
+# received them. Hash state cannot be shared between processes, so a session
+# whose chunks went to several workers is hashed once more on completion.
+_running = {}
+_running_lock = threading.Lock()
+
+def _running_digest(session, offset):
+    """Copy of the running hash of the first ``offset`` bytes, if this process has it."""
+    with _running_lock:
+        entry = _running.get(session.pk)
+        if entry is None and offset == 0:
+            return hashlib.sha256()
+        if entry is None or entry[0] != offset:
+            return None
+        return entry[1].copy()
+
+def _remember_digest(session, offset, digest):
+    now = timezone.now()
+    with _running_lock:
+        for session_id in [key for key, entry in _running.items() if entry[2] <= now]:
+            del _running[session_id]
+        _running[session.pk] = (offset, digest, session.expires_at)
+
+def _forget_digest(session):
+    with _running_lock:
+        _running.pop(session.pk, None)
+
+def open_session(user, filename, size, content_type='', sha256='', direct=False):
+    """Start an upload of ``size`` bytes, chunked or ``direct`` to the bucket."""
+    if size <= 0 or size > settings.UPLOAD_MAX_SIZE:
+        raise UploadError(f"Size must be between 1 and {settings.UPLOAD_MAX_SIZE} bytes")
+    if direct and not sha256:
+        raise UploadError("sha256 is required for direct uploads")
+    
+    return UploadSession.objects.create(
+        created_by=user,
+        filename=os.path.basename(filename)[:255] or 'upload',
+        content_type=content_type,
+        size=size,
+        sha256=sha256.lower(),
+        direct=direct,
+        expires_at=timezone.now() + timedelta(seconds=settings.UPLOAD_SESSION_TTL)
+    )
+
+def _part_name(session):
+    return f'upload-staging/{session.pk}/{uuid.uuid4().hex}.part'
+
+def _delete_parts(names):
+    for name in names:
+        default_storage.delete(name)
+
+def _check_open(session):
+    if session.status != UploadSession.Status.OPEN:
+        raise UploadError(f"Upload is {session.status}")
+    if session.expires_at <= timezone.now():
+        raise UploadError("Upload has expired")
+
+def write_chunk(session, offset, stream, length):
+    """
+    Append ``length`` bytes read from ``stream`` at ``offset``.
+    
+    The body is streamed to a part in the default storage, so every web
+    worker sees it, and hashed on the way when this process holds the
+    session's running hash. The session row is only locked to publish the
+    part, so slow clients never hold the lock, and a chunk for a stale offset
+    is refused so clients can resume from the session's ``received_bytes``.
+    
+    Returns:
+        UploadSession: The session with its new offset
+    """
+    _check_open(session)
+    if session.direct:
+        raise UploadError("Direct uploads are sent to their presigned URL")
+    if offset != session.received_bytes:
+        raise UploadConflict(f"Expected offset {session.received_bytes}")
+    if length <= 0 or length > settings.UPLOAD_MAX_CHUNK_SIZE:
+        raise UploadError(f"Chunks must be between 1 and {settings.UPLOAD_MAX_CHUNK_SIZE} bytes")
+    if offset + length > session.size:
+        raise UploadError("Chunk runs past the declared size")
+    
+    reader = ChunkReader(stream, length, _running_digest(session, offset))
+    content = File(io.BufferedReader(reader, COPY_BUFFER_SIZE), name='chunk.part')
+    content.size = length
+    name = default_storage.save(_part_name(session), content)
+    
+    if reader.read_bytes != length:
+        default_storage.delete(name)
+        raise UploadError(f"Chunk ended after {reader.read_bytes} of {length} bytes")
+    
+    with transaction.atomic():
+        session = UploadSession.objects.select_for_update().get(pk=session.pk)
+        if session.status != UploadSession.Status.OPEN or session.received_bytes != offset:
+            default_storage.delete(name)
+            raise UploadConflict(f"Expected offset {session.received_bytes}")
+        
+        session.parts.append(name)
+        session.received_bytes = offset + length
+        session.save(update_fields=['parts', 'received_bytes', 'updated_at'])
+    
+    if reader.digest is not None:
+        _remember_digest(session, session.received_bytes, reader.digest)
+    return session
+
+def _digest(names):
+    digest = hashlib.sha256()
+    with PartsReader(names) as reader:
+        for data in iter(lambda: reader.read(COPY_BUFFER_SIZE), b''):
+            digest.update(data)
+    return digest.hexdigest()
+
+def _store_blob(sha256, session, names):
+    blob = StoredBlob.objects.filter(sha256=sha256).first()
+    if blob is not None:
+        return blob
+    
+    blob = StoredBlob(sha256=sha256, size=session.size, content_type=session.content_type)
+    with PartsReader(names) as reader:
+        content = File(io.BufferedReader(reader, COPY_BUFFER_SIZE), name=session.filename)
+        content.size = session.size
+        # Sent as the object's Content-Type by storages that keep one
+        content.content_type = session.content_type or None
+        blob.file.save(session.filename, content, save=False)
+    
+    try:
+        with transaction.atomic():
+            blob.save()
+    except IntegrityError:
+        # Another upload of the same content finished first
+        winner = StoredBlob.objects.get(sha256=sha256)
+        if blob.file.name != winner.file.name:
+            blob.file.delete(save=False)
+        return winner
+    return blob
+
+def complete_session(session):
+    """
+    Finish an upload: verify it, then store it once by content hash.
+    
+    The digest comes from the running hash when this process received every
+    chunk, and from one pass over the parts otherwise. Verifying and writing
+    the blob happen before the session row is locked; the lock is only
+    taken to publish it. Completing twice, or concurrently, returns the same
+    blob.
+    
+    Returns:
+        UploadSession: The completed session, with ``blob`` set
+    """
+    session = UploadSession.objects.get(pk=session.pk)
+    if session.status == UploadSession.Status.COMPLETE:
+        return session
+    
+    _check_open(session)
+    if session.received_bytes != session.size:
+        raise UploadError(f"Received {session.received_bytes} of {session.size} bytes")
+    
+    digest = _running_digest(session, session.size)
+    sha256 = digest.hexdigest() if digest is not None else _digest(session.parts)
+    if session.sha256 and session.sha256 != sha256:
+        raise UploadError("Content does not match the declared SHA-256")
+    
+    blob = _store_blob(sha256, session, session.parts)
+    
+    with transaction.atomic():
+        session = UploadSession.objects.select_for_update().get(pk=session.pk)
+        if session.status == UploadSession.Status.COMPLETE:
+            return session
+        
+        _check_open(session)
+        session.blob = blob
+        session.status = UploadSession.Status.COMPLETE
+        session.save(update_fields=['blob', 'status', 'updated_at'])
+    
+    _forget_digest(session)
+    _delete_parts(session.parts)
+    return session
+
+def abort_session(session):
+    UploadSession.objects.filter(pk=session.pk, status=UploadSession.Status.OPEN).update(
+        status=UploadSession.Status.ABORTED, updated_at=timezone.now()
+    )
+    _forget_digest(session)
+    _delete_parts(UploadSession.objects.get(pk=session.pk).parts)
+
+def completed_blob(upload_id, user):
+    """The blob of one of ``user``'s completed uploads."""
+    try:
+        upload_id = uuid.UUID(str(upload_id))
+    except ValueError:
+        raise UploadError("Invalid upload id")
+    
+    session = (
+        UploadSession.objects.select_related('blob')
+        .filter(pk=upload_id, created_by=user, status=UploadSession.Status.COMPLETE)
+        .first()
+    )
+    if session is None:
+        raise UploadError("Upload not found or not complete")
+    return session.blob
+
+def attach_blob(instance, blob, field):
+    """Point a record's FileField ``field`` at a stored blob without copying it."""
+    setattr(instance, field, blob.file.name)
@@ -0,0 +1,84 @@
+import hashlib
+import io
+import shutil
+import tempfile
+from django.core.files.storage import default_storage
+from django.test import TestCase
+from users.models import User
+from . import services
+from .models import StoredBlob, UploadSession
+from .services import UploadConflict, UploadError, complete_session, open_session, write_chunk
+
+CONTENT = b'Affidavit of service. ' * 64
+
+def upload(session, data, offset=0):
+    return write_chunk(session, offset, io.BytesIO(data), len(data))
+
+class ResumableUploadTests(TestCase):
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        storage = self.settings(
+            MEDIA_ROOT=media, DEFAULT_FILE_STORAGE='django.core.files.storage.FileSystemStorage'
+        )
+        storage.enable()
+        self.addCleanup(storage.disable)
+        self.user = User.objects.create_user(
+            username='lawyer@example.com', email='lawyer@example.com', password='unused-password'
+        )
+    
+    def _session(self, content=CONTENT, sha256=''):
+        return open_session(self.user, 'affidavit.pdf', len(content), 'application/pdf', sha256=sha256)
+    
+    def _read(self, blob):
+        with blob.file.open('rb') as stored:
+            return stored.read()
+    
+    def test_resume_from_the_offset_the_conflict_reports(self):
+        session = self._session()
+        session = upload(session, CONTENT[:100])
+        
+        # The client retries the first chunk, e.g. after a lost response
+        with self.assertRaisesMessage(UploadConflict, 'Expected offset 100'):
+            upload(session, CONTENT[:100])
+        
+        session = upload(session, CONTENT[100:], offset=100)
+        session = complete_session(session)
+        
+        self.assertEqual(session.status, UploadSession.Status.COMPLETE)
+        self.assertEqual(self._read(session.blob), CONTENT)
+        self.assertEqual(session.blob.sha256, hashlib.sha256(CONTENT).hexdigest())
+    
+    def test_digest_from_parts_without_the_running_hash(self):
+        # Chunks received by another worker leave this process no running hash
+        session = upload(self._session(), CONTENT[:100])
+        services._forget_digest(session)
+        session = upload(session, CONTENT[100:], offset=100)
+        
+        session = complete_session(session)
+        
+        self.assertEqual(session.blob.sha256, hashlib.sha256(CONTENT).hexdigest())
+    
+    def test_declared_digest_mismatch_is_refused(self):
+        session = upload(self._session(sha256=hashlib.sha256(b'other').hexdigest()), CONTENT)
+        
+        with self.assertRaisesMessage(UploadError, 'does not match'):
+            complete_session(session)
+        
+        session.refresh_from_db()
+        self.assertEqual(session.status, UploadSession.Status.OPEN)
+        self.assertFalse(StoredBlob.objects.exists())
+    
+    def test_identical_uploads_share_one_blob(self):
+        first = complete_session(upload(self._session(), CONTENT))
+        second = complete_session(upload(self._session(), CONTENT))
+        
+        self.assertEqual(second.blob_id, first.blob_id)
+        self.assertEqual(StoredBlob.objects.count(), 1)
+        for name in first.parts + second.parts:
+            self.assertFalse(default_storage.exists(name))
+    
+    def test_completing_twice_returns_the_same_blob(self):
+        session = complete_session(upload(self._session(), CONTENT))
+        
+        self.assertEqual(complete_session(session).blob_id, session.blob_id)
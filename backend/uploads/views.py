@@ -0,0 +1,114 @@
+from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from .models import UploadSession
+from .serializers import UploadSessionSerializer
+from .direct import (
+    abort_direct_session, complete_direct_session, direct_uploads_enabled, download_url, presign_upload
+)
+from .services import UploadConflict, UploadError, abort_session, complete_session, open_session, write_chunk
+
+class UploadSessionViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin,
+                           mixins.DestroyModelMixin, viewsets.GenericViewSet):
+    """
+    Resumable and direct-to-storage uploads.
+    
+    Create a session, PUT the file in chunks to ``chunk`` with an
+    ``Upload-Offset`` header, then POST ``complete``. After an interruption,
+    GET the session and resume from ``received_bytes``.
+    
+    With S3 storage, sessions are ``direct`` instead: the create response
+    carries a presigned ``upload`` request for the whole file (renewed by
+    POSTing ``presign``), and ``complete`` checks the stored object.
+    
+    The completed upload's id is then passed wherever a document is expected.
+    """
+    serializer_class = UploadSessionSerializer
+    permission_classes = [IsAuthenticated]
+    
+    def get_queryset(self):
+        return UploadSession.objects.filter(created_by=self.request.user).select_related('blob')
+    
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        direct = direct_uploads_enabled()
+        try:
+            session = open_session(request.user, direct=direct, **serializer.validated_data)
+        except UploadError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        data = self.get_serializer(session).data
+        if direct:
+            data['upload'] = presign_upload(session)
+        return Response(data, status=status.HTTP_201_CREATED)
+    
+    @action(detail=True, methods=['post'])
+    def presign(self, request, pk=None):
+        session = self.get_object()
+        if not session.direct or session.status != UploadSession.Status.OPEN:
+            return Response({'error': 'Only open direct uploads can be presigned'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response(presign_upload(session))
+    
+    @action(detail=True, methods=['put', 'patch'])
+    def chunk(self, request, pk=None):
+        session = self.get_object()
+        
+        try:
+            offset = int(request.headers.get('Upload-Offset', ''))
+            length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            return Response({'error': 'Upload-Offset and Content-Length headers are required'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            # The raw body is streamed to disk; request.data is never touched
+            session = write_chunk(session, offset, request.stream, length)
+        except UploadConflict as e:
+            session.refresh_from_db()
+            return Response({'error': str(e), 'received_bytes': session.received_bytes},
+                            status=status.HTTP_409_CONFLICT)
+        except UploadError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        response = Response(self.get_serializer(session).data)
+        response['Upload-Offset'] = str(session.received_bytes)
+        return response
+    
+    @action(detail=True, methods=['post'])
+    def complete(self, request, pk=None):
+        session = self.get_object()
+        
+        try:
+            if session.direct:
+                session = complete_direct_session(session)
+            else:
+                session = complete_session(session)
+        except UploadError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response(self.get_serializer(session).data)
+    
+    def destroy(self, request, *args, **kwargs):
+        session = self.get_object()
+        if session.status == UploadSession.Status.COMPLETE:
+            return Response({'error': 'Completed uploads cannot be aborted'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        
+        if session.direct:
+            abort_direct_session(session)
+        else:
+            abort_session(session)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        session = self.get_object()
+        if session.status != UploadSession.Status.COMPLETE:
+            return Response({'error': 'Upload is not complete'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response({'url': download_url(session.blob, session.filename)})
@@ -0,0 +1,118 @@
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from .models import User, LawyerProfile, NGOProfile, DonorProfile
+
+# Profiles that views reach through ``hasattr(user, '<relation>')``; they are
+# joined when a user is loaded so those checks need no query.
+PROFILE_RELATIONS = {
+    'lawyer_profile': LawyerProfile,
+    'ngo_profile': NGOProfile,
+    'donor_profile': DonorProfile,
+}
+
+def _values(instance):
+    return [getattr(instance, field.attname) for field in instance._meta.concrete_fields]
+
+def _snapshot(user):
+    """Plain field values of a user and of the profiles joined with it."""
+    profiles = {}
+    for relation in PROFILE_RELATIONS:
+        profile = user._state.fields_cache.get(relation)
+        profiles[relation] = None if profile is None else _values(profile)
+    return user._state.db, _values(user), profiles
+
+def _restore(snapshot):
+    """Fresh model instances from a snapshot; nothing is shared between callers."""
+    db, values, profiles = snapshot
+    user = User.from_db(db, [field.attname for field in User._meta.concrete_fields], values)
+    for relation, profile_values in profiles.items():
+        profile = None
+        if profile_values is not None:
+            model = PROFILE_RELATIONS[relation]
+            profile = model.from_db(db, [field.attname for field in model._meta.concrete_fields], profile_values)
+            profile._state.fields_cache['user'] = user
+        # A cached None makes hasattr(user, relation) False without a query
+        user._state.fields_cache[relation] = profile
+    return user
+
+class UserCache:
+    """
+    Small per-process LRU of authenticated users, with a time-to-live.
+    
+    Entries are dropped by signal handlers when a user or profile changes in
+    this process; other processes see the change once the entry expires.
+    Only plain field values are stored and every ``get`` builds new
+    instances, so no model object is shared between requests or threads.
+    """
+    def __init__(self, size, ttl):
+        self.size = size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            snapshot, expires = entry
+            if expires < time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+        return _restore(snapshot)
+    
+    def set(self, user):
+        snapshot = _snapshot(user)
+        with self._lock:
+            self._entries[user.pk] = (snapshot, time.monotonic() + self.ttl)
+            self._entries.move_to_end(user.pk)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+    
+    def discard(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+user_cache = UserCache(settings.AUTH_USER_CACHE_SIZE, settings.AUTH_USER_CACHE_TTL)
+
+def load_user(user_id):
+    """Load a user with its profiles, through the per-process cache."""
+    user = user_cache.get(user_id)
+    if user is None:
+        user = User.objects.select_related(*PROFILE_RELATIONS).get(**{api_settings.USER_ID_FIELD: user_id})
+        user_cache.set(user)
+    return user
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that resolves users from the per-process cache.
+    
+    A warm request costs no queries: the user and its profiles come from the
+    cache, and permission checks read the user's fields.
+    """
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+        
+        try:
+            user = load_user(user_id)
+        except User.DoesNotExist:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        
+        return user
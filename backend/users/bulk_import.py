@@ -0,0 +1,280 @@
+import csv
+import io
+import itertools
+import json
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+import django
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.password_validation import validate_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from .models import User, LawyerProfile, NGOProfile, DonorProfile
+
+FORMATS = ('csv', 'jsonl')
+
+USER_FIELDS = ('email', 'username', 'first_name', 'last_name', 'bio', 'organization', 'location')
+
+PROFILE_MODELS = {
+    User.Role.LAWYER: LawyerProfile,
+    User.Role.NGO: NGOProfile,
+    User.Role.DONOR: DonorProfile,
+}
+
+PROFILE_FIELDS = {
+    User.Role.LAWYER: {
+        'law_society_number': str, 'jurisdiction': str, 'specialization': str, 'years_of_experience': int,
+    },
+    User.Role.NGO: {'registration_number': str, 'website': str, 'year_established': int},
+    User.Role.DONOR: {},
+}
+
+# Profile fields without a usable default
+REQUIRED_PROFILE_FIELDS = {
+    User.Role.LAWYER: ('law_society_number', 'jurisdiction'),
+    User.Role.NGO: ('registration_number',),
+}
+
+IMPORTABLE_ROLES = tuple(PROFILE_MODELS)
+
+def read_rows(stream, fmt):
+    """
+    Yield ``(line number, row dict)`` from a binary CSV or JSON Lines stream.
+    
+    The stream is decoded incrementally, so memory does not grow with the
+    file size.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format: {fmt}")
+    
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='' if fmt == 'csv' else None)
+    if fmt == 'csv':
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, {key: value for key, value in row.items() if key}
+        return
+    
+    for line_number, line in enumerate(text, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_number, {'__error__': f"Invalid JSON: {e}"}
+            continue
+        yield line_number, row if isinstance(row, dict) else {'__error__': 'Each line must be a JSON object'}
+
+def _batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def _clean(line, row):
+    """Validate one row; returns (cleaned data, errors)."""
+    if '__error__' in row:
+        return None, [row['__error__']]
+    
+    errors = []
+    data = {field: str(row.get(field) or '').strip() for field in USER_FIELDS}
+    data['email'] = User.objects.normalize_email(data['email'])
+    role = str(row.get('role') or User.Role.DONOR).strip().lower()
+    password = str(row.get('password') or '')
+    
+    try:
+        validate_email(data['email'])
+    except ValidationError:
+        errors.append('Enter a valid email address')
+    if not data['username']:
+        errors.append('Username is required')
+    if role not in IMPORTABLE_ROLES:
+        errors.append(f"Role must be one of: {', '.join(IMPORTABLE_ROLES)}")
+    if password:
+        try:
+            validate_password(password, User(email=data['email'], username=data['username']))
+        except ValidationError as e:
+            errors.extend(e.messages)
+    else:
+        errors.append('Password is required')
+    
+    profile = {}
+    required = REQUIRED_PROFILE_FIELDS.get(role, ())
+    for field, cast in PROFILE_FIELDS.get(role, {}).items():
+        value = row.get(field)
+        if isinstance(value, str):
+            value = value.strip()
+        if value in (None, ''):
+            if field in required:
+                errors.append(f"{field} is required for the {role} role")
+            continue
+        try:
+            profile[field] = cast(value)
+        except (TypeError, ValueError):
+            errors.append(f"{field} must be a {cast.__name__}")
+    
+    if errors:
+        return None, errors
+    return {'line': line, 'user': data, 'role': role, 'password': password, 'profile': profile}, []
+
+def _init_hash_worker():
+    # Spawned workers start without Django; the hashers read settings
+    if not apps.ready:
+        django.setup()
+
+class UserImporter:
+    """
+    Bulk create users and their role profiles from streamed rows.
+    
+    Rows are validated a batch at a time, duplicates are checked against the
+    batch and the database with one query, passwords are hashed on a process
+    pool (PBKDF2 holds the GIL, so threads would hash one at a time), and
+    each batch is written with ``bulk_create`` in its own transaction.
+    Every input row gets a report entry, and ``on_batch`` is called with the
+    importer inside each batch's transaction, so progress recorded there
+    commits with the rows.
+    """
+    def __init__(self, batch_size=None, workers=None, report=None, on_batch=None):
+        self.batch_size = batch_size or settings.USER_IMPORT_BATCH_SIZE
+        self.workers = workers or settings.USER_IMPORT_HASH_WORKERS
+        self.report = report
+        self.on_batch = on_batch
+        self.created = 0
+        self.failed = 0
+        self.processed = 0
+    
+    def _record(self, line, email, errors=None):
+        if errors:
+            self.failed += 1
+        else:
+            self.created += 1
+        if self.report is not None:
+            self.report({'line': line, 'email': email, 'status': 'error' if errors else 'created', 'errors': errors or []})
+    
+    def _deduplicate(self, valid):
+        emails = {row['user']['email'] for row in valid}
+        usernames = {row['user']['username'] for row in valid}
+        taken = User.objects.filter(Q(email__in=emails) | Q(username__in=usernames)).values_list('email', 'username')
+        taken_emails = {email for email, _ in taken}
+        taken_usernames = {username for _, username in taken}
+        
+        unique = []
+        for row in valid:
+            email, username = row['user']['email'], row['user']['username']
+            errors = []
+            if email in taken_emails:
+                errors.append('Email is already registered')
+            if username in taken_usernames:
+                errors.append('Username is already taken')
+            if errors:
+                self._record(row['line'], email, errors)
+                continue
+            taken_emails.add(email)
+            taken_usernames.add(username)
+            unique.append(row)
+        return unique
+    
+    def _build(self, row, encoded):
+        return User(**row['user'], role=row['role'], password=encoded)
+    
+    def _write(self, rows, users):
+        from ai.jobs import submit_lawyer_embeddings
+        
+        with transaction.atomic():
+            users = User.objects.bulk_create(users)
+            profiles = {}
+            for row, user in zip(rows, users):
+                profiles.setdefault(row['role'], []).append(PROFILE_MODELS[row['role']](user=user, **row['profile']))
+            for role, objs in profiles.items():
+                PROFILE_MODELS[role].objects.bulk_create(objs)
+            
+            # bulk_create sends no post_save, so the lawyers are queued for
+            # embedding here, to run once the batch commits
+            submit_lawyer_embeddings(lawyer.pk for lawyer in profiles.get(User.Role.LAWYER, []))
+    
+    def _write_one(self, row, user):
+        with transaction.atomic():
+            user.save()
+            PROFILE_MODELS[row['role']].objects.create(user=user, **row['profile'])
+    
+    def _import_batch(self, batch, pool):
+        valid = []
+        for line, row in batch:
+            cleaned, errors = _clean(line, row)
+            if errors:
+                self._record(line, str(row.get('email', '')), errors)
+            else:
+                valid.append(cleaned)
+        
+        valid = self._deduplicate(valid)
+        if not valid:
+            return
+        
+        passwords = [row['password'] for row in valid]
+        encoded = pool.map(make_password, passwords, chunksize=max(len(passwords) // (self.workers * 4), 1))
+        users = [self._build(row, password) for row, password in zip(valid, encoded)]
+        
+        try:
+            self._write(valid, users)
+        except IntegrityError:
+            # A concurrent registration took a name; fall back to row by row
+            # so only the conflicting rows fail
+            for row, user in zip(valid, users):
+                user.pk = None
+                try:
+                    self._write_one(row, user)
+                except IntegrityError as e:
+                    self._record(row['line'], row['user']['email'], [str(e)])
+                else:
+                    self._record(row['line'], row['user']['email'])
+            return
+        
+        for row in valid:
+            self._record(row['line'], row['user']['email'])
+    
+    def run(self, rows):
+        """
+        Import ``(line number, row)`` pairs.
+        
+        Returns:
+            dict: created and failed counts, elapsed seconds and rows per second
+        """
+        started = time.monotonic()
+        # Spawned rather than forked: imports run on a job thread, and forking
+        # a multithreaded process can copy a held lock into the child
+        pool = ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'), initializer=_init_hash_worker
+        )
+        with pool:
+            for batch in _batches(rows, self.batch_size):
+                with transaction.atomic():
+                    self._import_batch(batch, pool)
+                    self.processed += len(batch)
+                    if self.on_batch is not None:
+                        self.on_batch(self)
+        
+        elapsed = time.monotonic() - started
+        total = self.created + self.failed
+        return {
+            'created': self.created,
+            'failed': self.failed,
+            'elapsed': round(elapsed, 3),
+            'rows_per_second': round(total / max(elapsed, 1e-6), 1),
+        }
+
+def import_users(stream, fmt, report=None, skip=0, **options):
+    """
+    Import users from a binary CSV or JSON Lines stream; see UserImporter.
+    
+    ``skip`` leaves out that many leading rows, e.g. the batches a resumed
+    job already committed.
+    """
+    return UserImporter(report=report, **options).run(itertools.islice(read_rows(stream, fmt), skip, None))
@@ -0,0 +1,103 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+from haki.heartbeat import Heartbeat
+from .bulk_import import import_users
+from .models import UserImportJob
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=settings.USER_IMPORT_JOB_WORKERS, thread_name_prefix='user-import-job')
+        return _executor
+
+def submit_user_import(upload, fmt, user=None):
+    """
+    Store an uploaded import file and queue it to run off the request thread.
+    
+    The job starts once the surrounding transaction commits; poll it for the
+    counts and the failed rows.
+    
+    Returns:
+        UserImportJob: The queued job
+    """
+    job = UserImportJob(format=fmt, created_by=user)
+    job.file.save(upload.name, upload, save=False)
+    job.save()
+    transaction.on_commit(lambda: _get_executor().submit(run_user_import, job.pk))
+    return job
+
+def run_user_import(job_id, stale_before=None):
+    """
+    Run a queued import job, recording the counts and failed rows on the row.
+    
+    Progress is saved with every batch, in the batch's transaction, so a job
+    interrupted by a restart resumes after the last committed batch (see the
+    ``resume_user_imports`` command) instead of importing rows twice. Only a
+    queued job is claimed, or a running one whose heartbeat (``updated_at``)
+    is older than ``stale_before``.
+    
+    Args:
+        job_id: Primary key of the job
+        stale_before (datetime, optional): Take over running jobs idle since before this
+    """
+    close_old_connections()
+    try:
+        claimable = Q(status=UserImportJob.Status.QUEUED)
+        if stale_before is not None:
+            claimable |= Q(status=UserImportJob.Status.RUNNING, updated_at__lt=stale_before)
+        
+        claimed = UserImportJob.objects.filter(claimable, pk=job_id).update(
+            status=UserImportJob.Status.RUNNING, updated_at=timezone.now()
+        )
+        if not claimed:
+            return
+        
+        job = UserImportJob.objects.get(pk=job_id)
+        
+        # Only failed rows are kept; successful ones are counted
+        errors = list(job.errors)
+        def report(entry):
+            if entry['status'] == 'error':
+                errors.append(entry)
+        
+        def save_progress(importer):
+            UserImportJob.objects.filter(pk=job_id).update(
+                processed_rows=job.processed_rows + importer.processed,
+                created_count=job.created_count + importer.created,
+                failed_count=job.failed_count + importer.failed,
+                errors=errors,
+                updated_at=timezone.now()
+            )
+        
+        heartbeat = Heartbeat(
+            lambda: UserImportJob.objects.filter(pk=job_id, status=UserImportJob.Status.RUNNING).update(
+                updated_at=timezone.now()
+            ),
+            settings.USER_IMPORT_HEARTBEAT_INTERVAL
+        )
+        try:
+            with heartbeat, job.file.open('rb') as stream:
+                import_users(stream, job.format, report=report, skip=job.processed_rows, on_batch=save_progress)
+        except Exception as e:
+            logger.warning("User import %s failed: %s", job_id, e)
+            UserImportJob.objects.filter(pk=job_id).update(
+                status=UserImportJob.Status.FAILED, error_message=str(e), updated_at=timezone.now()
+            )
+            return
+        
+        UserImportJob.objects.filter(pk=job_id).update(
+            status=UserImportJob.Status.SUCCEEDED, updated_at=timezone.now()
+        )
+    finally:
+        close_old_connections()
@@ -0,0 +1,196 @@
+import hashlib
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.cache import cache
+from .models import User
+
+class LoginThrottled(Exception):
+    """Too many login attempts from this client or for this account."""
+    def __init__(self, retry_after):
+        super().__init__(f"Retry after {retry_after}s")
+        self.retry_after = retry_after
+
+class LoginBusy(Exception):
+    """The hashing pool is saturated; the client should retry shortly."""
+    def __init__(self, retry_after):
+        super().__init__(f"Retry after {retry_after}s")
+        self.retry_after = retry_after
+
+class CacheTokenBucket:
+    """
+    Token bucket kept in the shared cache, one bucket per key.
+    
+    A bucket holds up to ``capacity`` tokens, refills at ``rate`` tokens per
+    minute and every attempt takes one, so bursts up to ``capacity`` pass
+    and the long-run rate is ``rate``. The bucket's (tokens, updated at)
+    state is read and written under a short per-key lock taken with
+    cache.add, which is atomic in the shared cache backends, so concurrent
+    requests cannot overdraw it.
+    """
+    lock_timeout = 2
+    lock_attempts = 20
+    
+    def __init__(self, prefix, rate, capacity):
+        self.prefix = prefix
+        self.capacity = capacity
+        self.per_second = rate / 60
+        # A bucket left alone this long is full again, which is also what a missing key reads as
+        self.ttl = int(capacity / self.per_second) + 60
+    
+    def _key(self, identity):
+        return f'login-bucket:{self.prefix}:{identity}'
+    
+    def _tokens(self, state, now):
+        if state is None:
+            return self.capacity
+        tokens, updated = state
+        return min(self.capacity, tokens + (now - updated) * self.per_second)
+    
+    def _wait(self, tokens):
+        return math.ceil((1 - tokens) / self.per_second)
+    
+    def retry_after(self, identity):
+        """Seconds until an attempt is allowed; 0 when one is allowed now."""
+        tokens = self._tokens(cache.get(self._key(identity)), time.time())
+        return 0 if tokens >= 1 else self._wait(tokens)
+    
+    def consume(self, identity):
+        """Take a token; returns the seconds to wait instead when the bucket is empty."""
+        key = self._key(identity)
+        lock = f'{key}:lock'
+        for _ in range(self.lock_attempts):
+            if cache.add(lock, 1, timeout=self.lock_timeout):
+                break
+            time.sleep(0.005)
+        else:
+            # Attempts for this key are arriving faster than they can be counted
+            return 1
+        
+        try:
+            now = time.time()
+            tokens = self._tokens(cache.get(key), now)
+            if tokens < 1:
+                return self._wait(tokens)
+            cache.set(key, (tokens - 1, now), timeout=self.ttl)
+            return 0
+        finally:
+            cache.delete(lock)
+
+class HashingPool:
+    """
+    Bounded pool for password hashing with queue-depth backpressure.
+    
+    At most ``workers`` hashes run at once and at most ``max_pending`` wait;
+    beyond that new work is refused straight away so web workers are never
+    tied up behind a flood of hashing. Django's PBKDF2 and Argon2 hashers
+    release the GIL, so threads hash in parallel.
+    """
+    def __init__(self, workers, max_pending, timeout):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='login-hash')
+        self.slots = threading.BoundedSemaphore(workers + max_pending)
+        self.timeout = timeout
+    
+    def run(self, func, *args):
+        if not self.slots.acquire(blocking=False):
+            raise LoginBusy(retry_after=1)
+        try:
+            future = self.executor.submit(func, *args)
+        except BaseException:
+            self.slots.release()
+            raise
+        future.add_done_callback(lambda _: self.slots.release())
+        
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            raise LoginBusy(retry_after=int(self.timeout) + 1)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_hashing_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = HashingPool(
+                settings.LOGIN_HASH_WORKERS, settings.LOGIN_HASH_MAX_PENDING, settings.LOGIN_HASH_TIMEOUT
+            )
+        return _pool
+
+ip_limit = CacheTokenBucket('ip', settings.LOGIN_IP_RATE, settings.LOGIN_IP_BURST)
+account_limit = CacheTokenBucket('account', settings.LOGIN_ACCOUNT_RATE, settings.LOGIN_ACCOUNT_BURST)
+
+def client_ip(request):
+    """
+    Address a login attempt is throttled by.
+    
+    The first X-Forwarded-For hop is only trusted behind a proxy that sets
+    it (``LOGIN_TRUST_X_FORWARDED_FOR``).
+    """
+    if settings.LOGIN_TRUST_X_FORWARDED_FOR:
+        forwarded = request.META.get('HTTP_X_FORWARDED_FOR', '')
+        if forwarded:
+            return forwarded.split(',')[0].strip()
+    return request.META.get('REMOTE_ADDR', '')
+
+def _account_identity(email):
+    # Failures are counted per account whatever the client, so stuffing
+    # spread across many addresses still drains the account's bucket
+    return hashlib.sha256(email.strip().lower().encode()).hexdigest()
+
+def _verify(password, encoded):
+    """Check a password and, when its hash is outdated, compute the replacement."""
+    upgraded = []
+    valid = check_password(password, encoded, setter=lambda raw: upgraded.append(make_password(raw)))
+    return valid, upgraded[0] if upgraded else None
+
+def _dummy_verify(password):
+    # Keep unknown accounts as slow as known ones
+    make_password(password)
+    return False, None
+
+def attempt_login(email, password, client_ip):
+    """
+    Authenticate an email/password pair through the throttled login pipeline.
+    
+    Every attempt takes a token from the client IP's bucket; failed attempts
+    also take one from the account's bucket, keyed on the normalised email
+    alone, so a run spread across many addresses is throttled as one. The
+    account bucket refills steadily, so its owner is held off for seconds,
+    not locked out. Hashing runs in the bounded pool, and hashes made with outdated
+    parameters are upgraded on a successful login.
+    
+    Returns:
+        User: The authenticated user, or None for bad credentials
+    
+    Raises:
+        LoginThrottled: The IP or account is over its attempt budget
+        LoginBusy: The hashing pool is saturated
+    """
+    account = _account_identity(email or '')
+    
+    retry_after = ip_limit.consume(client_ip) or account_limit.retry_after(account)
+    if retry_after:
+        raise LoginThrottled(retry_after)
+    
+    user = User.objects.filter(**{User.USERNAME_FIELD: email}).first() if email and password else None
+    pool = get_hashing_pool()
+    
+    if user is None or not user.is_active:
+        pool.run(_dummy_verify, password or '')
+        account_limit.consume(account)
+        return None
+    
+    valid, upgraded = pool.run(_verify, password, user.password)
+    if not valid:
+        account_limit.consume(account)
+        return None
+    
+    if upgraded:
+        user.password = upgraded
+        user.save(update_fields=['password'])
+    return user
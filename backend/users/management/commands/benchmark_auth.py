@@ -0,0 +1,51 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from users.authentication import CachedJWTAuthentication, user_cache
+from users.models import User
+from users.permissions import IsAdminUser
+from users.tokens import tokens_for_user
+
+class Command(BaseCommand):
+    help = 'Report per-request authentication overhead and queries, uncached and cached'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--email', help='User to authenticate as (defaults to the first user)')
+        parser.add_argument('--requests', type=int, default=1000)
+    
+    def _measure(self, authenticator, request_for, count):
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            for _ in range(count):
+                request = request_for()
+                user, token = authenticator.authenticate(request)
+                request.user, request.auth = user, token
+                IsAdminUser().has_permission(request, None)
+            elapsed = time.perf_counter() - started
+        return elapsed / count * 1e6, len(queries) / count
+    
+    def handle(self, *args, **options):
+        users = User.objects.order_by('pk')
+        user = users.filter(email=options['email']).first() if options['email'] else users.first()
+        if user is None:
+            raise CommandError('No user to authenticate as')
+        
+        access = tokens_for_user(user)['access']
+        factory = APIRequestFactory()
+        
+        def request_for():
+            return factory.get('/', HTTP_AUTHORIZATION=f'Bearer {access}')
+        
+        count = options['requests']
+        cached = CachedJWTAuthentication()
+        user_cache.clear()
+        
+        results = [
+            ('JWTAuthentication', self._measure(JWTAuthentication(), request_for, count)),
+            ('CachedJWTAuthentication', self._measure(cached, request_for, count)),
+        ]
+        for name, (micros, queries) in results:
+            self.stdout.write(f"{name}: {micros:.1f}us and {queries:.3f} queries per request")
@@ -0,0 +1,52 @@
+import io
+import json
+import secrets
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from users.bulk_import import import_users
+
+class Rollback(Exception):
+    pass
+
+class Command(BaseCommand):
+    help = 'Measure bulk user import throughput on synthetic rows, rolling everything back'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=5000)
+        parser.add_argument('--batch-sizes', type=int, nargs='+', default=[100, 500, 1000])
+        parser.add_argument('--workers', type=int, nargs='+', default=[1, 4])
+    
+    def _dataset(self, rows):
+        run = secrets.token_hex(4)
+        roles = ['donor', 'lawyer', 'ngo']
+        lines = []
+        for index in range(rows):
+            role = roles[index % len(roles)]
+            lines.append(json.dumps({
+                'email': f'bench-{run}-{index}@example.com',
+                'username': f'bench-{run}-{index}',
+                'password': f'Haki-{secrets.token_hex(6)}',
+                'role': role,
+                'jurisdiction': 'Kenya' if role == 'lawyer' else '',
+                'law_society_number': f'LSK-{run}-{index}' if role == 'lawyer' else '',
+                'registration_number': f'NGO-{run}-{index}' if role == 'ngo' else '',
+            }))
+        return '\n'.join(lines).encode()
+    
+    def handle(self, *args, **options):
+        data = self._dataset(options['rows'])
+        
+        for workers in options['workers']:
+            for batch_size in options['batch_sizes']:
+                summary = {}
+                try:
+                    with transaction.atomic():
+                        summary = import_users(io.BytesIO(data), 'jsonl', batch_size=batch_size, workers=workers)
+                        raise Rollback()
+                except Rollback:
+                    pass
+                
+                self.stdout.write(
+                    f"workers={workers} batch={batch_size}: {summary['created']} created, "
+                    f"{summary['failed']} failed, {summary['rows_per_second']} rows/s"
+                )
@@ -0,0 +1,44 @@
+import json
+import sys
+from django.core.management.base import BaseCommand, CommandError
+from users.bulk_import import FORMATS, import_users
+
+class Command(BaseCommand):
+    help = 'Bulk create users and role profiles from a CSV or JSON Lines file'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Input file, or - for stdin')
+        parser.add_argument('--format', choices=FORMATS, help='Defaults to the file extension')
+        parser.add_argument('--batch-size', type=int, help='Rows validated and written per transaction')
+        parser.add_argument('--workers', type=int, help='Password hashing threads')
+        parser.add_argument('--report', help='Write a JSON Lines row-by-row report to this file')
+    
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv')
+        
+        report_file = open(options['report'], 'w') if options['report'] else None
+        
+        def report(entry):
+            if report_file is not None:
+                report_file.write(json.dumps(entry) + '\n')
+            elif entry['status'] == 'error':
+                self.stderr.write(f"Line {entry['line']} ({entry['email']}): {'; '.join(entry['errors'])}")
+        
+        try:
+            stream = sys.stdin.buffer if path == '-' else open(path, 'rb')
+        except OSError as e:
+            raise CommandError(str(e))
+        
+        try:
+            summary = import_users(stream, fmt, report=report,
+                                   batch_size=options['batch_size'], workers=options['workers'])
+        finally:
+            stream.close()
+            if report_file is not None:
+                report_file.close()
+        
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {summary['created']} users, {summary['failed']} rows failed, "
+            f"in {summary['elapsed']}s ({summary['rows_per_second']} rows/s)"
+        ))
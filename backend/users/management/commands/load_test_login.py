@@ -0,0 +1,70 @@
+import secrets
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from django.core.management.base import BaseCommand
+
+class Command(BaseCommand):
+    help = 'Drive a credential-stuffing load at the login endpoint and report legitimate login latency'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://localhost:8000/api/users/login/')
+        parser.add_argument('--email', required=True, help='Account used for legitimate logins')
+        parser.add_argument('--password', required=True)
+        parser.add_argument('--attackers', type=int, default=50, help='Concurrent attack clients')
+        parser.add_argument('--legit-interval', type=float, default=0.5, help='Seconds between legitimate logins')
+        parser.add_argument('--duration', type=float, default=30, help='Seconds to run')
+    
+    def _post(self, session, url, email, password, headers=None):
+        started = time.perf_counter()
+        try:
+            status = session.post(url, json={'email': email, 'password': password}, headers=headers,
+                                  timeout=30).status_code
+        except requests.RequestException:
+            status = 'error'
+        return status, time.perf_counter() - started
+    
+    def handle(self, *args, **options):
+        url = options['url']
+        deadline = time.monotonic() + options['duration']
+        attack_statuses = Counter()
+        legit = []
+        lock = threading.Lock()
+        
+        def attack():
+            session = requests.Session()
+            while time.monotonic() < deadline:
+                email = f'{secrets.token_hex(4)}@example.com'
+                # Spread over many addresses, as a botnet would; only honoured
+                # when the server runs with LOGIN_TRUST_X_FORWARDED_FOR
+                address = '.'.join(str(octet) for octet in secrets.token_bytes(4))
+                status, _ = self._post(session, url, email, secrets.token_hex(8), {'X-Forwarded-For': address})
+                with lock:
+                    attack_statuses[status] += 1
+        
+        def legitimate():
+            session = requests.Session()
+            while time.monotonic() < deadline:
+                legit.append(self._post(session, url, options['email'], options['password']))
+                time.sleep(options['legit_interval'])
+        
+        with ThreadPoolExecutor(max_workers=options['attackers'] + 1) as executor:
+            for _ in range(options['attackers']):
+                executor.submit(attack)
+            executor.submit(legitimate)
+        
+        self.stdout.write(f"Attack responses: {dict(attack_statuses)}")
+        if not legit:
+            return
+        
+        latencies = sorted(latency for _, latency in legit)
+        def percentile(p):
+            return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+        
+        self.stdout.write(f"Legitimate responses: {dict(Counter(status for status, _ in legit))}")
+        self.stdout.write(
+            f"Legitimate latency: p50 {percentile(0.5):.0f}ms, p99 {percentile(0.99):.0f}ms, "
+            f"max {latencies[-1] * 1000:.0f}ms over {len(latencies)} logins"
+        )
@@ -0,0 +1,25 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+from users.jobs import run_user_import
+from users.models import UserImportJob
+
+class Command(BaseCommand):
+    help = 'Run user imports left queued or running by a restarted process, resuming after their last committed batch'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--stale-after', type=int, default=300,
+                            help='Seconds without a heartbeat before a running import is taken over')
+    
+    def handle(self, *args, **options):
+        stale = timezone.now() - timedelta(seconds=options['stale_after'])
+        job_ids = UserImportJob.objects.filter(
+            Q(status=UserImportJob.Status.QUEUED, created_at__lt=stale)
+            | Q(status=UserImportJob.Status.RUNNING, updated_at__lt=stale)
+        ).values_list('pk', flat=True)
+        
+        for job_id in job_ids:
+            run_user_import(job_id, stale_before=stale)
+            job = UserImportJob.objects.get(pk=job_id)
+            self.stdout.write(f"Import {job_id}: {job.status}, {job.created_count} created, {job.failed_count} failed")
@@ -1,17 +1,28 @@
 from rest_framework import permissions
 
+def request_role(request):
+    """
+    The user's current role.
+    
+    Read from the user, which CachedJWTAuthentication loads through the
+    user cache, never from the token: claims live as long as the token, and
+    a demoted admin must lose access straight away.
+    """
+    return getattr(request.user, 'role', None)
+
 class IsAdminUser(permissions.BasePermission):
     def has_permission(self, request, view):
-        return request.user and request.user.role == 'admin'
+        return bool(request.user and request.user.is_authenticated and request_role(request) == 'admin')
 
 class IsOwnerOrAdmin(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         # Allow if user is admin
-        if request.user.role == 'admin':
+        if request_role(request) == 'admin':
             return True
         
         # Allow if user is the owner
+        if hasattr(obj, 'user_id'):
+            return obj.user_id == request.user.pk
         if hasattr(obj, 'user'):
             return obj.user == request.user
         return obj == request.user
-
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import User, LawyerProfile, NGOProfile, DonorProfile
+from .models import User, LawyerProfile, NGOProfile, DonorProfile, UserImportJob
 
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
@@ -77,3 +77,9 @@ class LawyerVerificationSerializer(serializers.ModelSerializer):
         fields = ['law_society_number', 'jurisdiction', 'specialization',
                   'years_of_experience', 'id_document', 'law_society_document']
 
+class UserImportJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = UserImportJob
+        fields = ['id', 'format', 'status', 'processed_rows', 'created_count', 'failed_count', 'errors',
+                  'error_message', 'created_at', 'updated_at']
+        read_only_fields = fields
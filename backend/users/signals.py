@@ -0,0 +1,14 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .authentication import user_cache
+from .models import User, LawyerProfile, NGOProfile, DonorProfile
+
+@receiver([post_save, post_delete], sender=User)
+def forget_cached_user(sender, instance, **kwargs):
+    user_cache.discard(instance.pk)
+
+@receiver([post_save, post_delete], sender=LawyerProfile)
+@receiver([post_save, post_delete], sender=NGOProfile)
+@receiver([post_save, post_delete], sender=DonorProfile)
+def forget_profile_user(sender, instance, **kwargs):
+    user_cache.discard(instance.user_id)
@@ -0,0 +1,41 @@
+from rest_framework_simplejwt.tokens import RefreshToken
+
+def _profile(user, relation):
+    # A missing reverse one-to-one raises a subclass of AttributeError
+    return getattr(user, relation, None)
+
+def user_claims(user):
+    """
+    Authorization facts embedded in a user's tokens.
+    
+    They are informational, for clients: they are as fresh as the token, so
+    authorization always reads the user instead.
+    """
+    lawyer_profile = _profile(user, 'lawyer_profile')
+    ngo_profile = _profile(user, 'ngo_profile')
+    donor_profile = _profile(user, 'donor_profile')
+    return {
+        'role': user.role,
+        'is_verified': user.is_verified,
+        'is_staff': user.is_staff,
+        'lawyer_profile_id': lawyer_profile.pk if lawyer_profile else None,
+        'lawyer_verification': lawyer_profile.verification_status if lawyer_profile else None,
+        'ngo_profile_id': ngo_profile.pk if ngo_profile else None,
+        'donor_profile_id': donor_profile.pk if donor_profile else None,
+    }
+
+def tokens_for_user(user):
+    """
+    Issue a refresh/access token pair carrying the user's claims.
+    
+    Returns:
+        dict: refresh and access tokens, as strings
+    """
+    refresh = RefreshToken.for_user(user)
+    for name, value in user_claims(user).items():
+        refresh[name] = value
+    
+    return {
+        'refresh': str(refresh),
+        'access': str(refresh.access_token),
+    }
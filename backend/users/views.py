@@ -1,14 +1,18 @@
 from rest_framework import viewsets, permissions, status, generics
 from rest_framework.response import Response
 from rest_framework.decorators import action
-from rest_framework_simplejwt.tokens import RefreshToken
-from django.contrib.auth import authenticate
-from .models import User, LawyerProfile, NGOProfile, DonorProfile
+from .models import User, LawyerProfile, NGOProfile, DonorProfile, UserImportJob
 from .serializers import (
     UserSerializer, LawyerProfileSerializer, NGOProfileSerializer,
-    DonorProfileSerializer, UserRegistrationSerializer, LawyerVerificationSerializer
+    DonorProfileSerializer, UserRegistrationSerializer, LawyerVerificationSerializer,
+    UserImportJobSerializer
 )
 from .permissions import IsAdminUser, IsOwnerOrAdmin
+from .bulk_import import FORMATS
+from .jobs import submit_user_import
+from .login import LoginBusy, LoginThrottled, attempt_login, client_ip
+from .tokens import tokens_for_user
+from uploads.services import UploadError, attach_blob, completed_blob
 
 class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
@@ -20,20 +24,49 @@ class UserViewSet(viewsets.ModelViewSet):
             return [permissions.AllowAny()]
         elif self.action in ['update', 'partial_update', 'destroy']:
             return [IsOwnerOrAdmin()]
+        elif self.action in ['bulk_import', 'bulk_import_status']:
+            return [IsAdminUser()]
         return super().get_permissions()
     
+    @action(detail=False, methods=['post'])
+    def bulk_import(self, request):
+        """Queue an import of users and role profiles from a CSV or JSON Lines file (admin only)"""
+        upload = request.FILES.get('file')
+        if not upload:
+            return Response({'error': 'A CSV or JSON Lines file is required'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        fmt = request.data.get('format') or ('jsonl' if upload.name.endswith(('.jsonl', '.ndjson')) else 'csv')
+        if fmt not in FORMATS:
+            return Response({'error': f"Format must be one of: {', '.join(FORMATS)}"}, status=status.HTTP_400_BAD_REQUEST)
+        
+        job = submit_user_import(upload, fmt, request.user)
+        return Response(UserImportJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+    
+    @action(detail=False, methods=['get'], url_path=r'bulk_import/(?P<job_id>[0-9]+)')
+    def bulk_import_status(self, request, job_id=None):
+        """Progress and outcome of a queued import (admin only)"""
+        job = UserImportJob.objects.filter(pk=job_id).first()
+        if job is None:
+            return Response({'error': 'Import not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(UserImportJobSerializer(job).data)
+    
     @action(detail=False, methods=['post'])
     def login(self, request):
         email = request.data.get('email')
         password = request.data.get('password')
         
-        user = authenticate(email=email, password=password)
+        try:
+            user = attempt_login(email, password, client_ip(request))
+        except LoginThrottled as e:
+            return Response({'error': 'Too many login attempts'}, status=status.HTTP_429_TOO_MANY_REQUESTS,
+                            headers={'Retry-After': str(e.retry_after)})
+        except LoginBusy as e:
+            return Response({'error': 'Login is temporarily unavailable'}, status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                            headers={'Retry-After': str(e.retry_after)})
         
         if user:
-            refresh = RefreshToken.for_user(user)
             return Response({
-                'refresh': str(refresh),
-                'access': str(refresh.access_token),
+                **tokens_for_user(user),
                 'user': UserSerializer(user).data
             })
         
@@ -44,10 +77,8 @@ class UserViewSet(viewsets.ModelViewSet):
         serializer = UserRegistrationSerializer(data=request.data)
         if serializer.is_valid():
             user = serializer.save()
-            refresh = RefreshToken.for_user(user)
             return Response({
-                'refresh': str(refresh),
-                'access': str(refresh.access_token),
+                **tokens_for_user(user),
                 'user': UserSerializer(user).data
             }, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -130,6 +161,15 @@ class LawyerProfileViewSet(viewsets.ModelViewSet):
             if law_society_document:
                 lawyer_profile.law_society_document = law_society_document
             
+            # Documents sent earlier through resumable upload sessions
+            for field in ('id_document', 'law_society_document'):
+                upload_id = request.data.get(f'{field}_upload')
+                if upload_id:
+                    try:
+                        attach_blob(lawyer_profile, completed_blob(upload_id, user), field=field)
+                    except UploadError as e:
+                        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            
             # Save other fields from serializer
             lawyer_profile = serializer.save(verification_status=LawyerProfile.VerificationStatus.PENDING)
             